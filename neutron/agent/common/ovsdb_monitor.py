@@ -13,14 +13,18 @@
 #    under the License.
 
 import contextlib
+import threading
 
 import eventlet
 from oslo_config import cfg
 from oslo_log import log as logging
 from oslo_serialization import jsonutils
+from ovs.db import idl
+from ovsdbapp.backend.ovs_idl import connection
 
 from neutron.agent.common import async_process
 from neutron.agent.ovsdb import api as ovsdb
+from neutron.agent.ovsdb.native import connection as n_connection
 from neutron.agent.ovsdb.native import helpers
 from neutron.common import utils
 from neutron.plugins.ml2.drivers.openvswitch.agent.common import constants
@@ -146,6 +150,143 @@ class SimpleInterfaceMonitor(OvsdbMonitor):
             event['ofport'] = dev_to_ofport.get(event['name'], event['ofport'])
 
 
+class InterfaceIdl(idl.Idl):
+    """An IDL following the name, ofport and external_ids of interfaces.
+
+    Row notifications are turned into the device dicts used by
+    SimpleInterfaceMonitor and queued in new_events. The devices seen are
+    cached, so when the connection is re-established after an ovsdb-server
+    restart and the whole table is sent again, only the interfaces which
+    really changed while disconnected are reported.
+    """
+
+    COLUMNS = ['name', 'ofport', 'external_ids']
+
+    def __init__(self, remote, schema_helper):
+        super(InterfaceIdl, self).__init__(remote, schema_helper)
+        self._lock = threading.Lock()
+        self._devices = {}
+        self._synced_seqno = None
+        self._stale = None
+        self._reset_events()
+
+    def _reset_events(self):
+        self.new_events = {'added': [], 'removed': [], 'modified': []}
+        # The queued 'added' or 'modified' device of each row, so that
+        # further updates in the same batch are merged into it.
+        self._pending = {}
+
+    @staticmethod
+    def _get_device(row):
+        return {'name': row.name,
+                'ofport': row.ofport[0] if row.ofport else [],
+                'external_ids': dict(row.external_ids)}
+
+    def get_events(self):
+        with self._lock:
+            events = self.new_events
+            self._reset_events()
+        return events
+
+    @property
+    def has_updates(self):
+        with self._lock:
+            return any(self.new_events.values())
+
+    def run(self):
+        changed = super(InterfaceIdl, self).run()
+        with self._lock:
+            if self._last_seqno != self._synced_seqno:
+                # (Re)connected: the monitor request was just sent and its
+                # reply will list every row again.
+                self._synced_seqno = self._last_seqno
+                self._stale = set(self._devices)
+            elif self._stale is not None and self._monitor_request_id is None:
+                # Rows not listed again were deleted while disconnected.
+                for uuid in self._stale:
+                    self._queue('removed', uuid, self._devices.pop(uuid))
+                self._stale = None
+        return changed
+
+    def _queue(self, action, uuid, device):
+        device = dict(device)
+        self.new_events[action].append(device)
+        if action == 'removed':
+            self._pending.pop(uuid, None)
+        else:
+            self._pending[uuid] = device
+
+    def notify(self, event, row, updates=None):
+        device = self._get_device(row)
+        with self._lock:
+            if event == idl.ROW_DELETE:
+                self._devices.pop(row.uuid, None)
+                self._queue('removed', row.uuid, device)
+                return
+            if self._stale is not None:
+                self._stale.discard(row.uuid)
+            old_device = self._devices.get(row.uuid)
+            self._devices[row.uuid] = device
+            if old_device == device:
+                return
+            pending = self._pending.get(row.uuid)
+            if pending is not None:
+                pending.update(device)
+            elif old_device is None:
+                self._queue('added', row.uuid, device)
+            else:
+                self._queue('modified', row.uuid, device)
+
+
+class NativeInterfaceMonitor(object):
+    """Monitors the Interface table through an in-process IDL connection.
+
+    This provides the same interface as SimpleInterfaceMonitor without
+    running and parsing the output of an ovsdb-client subprocess. The IDL
+    reconnects on its own when ovsdb-server restarts.
+    """
+
+    def __init__(self, ovsdb_connection=None, timeout=None):
+        self.ovsdb_connection = (ovsdb_connection or
+                                 cfg.CONF.OVS.ovsdb_connection)
+        self.timeout = timeout or cfg.CONF.OVS.ovsdb_timeout
+        self._connection = None
+
+    def _idl_factory(self):
+        helper = n_connection.get_schema_helper(self.ovsdb_connection)
+        helper.register_columns('Interface', InterfaceIdl.COLUMNS)
+        return InterfaceIdl(self.ovsdb_connection, helper)
+
+    def start(self, block=False, timeout=5):
+        if self._connection is None:
+            self._connection = connection.Connection(
+                idl=self._idl_factory(), timeout=self.timeout)
+        # NOTE: Connection.start() waits for the initial contents of the
+        # table, so there is nothing more to wait for when blocking.
+        self._connection.start()
+
+    def stop(self):
+        if self._connection is not None:
+            self._connection.stop()
+            self._connection = None
+
+    def is_active(self):
+        return (self._connection is not None and
+                self._connection.idl._session.is_connected())
+
+    @property
+    def has_updates(self):
+        if not self.is_active():
+            LOG.error("Interface monitor is not connected to ovsdb")
+        return (self._connection is not None and
+                self._connection.idl.has_updates)
+
+    def get_events(self):
+        if self._connection is None:
+            return {'added': [], 'removed': [], 'modified': []}
+        return self._connection.idl.get_events()
+
+
 class SimpleBridgesMonitor(OvsdbMonitor):
     """Monitors the Bridge table of the local host's ovsdb for changes.
 
@@ -42,6 +42,8 @@ kill_process = utils.kill_process
 execute = utils.execute
 get_root_helper_child_pid = utils.get_root_helper_child_pid
 pid_invoked_with_cmdline = utils.pid_invoked_with_cmdline
+trace_commands = utils.trace_commands
+get_command_stats = utils.get_command_stats
 
 
 def load_interface_driver(conf):
@@ -13,6 +13,8 @@
 #    under the License.
 #
 
+import hashlib
+
 import eventlet
 import netaddr
 from neutron_lib.agent import constants as agent_consts
@@ -49,12 +51,14 @@ from neutron.agent.l3 import router_processing_queue as queue
 from neutron.agent.linux import external_process
 from neutron.agent.linux import ip_lib
 from neutron.agent.linux import pd
+from neutron.agent.linux import utils as linux_utils
 from neutron.agent.metadata import driver as metadata_driver
 from neutron.agent import rpc as agent_rpc
 from neutron.common import constants as l3_constants
 from neutron.common import exceptions as n_exc
 from neutron.common import ipv6_utils
 from neutron.common import rpc as n_rpc
+from neutron.common import stats
 from neutron.common import utils
 from neutron import manager
 
@@ -73,6 +77,16 @@ def log_verbose_exc(message, router_payload):
                                           router_payload, indent=5))
 
 
+def get_router_fingerprint(router):
+    """Return a digest of the router data sent by the server.
+
+    Routers whose data did not change since they were last processed do not
+    need to be processed again by a full sync.
+    """
+    return hashlib.sha256(
+        jsonutils.dump_as_bytes(router, sort_keys=True)).hexdigest()
+
+
 class L3PluginApi(object):
     """Agent side of the l3 agent RPC API.
 
@@ -198,6 +212,9 @@ class L3NATAgent(ha.AgentMixin,
         else:
             self.conf = cfg.CONF
         self.router_info = {}
+        # Fingerprint of the data each router was last processed with
+        self._router_fingerprints = {}
+        self.sync_stats = stats.Stats()
 
         self._check_config_params()
 
@@ -353,6 +370,9 @@ class L3NATAgent(ha.AgentMixin,
         return legacy_router.LegacyRouter(*args, **kwargs)
 
     def _router_added(self, router_id, router):
+        # The namespace of a router scheduled back to the agent may still
+        # be queued for removal since the first full sync
+        self.namespaces_manager.cancel_cleanup(router_id)
         ri = self._create_router(router_id, router)
         registry.notify(resources.ROUTER, events.BEFORE_CREATE,
                         self, router=ri)
@@ -401,6 +421,8 @@ class L3NATAgent(ha.AgentMixin,
 
         ri.delete()
         del self.router_info[router_id]
+        self._router_fingerprints.pop(router_id, None)
+        self._reported_ha_states.pop(router_id, None)
 
         registry.notify(resources.ROUTER, events.AFTER_DELETE, self, router=ri)
 
@@ -457,6 +479,8 @@ class L3NATAgent(ha.AgentMixin,
                 self._resync_router(update)
 
     def _process_router_if_compatible(self, router):
+        # ri.process() may change the router data
+        fingerprint = get_router_fingerprint(router)
         if (self.conf.external_network_bridge and
                 not ip_lib.device_exists(self.conf.external_network_bridge)):
             LOG.error("The external network bridge '%s' does not exist",
@@ -481,6 +505,7 @@ class L3NATAgent(ha.AgentMixin,
             self._process_added_router(router)
         else:
             self._process_updated_router(router)
+        self._router_fingerprints[router['id']] = fingerprint
 
     def _process_added_router(self, router):
         self._router_added(router['id'], router)
@@ -490,8 +515,7 @@ class L3NATAgent(ha.AgentMixin,
         registry.notify(resources.ROUTER, events.AFTER_CREATE, self, router=ri)
         self.l3_ext_manager.add_router(self.context, router)
 
-    def _process_updated_router(self, router):
-        ri = self.router_info[router['id']]
+    def _check_ha_router_state(self, ri, router):
         is_dvr_only_agent = (self.conf.agent_mode in
                              [lib_const.L3_AGENT_MODE_DVR,
                               lib_const.L3_AGENT_MODE_DVR_NO_EXTERNAL])
@@ -500,6 +524,10 @@ class L3NATAgent(ha.AgentMixin,
         if router.get('ha') and not is_dvr_only_agent and is_ha_router:
             self.check_ha_state_for_router(
                 router['id'], router.get(l3_constants.HA_ROUTER_STATE_KEY))
+
+    def _process_updated_router(self, router):
+        ri = self.router_info[router['id']]
+        self._check_ha_router_state(ri, router)
         ri.router = router
         registry.notify(resources.ROUTER, events.BEFORE_UPDATE,
                         self, router=ri)
@@ -571,6 +599,7 @@ class L3NATAgent(ha.AgentMixin,
                 log_verbose_exc(
                     "Failed to process compatible router: %s" % update.id,
                     router)
+                self._router_fingerprints.pop(update.id, None)
                 self._resync_router(update)
                 continue
 
@@ -602,7 +631,8 @@ class L3NATAgent(ha.AgentMixin,
         # identify stale ones.
 
         try:
-            with self.namespaces_manager as ns_manager:
+            with linux_utils.trace_commands('fullsync'), \
+                    self.namespaces_manager as ns_manager:
                 self.fetch_and_sync_all_routers(context, ns_manager)
         except n_exc.AbortSyncRouters:
             self.fullsync = True
@@ -615,6 +645,9 @@ class L3NATAgent(ha.AgentMixin,
         chunk = []
         is_snat_agent = (self.conf.agent_mode ==
                          lib_const.L3_AGENT_MODE_DVR_SNAT)
+        self.sync_stats.reset()
+        # ARP updates may have been missed while out of sync
+        self.clear_subnet_arp_entries()
         try:
             router_ids = self.plugin_rpc.get_router_ids(context)
             # fetch routers by chunks to reduce the load on server and to
@@ -634,6 +667,14 @@ class L3NATAgent(ha.AgentMixin,
                             ns_manager.keep_ext_net(ext_net_id)
                         elif is_snat_agent and not r.get('ha'):
                             ns_manager.ensure_snat_cleanup(r['id'])
+                    ri = self.router_info.get(r['id'])
+                    if (ri and self._router_fingerprints.get(r['id']) ==
+                            get_router_fingerprint(r)):
+                        # The router is still up to date
+                        self._check_ha_router_state(ri, r)
+                        self.sync_stats.increment('routers_skipped')
+                        continue
+                    self.sync_stats.increment('routers_queued')
                     update = queue.RouterUpdate(
                         r['id'],
                         queue.PRIORITY_SYNC_ROUTERS_TASK,
@@ -662,6 +703,10 @@ class L3NATAgent(ha.AgentMixin,
             raise n_exc.AbortSyncRouters()
 
         self.fullsync = False
+        LOG.info("Full sync queued %(queued)d routers, skipped "
+                 "%(skipped)d unchanged routers",
+                 {'queued': self.sync_stats.get_counter('routers_queued'),
+                  'skipped': self.sync_stats.get_counter('routers_skipped')})
         LOG.debug("periodic_sync_routers_task successfully completed")
         # adjust chunk size after successful sync
         if self.sync_routers_chunk_size < SYNC_ROUTERS_MAX_CHUNK_SIZE:
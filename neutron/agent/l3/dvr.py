@@ -14,19 +14,28 @@
 
 import weakref
 
+from neutron_lib import constants as lib_constants
+
 from neutron.agent.l3 import dvr_fip_ns
+from neutron.common import utils as common_utils
 
 
 class AgentMixin(object):
     def __init__(self, host):
         # dvr data
         self._fip_namespaces = weakref.WeakValueDictionary()
+        # The {ip: mac} of the ports of the subnets attached to the local
+        # DVR routers, kept up to date by the add/del_arp_entry RPCs.
+        self._subnet_arp_entries = {}
         super(AgentMixin, self).__init__(host)
 
     def get_fip_ns(self, ext_net_id):
         # TODO(Carl) is this necessary?  Code that this replaced was careful to
         # convert these to string like this so I preserved that.
         ext_net_id = str(ext_net_id)
+        # A stale FIP namespace of the network may still be queued for, or
+        # being, removed in the background since the first full sync
+        self.namespaces_manager.cancel_cleanup(ext_net_id)
 
         fip_ns = self._fip_namespaces.get(ext_net_id)
         if fip_ns and not fip_ns.destroyed:
@@ -43,17 +52,61 @@ class AgentMixin(object):
     def get_ports_by_subnet(self, subnet_id):
         return self.plugin_rpc.get_ports_by_subnet(self.context, subnet_id)
 
-    def _update_arp_entry(self, context, payload, action):
-        router_id = payload['router_id']
-        ri = self.router_info.get(router_id)
-        if not ri:
-            return
+    def get_subnet_arp_entries(self, subnet_id):
+        """Return the {ip: mac} ARP entries of the ports of a subnet.
+
+        The ports are only fetched from the server the first time a subnet
+        is asked for, so routers processed later for the same subnet reuse
+        them.
+        """
+        arp_entries = self._subnet_arp_entries.get(subnet_id)
+        if arp_entries is None:
+            ignored_device_owners = (
+                lib_constants.ROUTER_INTERFACE_OWNERS + tuple(
+                    common_utils.get_dvr_allowed_address_pair_device_owners()))
+            arp_entries = {}
+            for port in self.get_ports_by_subnet(subnet_id):
+                if port['device_owner'] in ignored_device_owners:
+                    continue
+                for fixed_ip in port['fixed_ips']:
+                    arp_entries[fixed_ip['ip_address']] = port['mac_address']
+            self._subnet_arp_entries[subnet_id] = arp_entries
+        return arp_entries
+
+    def release_subnet_arp_entries(self, subnet_id):
+        """Forget the ARP entries of a subnet no local router uses anymore.
+
+        Only the RPCs for the routers hosted here are received, so the
+        entries of a subnet detached from all of them can't be kept up to
+        date.
+        """
+        for ri in self.router_info.values():
+            get_internal_port = getattr(ri, '_get_internal_port', None)
+            if get_internal_port and get_internal_port(subnet_id):
+                return
+        self._subnet_arp_entries.pop(subnet_id, None)
 
+    def clear_subnet_arp_entries(self):
+        self._subnet_arp_entries.clear()
+
+    def _update_arp_entry(self, context, payload, action):
         arp_table = payload['arp_table']
         ip = arp_table['ip_address']
         mac = arp_table['mac_address']
         subnet_id = arp_table['subnet_id']
 
+        arp_entries = self._subnet_arp_entries.get(subnet_id)
+        if arp_entries is not None:
+            if action == 'add':
+                arp_entries[ip] = mac
+            else:
+                arp_entries.pop(ip, None)
+
+        router_id = payload['router_id']
+        ri = self.router_info.get(router_id)
+        if not ri:
+            return
+
         ri._update_arp_entry(ip, mac, subnet_id, action)
 
     def add_arp_entry(self, context, payload):
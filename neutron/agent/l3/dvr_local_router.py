@@ -26,6 +26,7 @@ from neutron.agent.l3 import dvr_fip_ns
 from neutron.agent.l3 import dvr_router_base
 from neutron.agent.linux import ip_lib
 from neutron.common import constants as n_const
+from neutron.common import stats
 from neutron.common import utils as common_utils
 
 LOG = logging.getLogger(__name__)
@@ -48,6 +49,8 @@ class DvrLocalRouter(dvr_router_base.DvrRouterBase):
         self.rtr_fip_connect = False
         self.fip_ns = None
         self._pending_arp_set = set()
+        # ARP entries programmed in the namespace since the last process()
+        self.arp_stats = stats.Stats()
 
     def get_centralized_router_cidrs(self):
         return self.centralized_floatingips_set
@@ -215,21 +218,20 @@ class DvrLocalRouter(dvr_router_base.DvrRouterBase):
 
     def _process_arp_cache_for_internal_port(self, subnet_id):
         """Function to process the cached arp entries."""
-        arp_remove = set()
-        for arp_entry in self._pending_arp_set:
-            if subnet_id == arp_entry.subnet_id:
-                try:
-                    state = self._update_arp_entry(
-                        arp_entry.ip, arp_entry.mac,
-                        arp_entry.subnet_id, arp_entry.operation)
-                except Exception:
-                    state = False
-                if state:
-                    # If the arp update was successful, then
-                    # go ahead and add it to the remove set
-                    arp_remove.add(arp_entry)
-
-        self._pending_arp_set -= arp_remove
+        arp_entries = set(arp_entry for arp_entry in self._pending_arp_set
+                          if arp_entry.subnet_id == subnet_id)
+        if not arp_entries:
+            return
+        try:
+            state = self._update_arp_entries(
+                subnet_id, [(arp_entry.ip, arp_entry.mac, arp_entry.operation)
+                            for arp_entry in arp_entries])
+        except Exception:
+            state = False
+        if state:
+            # If the arp update was successful, then
+            # go ahead and remove the entries from the cache
+            self._pending_arp_set -= arp_entries
 
     def _delete_arp_cache_for_internal_port(self, subnet_id):
         """Function to delete the cached arp entries."""
@@ -247,7 +249,6 @@ class DvrLocalRouter(dvr_router_base.DvrRouterBase):
             return False
 
         try:
-            # TODO(mrsmith): optimize the calls below for bulk calls
             interface_name = self.get_internal_device_name(port['id'])
             device = ip_lib.IPDevice(interface_name, namespace=self.ns_name)
             if device.exists():
@@ -255,6 +256,7 @@ class DvrLocalRouter(dvr_router_base.DvrRouterBase):
                     device.neigh.add(ip, mac)
                 elif operation == 'delete':
                     device.neigh.delete(ip, mac)
+                self.arp_stats.increment('arp_%s' % operation)
                 return True
             else:
                 if operation == 'add':
@@ -269,22 +271,46 @@ class DvrLocalRouter(dvr_router_base.DvrRouterBase):
             with excutils.save_and_reraise_exception():
                 LOG.exception("DVR: Failed updating arp entry")
 
+    def _update_arp_entries(self, subnet_id, arp_entries):
+        """Add or delete arp entries of a subnet in a single batch.
+
+        :param arp_entries: a list of (ip, mac, operation)
+        """
+        port = self._get_internal_port(subnet_id)
+        # update arp entries only if the subnet is attached to the router
+        if not port:
+            return False
+
+        try:
+            interface_name = self.get_internal_device_name(port['id'])
+            device = ip_lib.IPDevice(interface_name, namespace=self.ns_name)
+            if not device.exists():
+                LOG.warning("Device %s does not exist so ARP entries "
+                            "cannot be updated, will cache "
+                            "information to be applied later "
+                            "when the device exists",
+                            device)
+                for ip, mac, operation in arp_entries:
+                    if operation == 'add':
+                        self._cache_arp_entry(ip, mac, subnet_id, operation)
+                return False
+            device.neigh.update([(operation, ip, mac)
+                                 for ip, mac, operation in arp_entries])
+            for ip, mac, operation in arp_entries:
+                self.arp_stats.increment('arp_%s' % operation)
+            self.arp_stats.increment('arp_batches')
+            return True
+        except Exception:
+            with excutils.save_and_reraise_exception():
+                LOG.exception("DVR: Failed updating arp entries")
+
     def _set_subnet_arp_info(self, subnet_id):
-        """Set ARP info retrieved from Plugin for existing ports."""
-        # TODO(Carl) Can we eliminate the need to make this RPC while
-        # processing a router.
-        subnet_ports = self.agent.get_ports_by_subnet(subnet_id)
-        ignored_device_owners = (
-            lib_constants.ROUTER_INTERFACE_OWNERS +
-            tuple(common_utils.get_dvr_allowed_address_pair_device_owners()))
-
-        for p in subnet_ports:
-            if p['device_owner'] not in ignored_device_owners:
-                for fixed_ip in p['fixed_ips']:
-                    self._update_arp_entry(fixed_ip['ip_address'],
-                                           p['mac_address'],
-                                           subnet_id,
-                                           'add')
+        """Set ARP info of the existing ports of a subnet."""
+        arp_entries = self.agent.get_subnet_arp_entries(subnet_id)
+        if arp_entries:
+            self._update_arp_entries(
+                subnet_id, [(ip, mac, 'add')
+                            for ip, mac in sorted(arp_entries.items())])
         self._process_arp_cache_for_internal_port(subnet_id)
 
     @staticmethod
@@ -436,7 +462,8 @@ class DvrLocalRouter(dvr_router_base.DvrRouterBase):
     def _dvr_internal_network_removed(self, port):
         # Clean up the cached arp entries related to the port subnet
         for subnet in port['subnets']:
-            self._delete_arp_cache_for_internal_port(subnet)
+            self._delete_arp_cache_for_internal_port(subnet['id'])
+            self.agent.release_subnet_arp_entries(subnet['id'])
 
         if not self.ex_gw_port:
             return
@@ -515,12 +542,13 @@ class DvrLocalRouter(dvr_router_base.DvrRouterBase):
         ip_lib.sysctl(cmd, namespace=self.ns_name)
 
         self.enable_snat_redirect_rules(ex_gw_port)
+        arp_entries = collections.defaultdict(list)
         for port in self.get_snat_interfaces():
             for ip in port['fixed_ips']:
-                self._update_arp_entry(ip['ip_address'],
-                                       port['mac_address'],
-                                       ip['subnet_id'],
-                                       'add')
+                arp_entries[ip['subnet_id']].append(
+                    (ip['ip_address'], port['mac_address'], 'add'))
+        for subnet_id, subnet_arp_entries in arp_entries.items():
+            self._update_arp_entries(subnet_id, subnet_arp_entries)
 
     def external_gateway_updated(self, ex_gw_port, interface_name):
         pass
@@ -781,3 +809,9 @@ class DvrLocalRouter(dvr_router_base.DvrRouterBase):
             self.fip_ns.scan_fip_ports(self)
 
         super(DvrLocalRouter, self).process()
+        arp_counters = self.arp_stats.to_dict()['counters']
+        if arp_counters:
+            LOG.debug("DVR: ARP entries programmed for router %(router)s: "
+                      "%(counters)s",
+                      {'router': self.router_id, 'counters': arp_counters})
+            self.arp_stats.reset()
@@ -14,20 +14,28 @@
 #    under the License.
 
 import os
+import signal
 
 import eventlet
+from neutron_lib.utils import file as file_utils
 from oslo_log import log as logging
+from oslo_serialization import jsonutils
 from oslo_utils import fileutils
 import webob
 
+from neutron.agent.l3 import ha_router
+from neutron.agent.linux import external_process
 from neutron.agent.linux import utils as agent_utils
 from neutron.common import constants
+from neutron.common import utils as common_utils
 from neutron.notifiers import batch_notifier
 
 LOG = logging.getLogger(__name__)
 
 KEEPALIVED_STATE_CHANGE_SERVER_BACKLOG = 4096
 
+SHARED_STATE_CHANGE_MONITOR_UUID = 'keepalived-state-change'
+
 TRANSLATION_MAP = {'master': constants.HA_ROUTER_STATE_ACTIVE,
                    'backup': constants.HA_ROUTER_STATE_STANDBY,
                    'fault': constants.HA_ROUTER_STATE_STANDBY,
@@ -74,6 +82,85 @@ class L3AgentKeepalivedStateChangeServer(object):
         server.wait()
 
 
+class SharedStateChangeMonitor(object):
+    """Monitor the state changes of all the HA routers in one process.
+
+    Adding or removing a router only updates the routers kept in memory;
+    they are then written to the routers file and the monitor is signalled
+    to reload it from a separate greenthread. The update is throttled, so
+    all the routers processed in the meantime are applied by one reload.
+    """
+
+    def __init__(self, conf, process_monitor):
+        self.conf = conf
+        self.process_monitor = process_monitor
+        self.routers = {}
+        self._update_monitor = common_utils.throttler(
+            conf.ha_vrrp_advert_int)(self._update_monitor)
+
+    def get_routers_file_path(self):
+        return os.path.join(self.conf.ha_confs_path,
+                            'keepalived-state-change-routers.json')
+
+    def add_router(self, router_id, namespace, conf_dir, interface, cidr):
+        router = {'namespace': namespace,
+                  'conf_dir': conf_dir,
+                  'interface': interface,
+                  'cidr': cidr}
+        if self.routers.get(router_id) != router:
+            self.routers[router_id] = router
+            eventlet.spawn_n(self._update_monitor)
+
+    def remove_router(self, router_id):
+        if self.routers.pop(router_id, None) is not None:
+            eventlet.spawn_n(self._update_monitor)
+
+    def _get_process_manager(self):
+        return external_process.ProcessManager(
+            self.conf,
+            SHARED_STATE_CHANGE_MONITOR_UUID,
+            run_as_root=True,
+            default_cmd_callback=self._get_monitor_callback())
+
+    def _get_monitor_callback(self):
+        def callback(pid_file):
+            return ['neutron-keepalived-state-change',
+                    '--routers_file=%s' % self.get_routers_file_path(),
+                    '--conf_dir=%s' % self.conf.ha_confs_path,
+                    '--pid_file=%s' % pid_file,
+                    '--state_path=%s' % self.conf.state_path]
+
+        return callback
+
+    # pylint: disable=method-hidden
+    def _update_monitor(self):
+        try:
+            file_utils.replace_file(self.get_routers_file_path(),
+                                    jsonutils.dumps(self.routers))
+            pm = self._get_process_manager()
+            pm.enable(reload_cfg=True)
+            self.process_monitor.register(
+                SHARED_STATE_CHANGE_MONITOR_UUID,
+                ha_router.IP_MONITOR_PROCESS_SERVICE, pm)
+        except Exception:
+            LOG.exception('Failed to update the shared state change monitor')
+
+    def cleanup(self):
+        """Stop the monitor left behind once the shared mode is disabled.
+
+        Each router spawns its own monitor again, so the shared one would
+        report every state change twice.
+        """
+        routers_file = self.get_routers_file_path()
+        if not os.path.exists(routers_file):
+            return
+        self.process_monitor.unregister(
+            SHARED_STATE_CHANGE_MONITOR_UUID,
+            ha_router.IP_MONITOR_PROCESS_SERVICE)
+        self._get_process_manager().disable(sig=str(int(signal.SIGTERM)))
+        fileutils.delete_if_exists(routers_file)
+
+
 class AgentMixin(object):
     def __init__(self, host):
         self._init_ha_conf_path()
@@ -82,7 +169,14 @@ class AgentMixin(object):
         # state change sequence is under the proper order.
         self.state_change_notifier = batch_notifier.BatchNotifier(
             self._calculate_batch_duration(), self.notify_server)
+        # Last state successfully reported to the server for each router
+        self._reported_ha_states = {}
         eventlet.spawn(self._start_keepalived_notifications_server)
+        self.shared_state_change_monitor = SharedStateChangeMonitor(
+            self.conf, self.process_monitor)
+        if not self.conf.ha_shared_state_change_monitor:
+            self.shared_state_change_monitor.cleanup()
+            self.shared_state_change_monitor = None
 
     def _get_router_info(self, router_id):
         try:
@@ -100,6 +194,8 @@ class AgentMixin(object):
             LOG.debug("Updating server with state %(state)s for router "
                       "%(router_id)s", {'router_id': router_id,
                                         'state': ha_state})
+            # The server lost track of the state we reported, report it again
+            self._reported_ha_states.pop(router_id, None)
             self.state_change_notifier.queue_event((router_id, ha_state))
 
     def _start_keepalived_notifications_server(self):
@@ -175,10 +271,21 @@ class AgentMixin(object):
     def notify_server(self, batched_events):
         translated_states = dict((router_id, TRANSLATION_MAP[state]) for
                                  router_id, state in batched_events)
+        # Only the last state of each router in the batch is kept, so a
+        # router flapping during the batch interval and ending up in the
+        # state already reported does not need to be sent again.
+        changed_states = {
+            router_id: state for router_id, state in translated_states.items()
+            if self._reported_ha_states.get(router_id) != state}
+        if not changed_states:
+            LOG.debug('HA routers states %s already reported to the server',
+                      translated_states)
+            return
         LOG.debug('Updating server with HA routers states %s',
-                  translated_states)
+                  changed_states)
         self.plugin_rpc.update_ha_routers_states(
-            self.context, translated_states)
+            self.context, changed_states)
+        self._reported_ha_states.update(changed_states)
 
     def _init_ha_conf_path(self):
         ha_full_path = os.path.dirname("/%s/" % self.conf.ha_confs_path)
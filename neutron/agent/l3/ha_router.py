@@ -370,8 +370,23 @@ class HaRouter(router.RouterInfo):
 
         return callback
 
+    def _get_shared_state_change_monitor(self):
+        if self.agent_conf.ha_shared_state_change_monitor:
+            return self.agent.shared_state_change_monitor
+
     def spawn_state_change_monitor(self, process_monitor):
         pm = self._get_state_change_monitor_process_manager()
+        shared_monitor = self._get_shared_state_change_monitor()
+        if shared_monitor:
+            # Stop the router monitor left behind if the option was just
+            # enabled, the shared monitor takes over
+            if pm.active:
+                pm.disable(sig=str(int(signal.SIGTERM)))
+            shared_monitor.add_router(
+                self.router_id, self.ha_namespace,
+                self.keepalived_manager.get_conf_dir(),
+                self.get_ha_device_name(), self._get_primary_vip())
+            return
         pm.enable()
         process_monitor.register(
             self.router_id, IP_MONITOR_PROCESS_SERVICE, pm)
@@ -381,6 +396,10 @@ class HaRouter(router.RouterInfo):
             LOG.debug('Error while destroying state change monitor for %s - '
                       'no port', self.router_id)
             return
+        shared_monitor = self._get_shared_state_change_monitor()
+        if shared_monitor:
+            shared_monitor.remove_router(self.router_id)
+            return
         pm = self._get_state_change_monitor_process_manager()
         process_monitor.unregister(
             self.router_id, IP_MONITOR_PROCESS_SERVICE)
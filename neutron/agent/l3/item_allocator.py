@@ -32,8 +32,20 @@ class ItemAllocator(object):
     The persistent datastore is a file. The records are one per line of
     the format: key<delimiter>value.  For example if the delimiter is a ','
     (the default value) then the records will be: key,value (one per line)
+
+    The file is a journal: each allocation appends a key,value record and
+    each release appends a key, record with an empty value, so that the
+    cost of an update does not depend on the number of allocations. The
+    records are replayed in order when the file is read, and the file is
+    compacted to the current allocations once it holds too many stale
+    records.
     """
 
+    # Number of stale records tolerated in the journal before compacting it,
+    # on top of as many as there are current allocations, so the cost of
+    # compacting is spread over at least as many updates as it rewrites.
+    COMPACTION_THRESHOLD = 1000
+
     def __init__(self, state_file, ItemClass, item_pool, delimiter=','):
         """Read the file with previous allocations recorded.
 
@@ -41,17 +53,26 @@ class ItemAllocator(object):
         """
         self.ItemClass = ItemClass
         self.state_file = state_file
+        self.delimiter = delimiter
 
         self.allocations = {}
 
         self.remembered = {}
         self.pool = item_pool
 
+        self._journal_size = 0
         read_error = False
         for line in self._read():
+            self._journal_size += 1
             try:
+                if not line.endswith('\n'):
+                    # The last record was only partially written
+                    raise ValueError()
                 key, saved_value = line.strip().split(delimiter)
-                self.remembered[key] = self.ItemClass(saved_value)
+                if saved_value:
+                    self.remembered[key] = self.ItemClass(saved_value)
+                else:
+                    self.remembered.pop(key, None)
             except ValueError:
                 read_error = True
                 LOG.warning("Invalid line in %(file)s, "
@@ -62,6 +83,8 @@ class ItemAllocator(object):
         if read_error:
             LOG.debug("Re-writing file %s due to read error", state_file)
             self._write_allocations()
+        elif self._needs_compaction():
+            self._write_allocations()
 
     def lookup(self, key):
         """Try to lookup an item of ItemClass type.
@@ -107,25 +130,53 @@ class ItemAllocator(object):
                 raise RuntimeError("Cannot allocate item of type:"
                                    " %s from pool using file %s"
                                    % (self.ItemClass, self.state_file))
+            self.allocations[key] = self.pool.pop()
+            # The dropped allocations are only forgotten by rewriting the
+            # file.
+            self._write_allocations()
+            return self.allocations[key]
 
         self.allocations[key] = self.pool.pop()
-        self._write_allocations()
+        self._record(key, self.allocations[key])
         return self.allocations[key]
 
     def release(self, key):
         if self.lookup(key):
             self.pool.add(self.allocations.pop(key))
+            self._record(key)
+
+    def _needs_compaction(self):
+        current = len(self.allocations) + len(self.remembered)
+        return self._journal_size > 2 * current + self.COMPACTION_THRESHOLD
+
+    def _record(self, key, value=''):
+        self._journal_size += 1
+        if self._needs_compaction():
             self._write_allocations()
+        else:
+            self._write(['%s%s%s\n' % (key, self.delimiter, value)],
+                        append=True)
 
     def _write_allocations(self):
-        current = ["%s,%s\n" % (k, v) for k, v in self.allocations.items()]
-        remembered = ["%s,%s\n" % (k, v) for k, v in self.remembered.items()]
+        current = ["%s%s%s\n" % (k, self.delimiter, v)
+                   for k, v in self.allocations.items()]
+        remembered = ["%s%s%s\n" % (k, self.delimiter, v)
+                      for k, v in self.remembered.items()]
         current.extend(remembered)
         self._write(current)
-
-    def _write(self, lines):
-        with open(self.state_file, "w") as f:
+        self._journal_size = len(current)
+
+    def _write(self, lines, append=False):
+        if append:
+            with open(self.state_file, "a") as f:
+                f.writelines(lines)
+            return
+        # Replace the file at once so the allocations are not lost if the
+        # agent stops while compacting.
+        tmp_file = self.state_file + '.tmp'
+        with open(tmp_file, "w") as f:
             f.writelines(lines)
+        os.rename(tmp_file, self.state_file)
 
     def _read(self):
         if not os.path.exists(self.state_file):
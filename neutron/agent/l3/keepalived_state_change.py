@@ -12,14 +12,18 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import errno
 import os
+import select
 import signal
 import sys
+import time
 
 import httplib2
 import netaddr
 from oslo_config import cfg
 from oslo_log import log as logging
+from oslo_serialization import jsonutils
 
 from neutron._i18n import _
 from neutron.agent.l3 import ha
@@ -32,6 +36,8 @@ from neutron.conf.agent.l3 import keepalived
 
 
 LOG = logging.getLogger(__name__)
+# Seconds to wait for events before checking if the routers must be reloaded
+RELOAD_CHECK_INTERVAL = 1
 
 
 class KeepalivedUnixDomainConnection(agent_utils.UnixDomainHTTPConnection):
@@ -44,34 +50,18 @@ class KeepalivedUnixDomainConnection(agent_utils.UnixDomainHTTPConnection):
             get_keepalived_state_change_socket_path(cfg.CONF))
 
 
-class MonitorDaemon(daemon.Daemon):
-    def __init__(self, pidfile, router_id, user, group, namespace, conf_dir,
-                 interface, cidr):
+class RouterStateHandler(object):
+    """Translate the IP events of a HA router into state changes."""
+
+    def __init__(self, router_id, namespace, conf_dir, interface, cidr):
         self.router_id = router_id
         self.namespace = namespace
         self.conf_dir = conf_dir
         self.interface = interface
         self.cidr = cidr
-        self.monitor = None
-        super(MonitorDaemon, self).__init__(pidfile, uuid=router_id,
-                                            user=user, group=group)
 
-    def run(self, run_as_root=False):
-        self.monitor = ip_monitor.IPMonitor(namespace=self.namespace,
-                                            run_as_root=run_as_root)
-        self.monitor.start()
-        # Only drop privileges if the process is currently running as root
-        # (The run_as_root variable name here is unfortunate - It means to
-        # use a root helper when the running process is NOT already running
-        # as root
-        if not run_as_root:
-            super(MonitorDaemon, self).run()
-        for iterable in self.monitor:
-            self.parse_and_handle_event(iterable)
-
-    def parse_and_handle_event(self, iterable):
+    def handle_event(self, event):
         try:
-            event = ip_monitor.IPMonitorEvent.from_text(iterable)
             if event.interface == self.interface and event.cidr == self.cidr:
                 new_state = 'master' if event.added else 'backup'
                 self.write_state_change(new_state)
@@ -86,8 +76,7 @@ class MonitorDaemon(daemon.Daemon):
                 # Remove this code once new keepalived versions are available.
                 self.send_garp(event)
         except Exception:
-            LOG.exception('Failed to process or handle event for line %s',
-                          iterable)
+            LOG.exception('Failed to process or handle event %s', event)
 
     def write_state_change(self, state):
         with open(os.path.join(
@@ -118,8 +107,51 @@ class MonitorDaemon(daemon.Daemon):
             log_exception=False
         )
 
+
+class MonitorDaemon(RouterStateHandler, daemon.Daemon):
+    def __init__(self, pidfile, router_id, user, group, namespace, conf_dir,
+                 interface, cidr):
+        RouterStateHandler.__init__(self, router_id, namespace, conf_dir,
+                                    interface, cidr)
+        self.monitor = None
+        daemon.Daemon.__init__(self, pidfile, uuid=router_id,
+                               user=user, group=group)
+
+    def run(self, run_as_root=False):
+        # Only drop privileges if the process is currently running as root
+        # (The run_as_root variable name here is unfortunate - It means to
+        # use a root helper when the running process is NOT already running
+        # as root
+        if not run_as_root:
+            # NOTE: the netlink socket is opened in the namespace while the
+            # process is still root and stays usable once privileges are
+            # dropped, so no `ip monitor` process is needed.
+            self.monitor = ip_monitor.NetlinkIPMonitor(
+                namespaces=self.namespace)
+            self.monitor.start()
+            super(MonitorDaemon, self).run()
+            for event in self.monitor:
+                self.handle_event(event)
+        else:
+            self.monitor = ip_monitor.IPMonitor(namespace=self.namespace,
+                                                run_as_root=run_as_root)
+            self.monitor.start()
+            for iterable in self.monitor:
+                self.parse_and_handle_event(iterable)
+
+    def parse_and_handle_event(self, iterable):
+        try:
+            event = ip_monitor.IPMonitorEvent.from_text(iterable)
+        except Exception:
+            LOG.exception('Failed to process or handle event for line %s',
+                          iterable)
+            return
+        self.handle_event(event)
+
     def _kill_monitor(self):
-        if self.monitor:
+        if isinstance(self.monitor, ip_monitor.NetlinkIPMonitor):
+            self.monitor.stop()
+        elif self.monitor:
             # Kill PID instead of calling self.monitor.stop() because the ip
             # monitor is running as root while keepalived-state-change is not
             # (dropped privileges after launching the ip monitor) and will fail
@@ -134,6 +166,85 @@ class MonitorDaemon(daemon.Daemon):
         super(MonitorDaemon, self).handle_sigterm(signum, frame)
 
 
+class SharedMonitorDaemon(daemon.Daemon):
+    """Watch the HA interfaces of many routers from a single process.
+
+    The routers are read from a JSON file, mapping each router ID to its
+    namespace, configuration directory, HA interface and CIDR, which the
+    agent rewrites before sending SIGHUP. A netlink socket is opened in the
+    namespace of every router, so the process keeps its root privileges to
+    be able to open the sockets of the routers added later on.
+    """
+
+    def __init__(self, pidfile, routers_file):
+        self.routers_file = routers_file
+        self.routers = {}
+        self.monitor = None
+        self._reload = True
+        super(SharedMonitorDaemon, self).__init__(
+            pidfile, uuid=ha.SHARED_STATE_CHANGE_MONITOR_UUID)
+
+    def load_routers(self):
+        try:
+            with open(self.routers_file) as routers_file:
+                routers = jsonutils.loads(routers_file.read())
+        except (IOError, OSError, ValueError):
+            LOG.exception('Failed to read the routers to monitor from %s',
+                          self.routers_file)
+            return
+
+        handlers = {}
+        for router_id, router in routers.items():
+            handler = RouterStateHandler(router_id, **router)
+            handlers[handler.namespace] = handler
+        for namespace in set(self.routers) - set(handlers):
+            self.monitor.remove_namespace(namespace)
+        for namespace in set(handlers) - set(self.routers):
+            try:
+                self.monitor.add_namespace(namespace)
+            except Exception:
+                # Retried on the next reload
+                LOG.exception('Failed to monitor namespace %s', namespace)
+                del handlers[namespace]
+        self.routers = handlers
+        LOG.debug('Monitoring %d routers', len(self.routers))
+
+    def get_events(self):
+        if not self.monitor.is_active():
+            time.sleep(RELOAD_CHECK_INTERVAL)
+            return []
+        try:
+            return self.monitor.get_events(timeout=RELOAD_CHECK_INTERVAL)
+        except select.error as e:
+            # Python 2 does not retry a select interrupted by SIGHUP
+            if e.args[0] != errno.EINTR:
+                raise
+            return []
+
+    def handle_event(self, event):
+        handler = self.routers.get(event.namespace)
+        if handler:
+            handler.handle_event(event)
+
+    def handle_sighup(self, signum, frame):
+        self._reload = True
+
+    def run(self):
+        self.monitor = ip_monitor.NetlinkIPMonitor(namespaces=[])
+        signal.signal(signal.SIGHUP, self.handle_sighup)
+        super(SharedMonitorDaemon, self).run()
+        while True:
+            if self._reload:
+                self._reload = False
+                self.load_routers()
+            for event in self.get_events():
+                self.handle_event(event)
+
+    def handle_sigterm(self, signum, frame):
+        self.monitor.stop()
+        super(SharedMonitorDaemon, self).handle_sigterm(signum, frame)
+
+
 def configure(conf):
     config.init(sys.argv[1:])
     conf.set_override('log_dir', cfg.CONF.conf_dir)
@@ -146,6 +257,10 @@ def main():
     keepalived.register_cli_l3_agent_keepalived_opts()
     keepalived.register_l3_agent_keepalived_opts()
     configure(cfg.CONF)
+    if cfg.CONF.routers_file:
+        SharedMonitorDaemon(cfg.CONF.pid_file,
+                            cfg.CONF.routers_file).start()
+        return
     MonitorDaemon(cfg.CONF.pid_file,
                   cfg.CONF.router_id,
                   cfg.CONF.user,
@@ -10,6 +10,10 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import time
+
+import eventlet
+from eventlet import event
 from oslo_log import log as logging
 
 from neutron.agent.l3 import dvr_fip_ns
@@ -17,9 +21,13 @@ from neutron.agent.l3 import dvr_snat_ns
 from neutron.agent.l3 import namespaces
 from neutron.agent.linux import external_process
 from neutron.agent.linux import ip_lib
+from neutron.common import stats
 
 LOG = logging.getLogger(__name__)
 
+# Number of stale namespaces removed between two progress reports
+CLEANUP_PROGRESS_INTERVAL = 50
+
 
 class NamespaceManager(object):
 
@@ -34,7 +42,9 @@ class NamespaceManager(object):
     to communicate. In the "with" statement, the agent calls keep_router to
     record the id's of the routers whose namespaces should be preserved.
     Any other router and snat namespace present in the system will be deleted
-    by the __exit__ method of this context manager
+    in the background once the __exit__ method of this context manager is
+    called, with at most namespace_cleanup_workers namespaces removed at
+    once so that the agent keeps processing its routers meanwhile.
 
     This pattern can be more generally applicable to other resources
     besides namespaces in the future because it is idempotent and, as such,
@@ -58,6 +68,10 @@ class NamespaceManager(object):
         self.agent_conf = agent_conf
         self.driver = driver
         self._clean_stale = True
+        # Prefixes of the stale namespaces left to remove, by id
+        self._stale = {}
+        self._cleanups_in_progress = {}
+        self.stats = stats.Stats()
         self.metadata_driver = metadata_driver
         if metadata_driver:
             self.process_monitor = external_process.ProcessMonitor(
@@ -86,7 +100,9 @@ class NamespaceManager(object):
             _ns_prefix, ns_id = self.get_prefix_and_id(ns)
             if ns_id in self._ids_to_keep:
                 continue
-            self._cleanup(_ns_prefix, ns_id)
+            self._stale.setdefault(ns_id, []).append(_ns_prefix)
+        if self._stale:
+            eventlet.spawn_n(self._cleanup_stale)
 
         return True
 
@@ -96,6 +112,58 @@ class NamespaceManager(object):
     def keep_ext_net(self, ext_net_id):
         self._ids_to_keep.add(ext_net_id)
 
+    def cancel_cleanup(self, ns_id):
+        """Cancel the background removal of the stale namespaces of ns_id.
+
+        A router can be scheduled back to the agent while its stale
+        namespaces are removed; if their removal already started, wait for
+        it to be over so that the router namespace is created again.
+        """
+        self._stale.pop(ns_id, None)
+        done = self._cleanups_in_progress.get(ns_id)
+        if done:
+            LOG.debug('Waiting for the stale namespaces of %s to be '
+                      'removed', ns_id)
+            done.wait()
+
+    def _cleanup_stale(self):
+        total = sum(len(prefixes) for prefixes in self._stale.values())
+        LOG.info('Removing %d stale namespaces in the background', total)
+        start = time.time()
+        pool = eventlet.GreenPool(self.agent_conf.namespace_cleanup_workers)
+        for ns_id in list(self._stale):
+            pool.spawn_n(self._cleanup_stale_id, ns_id, total)
+        pool.waitall()
+        histogram = self.stats.get_histogram('namespace_cleanup')
+        LOG.info('Removed %(removed)d of %(total)d stale namespaces in '
+                 '%(time).1f seconds, %(mean).2f seconds per namespace on '
+                 'average, %(p99).2f for the 99th percentile',
+                 {'removed': self.stats.get_counter('removed'),
+                  'total': total,
+                  'time': time.time() - start,
+                  'mean': histogram.mean if histogram else 0,
+                  'p99': histogram.percentile(99) if histogram else 0})
+
+    def _cleanup_stale_id(self, ns_id, total):
+        prefixes = self._stale.pop(ns_id, None)
+        if prefixes is None:
+            # Kept by a router added to the agent in the meantime
+            return
+        done = self._cleanups_in_progress[ns_id] = event.Event()
+        try:
+            for ns_prefix in prefixes:
+                with self.stats.timer('namespace_cleanup'):
+                    self._cleanup(ns_prefix, ns_id)
+                self.stats.increment('removed')
+                removed = self.stats.get_counter('removed')
+                if not removed % CLEANUP_PROGRESS_INTERVAL:
+                    LOG.info('Removed %(removed)d of %(total)d stale '
+                             'namespaces', {'removed': removed,
+                                            'total': total})
+        finally:
+            del self._cleanups_in_progress[ns_id]
+            done.send()
+
     def get_prefix_and_id(self, ns_name):
         """Get the prefix and id from the namespace name.
 
@@ -123,6 +191,7 @@ class NamespaceManager(object):
 
     def ensure_router_cleanup(self, router_id):
         """Performs cleanup for a router"""
+        self.cancel_cleanup(router_id)
         for ns in self.list_all():
             if ns.endswith(router_id):
                 ns_prefix, ns_id = self.get_prefix_and_id(ns)
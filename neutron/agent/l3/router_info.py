@@ -59,6 +59,8 @@ class RouterInfo(object):
         self.internal_ports = []
         self.pd_subnets = {}
         self.floating_ips = set()
+        # The NAT rules currently set for each floating IP address
+        self.floating_ip_nat_rules = {}
         # Invoke the setter for establishing initial SNAT action
         self.router = router
         self.use_ipv6 = use_ipv6
@@ -212,18 +214,28 @@ class RouterInfo(object):
     def process_floating_ip_nat_rules(self):
         """Configure NAT rules for the router's floating IPs.
 
-        Configures iptables rules for the floating ips of the given router
+        Configures iptables rules for the floating ips of the given router.
+        Only the rules of the floating ips which were added, removed or
+        changed since the previous call are updated, so the cost of
+        associating a floating ip doesn't depend on how many the router
+        already has.
         """
-        # Clear out all iptables rules for floating ips
-        self.iptables_manager.ipv4['nat'].clear_rules_by_tag('floating_ip')
-
-        floating_ips = self.get_floating_ips()
-        # Loop once to ensure that floating ips are configured.
-        for fip in floating_ips:
-            # Rebuild iptables rules for the floating ip.
-            for chain, rule in self.floating_forward_rules(fip):
-                self.iptables_manager.ipv4['nat'].add_rule(chain, rule,
-                                                           tag='floating_ip')
+        nat = self.iptables_manager.ipv4['nat']
+        floating_ip_rules = {
+            fip['floating_ip_address']: self.floating_forward_rules(fip)
+            for fip in self.get_floating_ips()}
+
+        for floating_ip, rules in list(self.floating_ip_nat_rules.items()):
+            if floating_ip_rules.get(floating_ip) != rules:
+                for chain, rule in rules:
+                    nat.remove_rule(chain, rule)
+                del self.floating_ip_nat_rules[floating_ip]
+
+        for floating_ip, rules in floating_ip_rules.items():
+            if floating_ip not in self.floating_ip_nat_rules:
+                for chain, rule in rules:
+                    nat.add_rule(chain, rule, tag='floating_ip')
+                self.floating_ip_nat_rules[floating_ip] = rules
 
         self.iptables_manager.apply()
 
@@ -11,16 +11,21 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 
+import collections
 import re
+import time
 
 import eventlet
 import netaddr
+from neutron_lib import constants
 from oslo_concurrency import lockutils
 from oslo_log import log as logging
+from six import moves
 
 from neutron.agent.linux import utils as linux_utils
 from neutron.common import constants as n_const
 from neutron.common import exceptions as n_exc
+from neutron.common import stats
 
 LOG = logging.getLogger(__name__)
 CONTRACK_MGRS = {}
@@ -29,6 +34,28 @@ ZONE_START = 4097
 
 WORKERS = 8
 
+CT_ZONE_RULE_RE = re.compile(r'.* --physdev-in (?P<dev>[a-zA-Z0-9\-]+)'
+                             r'.* -j CT --zone (?P<zone>\d+).*')
+
+# Protocol names of the conntrack entries which can be deleted via netlink
+NETLINK_PROTOCOLS = {
+    constants.PROTO_NAME_TCP: 'tcp',
+    str(constants.PROTO_NUM_TCP): 'tcp',
+    constants.PROTO_NAME_UDP: 'udp',
+    str(constants.PROTO_NUM_UDP): 'udp',
+    constants.PROTO_NAME_ICMP: 'icmp',
+    str(constants.PROTO_NUM_ICMP): 'icmp',
+    constants.PROTO_NAME_IPV6_ICMP: 'icmpv6',
+    constants.PROTO_NAME_IPV6_ICMP_LEGACY: 'icmpv6',
+    str(constants.PROTO_NUM_IPV6_ICMP): 'icmpv6',
+}
+# Protocols whose entries are deleted via netlink for the rules of any
+# protocol, by IP version
+NETLINK_ANY_PROTOCOLS = {
+    constants.IP_VERSION_4: ('tcp', 'udp', 'icmp'),
+    constants.IP_VERSION_6: ('tcp', 'udp', 'icmpv6'),
+}
+
 
 class IpConntrackUpdate(object):
     """Encapsulates a conntrack update
@@ -40,6 +67,7 @@ class IpConntrackUpdate(object):
         self.device_info_list = device_info_list
         self.rule = rule
         self.remote_ips = remote_ips
+        self.queued_at = time.time()
 
     def __repr__(self):
         return ('<IpConntrackUpdate(device_info_list=%s, rule=%s, '
@@ -47,15 +75,83 @@ class IpConntrackUpdate(object):
                                     self.remote_ips))
 
 
+class ZoneAllocator(object):
+    """Allocate conntrack zones to keys in constant time.
+
+    The zones above the highest one ever allocated are handed out first, so
+    the zones released, whose conntrack entries may not be gone yet, are
+    only reused once the range is exhausted, in the order they were
+    released. A zone can be shared by several keys and is only released
+    along with its last key.
+    """
+
+    def __init__(self, start=ZONE_START, end=MAX_CONNTRACK_ZONES):
+        self.start = start
+        self.end = end
+        self.rebuild({})
+
+    def rebuild(self, zones):
+        """Reset the allocator to the zones of a {key: zone} map."""
+        self.zones = dict(zones)
+        self._users = collections.defaultdict(int)
+        for zone in self.zones.values():
+            self._users[zone] += 1
+        self._next = max([self.start - 1] + list(self._users)) + 1
+        self._free = collections.OrderedDict(
+            (zone, None) for zone in moves.range(self.start, self._next)
+            if zone not in self._users)
+
+    def get(self, key):
+        return self.zones.get(key)
+
+    def used_zones(self):
+        return len(self._users)
+
+    def find_open_zone(self):
+        if self._next <= self.end:
+            return self._next
+        if self._free:
+            return next(iter(self._free))
+        # conntrack zones exhausted :( :(
+        raise n_exc.CTZoneExhaustedError()
+
+    def assign(self, key, zone):
+        """Give a zone, possibly used by other keys already, to the key."""
+        self.release(key)
+        self.zones[key] = zone
+        self._users[zone] += 1
+        self._free.pop(zone, None)
+        if zone >= self._next:
+            for skipped in moves.range(self._next, zone):
+                self._free[skipped] = None
+            self._next = zone + 1
+
+    def allocate(self, key):
+        zone = self.find_open_zone()
+        self.assign(key, zone)
+        return zone
+
+    def release(self, key):
+        zone = self.zones.pop(key, None)
+        if zone is None:
+            return
+        self._users[zone] -= 1
+        if not self._users[zone]:
+            del self._users[zone]
+            self._free[zone] = None
+
+
 @lockutils.synchronized('conntrack')
 def get_conntrack(get_rules_for_table_func, filtered_ports, unfiltered_ports,
-                  execute=None, namespace=None, zone_per_port=False):
+                  execute=None, namespace=None, zone_per_port=False,
+                  use_netlink=False):
     try:
         return CONTRACK_MGRS[namespace]
     except KeyError:
         ipconntrack = IpConntrackManager(get_rules_for_table_func,
                                          filtered_ports, unfiltered_ports,
-                                         execute, namespace, zone_per_port)
+                                         execute, namespace, zone_per_port,
+                                         use_netlink)
         CONTRACK_MGRS[namespace] = ipconntrack
         return CONTRACK_MGRS[namespace]
 
@@ -65,13 +161,18 @@ class IpConntrackManager(object):
 
     def __init__(self, get_rules_for_table_func, filtered_ports,
                  unfiltered_ports, execute=None, namespace=None,
-                 zone_per_port=False):
+                 zone_per_port=False, use_netlink=False):
         self.get_rules_for_table_func = get_rules_for_table_func
         self.execute = execute or linux_utils.execute
         self.namespace = namespace
         self.filtered_ports = filtered_ports
         self.unfiltered_ports = unfiltered_ports
         self.zone_per_port = zone_per_port  # zone per port vs per network
+        # netlink_lib can only reach the conntrack table of the namespace
+        # of the privsep daemon
+        self.use_netlink = use_netlink and not namespace
+        self.stats = stats.Stats()
+        self._zone_allocator = ZoneAllocator()
         self._populate_initial_zone_map()
         self._queue = eventlet.queue.LightQueue()
         self._start_process_queue()
@@ -91,26 +192,63 @@ class IpConntrackManager(object):
             self._process_queue()
 
     def _process_queue(self):
-        update = None
+        updates = []
         try:
             # this will block until an entry gets added to the queue
-            update = self._queue.get()
-            if update.remote_ips:
-                for remote_ip in update.remote_ips:
-                    self._delete_conntrack_state(
-                        update.device_info_list, update.rule, remote_ip)
-            else:
-                self._delete_conntrack_state(
-                    update.device_info_list, update.rule)
+            updates.append(self._queue.get())
+            # the updates queued in the meantime are processed in the same
+            # batch, so the deletions they lead to are done all at once
+            while True:
+                try:
+                    updates.append(self._queue.get_nowait())
+                except eventlet.queue.Empty:
+                    break
+            self._process_updates(updates)
         except Exception:
-            LOG.exception("Failed to process ip_conntrack queue entry: %s",
-                          update)
+            LOG.exception("Failed to process ip_conntrack queue entries: %s",
+                          updates)
+
+    def _process_updates(self, updates):
+        start = time.time()
+        latencies = [start - update.queued_at for update in updates]
+        for latency in latencies:
+            self.stats.observe('queue_latency', latency)
+        LOG.debug("Processing %(updates)d ip_conntrack updates queued for "
+                  "up to %(latency).3fs",
+                  {'updates': len(updates), 'latency': max(latencies)})
+
+        # the targets are deduplicated but kept in the order of the updates
+        targets = collections.OrderedDict()
+        for update in updates:
+            for remote_ip in update.remote_ips or [None]:
+                for target in self._get_conntrack_targets(
+                        update.device_info_list, update.rule, remote_ip):
+                    targets[target] = None
+        if self.use_netlink:
+            # NOTE: netlink_lib only parses the entries of NETLINK_PROTOCOLS,
+            # the targets of any other protocol are left to the conntrack
+            # command
+            netlink_targets = [target for target in targets
+                               if not target[0] or
+                               str(target[0]) in NETLINK_PROTOCOLS]
+            if self._delete_conntrack_entries(netlink_targets):
+                for target in netlink_targets:
+                    del targets[target]
+        for target in targets:
+            self._execute_conntrack_cmd(self._get_conntrack_cmd(*target))
+
+        self.stats.increment('batches')
+        self.stats.increment('updates', len(updates))
+        self.stats.observe('batch_duration', time.time() - start)
 
     def _process(self, device_info_list, rule, remote_ips=None):
         # queue the update to allow the caller to resume its work
         update = IpConntrackUpdate(device_info_list, rule, remote_ips)
         self._queue.put(update)
 
+    def get_queue_depth(self):
+        return self._queue.qsize()
+
     @staticmethod
     def _generate_conntrack_cmd_by_rule(rule, namespace):
         ethertype = rule.get('ethertype')
@@ -127,10 +265,16 @@ class IpConntrackManager(object):
         cmd_ns.extend(cmd)
         return cmd_ns
 
-    def _get_conntrack_cmds(self, device_info_list, rule, remote_ip=None):
-        conntrack_cmds = set()
-        cmd = self._generate_conntrack_cmd_by_rule(rule, self.namespace)
+    def _get_conntrack_targets(self, device_info_list, rule, remote_ip=None):
+        """Return the conntrack entries to delete for a rule.
+
+        Each target is a (protocol, ethertype, direction, ip, zone_id,
+        remote_ip) tuple standing for the entries of one IP of a device.
+        """
+        targets = set()
         ethertype = rule.get('ethertype')
+        protocol = rule.get('protocol')
+        direction = rule.get('direction')
         for device_info in device_info_list:
             zone_id = self.get_device_zone(device_info, create=False)
             if not zone_id:
@@ -144,27 +288,89 @@ class IpConntrackManager(object):
                 net = netaddr.IPNetwork(ip)
                 if str(net.version) not in ethertype:
                     continue
-                ip_cmd = [str(net.ip), '-w', zone_id]
+                target_remote_ip = None
                 if remote_ip and str(
                         netaddr.IPNetwork(remote_ip).version) in ethertype:
-                    if rule.get('direction') == 'ingress':
-                        direction = '-s'
-                    else:
-                        direction = '-d'
-                    ip_cmd.extend([direction, str(remote_ip)])
-                conntrack_cmds.add(tuple(cmd + ip_cmd))
-        return conntrack_cmds
+                    target_remote_ip = str(remote_ip)
+                targets.add((protocol, str(ethertype).lower(), direction,
+                             str(net.ip), zone_id, target_remote_ip))
+        return targets
+
+    def _get_conntrack_cmd(self, protocol, ethertype, direction, ip, zone_id,
+                           remote_ip):
+        rule = {'protocol': protocol, 'ethertype': ethertype,
+                'direction': direction}
+        cmd = self._generate_conntrack_cmd_by_rule(rule, self.namespace)
+        cmd.extend([ip, '-w', zone_id])
+        if remote_ip:
+            cmd.extend(['-s' if direction == 'ingress' else '-d', remote_ip])
+        return cmd
+
+    def _get_conntrack_cmds(self, device_info_list, rule, remote_ip=None):
+        return {tuple(self._get_conntrack_cmd(*target)) for target in
+                self._get_conntrack_targets(device_info_list, rule,
+                                            remote_ip)}
+
+    def _execute_conntrack_cmd(self, cmd):
+        try:
+            self.execute(list(cmd), run_as_root=True,
+                         check_exit_code=True,
+                         extra_ok_codes=[1])
+            self.stats.increment('commands')
+        except RuntimeError:
+            LOG.exception("Failed execute conntrack command %s", cmd)
 
     def _delete_conntrack_state(self, device_info_list, rule, remote_ip=None):
         conntrack_cmds = self._get_conntrack_cmds(device_info_list,
                                                   rule, remote_ip)
         for cmd in conntrack_cmds:
-            try:
-                self.execute(list(cmd), run_as_root=True,
-                             check_exit_code=True,
-                             extra_ok_codes=[1])
-            except RuntimeError:
-                LOG.exception("Failed execute conntrack command %s", cmd)
+            self._execute_conntrack_cmd(cmd)
+
+    def _delete_conntrack_entries(self, targets):
+        """Delete the conntrack entries of the targets via netlink.
+
+        All the targets are deleted with a single privileged call. If it
+        fails, False is returned and the conntrack command is used from then
+        on.
+        """
+        filters = []
+        for protocol, ethertype, direction, ip, zone_id, remote_ip in targets:
+            ipversion = netaddr.IPAddress(ip).version
+            if protocol:
+                protocols = [NETLINK_PROTOCOLS[str(protocol)]]
+            else:
+                # the entries of the protocols netlink_lib can't delete are
+                # left in place
+                protocols = NETLINK_ANY_PROTOCOLS[ipversion]
+            if direction == 'ingress':
+                ip_attr, remote_ip_attr = 'dst', 'src'
+            else:
+                ip_attr, remote_ip_attr = 'src', 'dst'
+            for netlink_protocol in protocols:
+                conntrack_filter = {'ipversion': ipversion,
+                                    'zone': zone_id,
+                                    'protocol': netlink_protocol,
+                                    ip_attr: ip}
+                if remote_ip:
+                    conntrack_filter[remote_ip_attr] = remote_ip
+                filters.append(conntrack_filter)
+        if not filters:
+            return True
+
+        try:
+            # NOTE: imported here so that libnetfilter_conntrack is only
+            # loaded when the netlink deletion is enabled
+            from neutron.privileged.agent.linux import netlink_lib
+            with self.stats.timer('netlink_duration'):
+                deleted = netlink_lib.delete_entries_by_filters(filters)
+        except Exception:
+            LOG.exception("Failed to delete conntrack entries via netlink, "
+                          "the conntrack command will be used instead")
+            self.use_netlink = False
+            return False
+        self.stats.increment('netlink_calls')
+        self.stats.increment('entries_deleted', deleted)
+        return True
 
     def delete_conntrack_state_by_rule(self, device_info_list, rule):
         self._process(device_info_list, rule)
@@ -176,78 +382,81 @@ class IpConntrackManager(object):
                     'direction': direction}
             self._process(device_info_list, rule, remote_ips)
 
+    @property
+    def _device_zone_map(self):
+        return self._zone_allocator.zones
+
+    @_device_zone_map.setter
+    def _device_zone_map(self, zone_map):
+        self._zone_allocator.rebuild(zone_map)
+
     def _populate_initial_zone_map(self):
         """Setup the map between devices and zones based on current rules."""
-        self._device_zone_map = {}
+        zone_map = {}
         rules = self.get_rules_for_table_func('raw')
         for rule in rules:
-            match = re.match(r'.* --physdev-in (?P<dev>[a-zA-Z0-9\-]+)'
-                             r'.* -j CT --zone (?P<zone>\d+).*', rule)
+            match = CT_ZONE_RULE_RE.match(rule)
             if match:
                 # strip off any prefix that the interface is using
                 short_port_id = (match.group('dev')
                     [n_const.LINUX_DEV_PREFIX_LEN:])
-                self._device_zone_map[short_port_id] = int(match.group('zone'))
+                zone_map[short_port_id] = int(match.group('zone'))
+        self._device_zone_map = zone_map
         LOG.debug("Populated conntrack zone map: %s", self._device_zone_map)
 
+    @staticmethod
+    def _port_device_key(port):
+        return port['device'][n_const.LINUX_DEV_PREFIX_LEN:
+                              n_const.LINUX_DEV_LEN]
+
     def _device_key(self, port):
         # we have to key the device_zone_map based on the fragment of the
         # UUID that shows up in the interface name. This is because the initial
         # map is populated strictly based on interface names that we don't know
         # the full UUID of.
         if self.zone_per_port:
-            identifier = port['device'][n_const.LINUX_DEV_PREFIX_LEN:]
-        else:
-            identifier = port['network_id']
+            return self._port_device_key(port)
+        identifier = port['network_id']
         return identifier[:(n_const.LINUX_DEV_LEN -
                           n_const.LINUX_DEV_PREFIX_LEN)]
 
     def get_device_zone(self, port, create=True):
         device_key = self._device_key(port)
-        try:
-            return self._device_zone_map[device_key]
-        except KeyError:
-            if create:
-                return self._generate_device_zone(device_key)
+        zone = self._zone_allocator.get(device_key)
+        if zone is None and not self.zone_per_port:
+            # The initial map is keyed by device, the network takes over the
+            # zone its devices were using so that it is not left aside.
+            zone = self._zone_allocator.get(self._port_device_key(port))
+            if zone is not None:
+                self._zone_allocator.assign(device_key, zone)
+        if zone is None and create:
+            zone = self._generate_device_zone(device_key)
+        return zone
 
     def _free_zones_from_removed_ports(self):
         """Clears any entries from the zone map of removed ports."""
-        existing_ports = [
+        existing_ports = set(
             self._device_key(port)
             for port in (list(self.filtered_ports.values()) +
                          list(self.unfiltered_ports.values()))
-        ]
-        removed = set(self._device_zone_map) - set(existing_ports)
-        for dev in removed:
-            self._device_zone_map.pop(dev, None)
+        )
+        removed = set(self._device_zone_map) - existing_ports
+        # release the lowest zones first, they will be reused first
+        for dev in sorted(removed, key=self._device_zone_map.get):
+            self._zone_allocator.release(dev)
 
     def _generate_device_zone(self, short_device_id):
         """Generates a unique conntrack zone for the passed in ID."""
         try:
-            zone = self._find_open_zone()
+            zone = self._zone_allocator.allocate(short_device_id)
         except n_exc.CTZoneExhaustedError:
             # Free some zones and try again, repeat failure will not be caught
             self._free_zones_from_removed_ports()
-            zone = self._find_open_zone()
+            zone = self._zone_allocator.allocate(short_device_id)
 
-        self._device_zone_map[short_device_id] = zone
         LOG.debug("Assigned CT zone %(z)s to device %(dev)s.",
                   {'z': zone, 'dev': short_device_id})
-        return self._device_zone_map[short_device_id]
+        return zone
 
     def _find_open_zone(self):
-        # call set to dedup because old ports may be mapped to the same zone.
-        zones_in_use = sorted(set(self._device_zone_map.values()))
-        if not zones_in_use:
-            return ZONE_START
-        # attempt to increment onto the highest used zone first. if we hit the
-        # end, go back and look for any gaps left by removed devices.
-        last = zones_in_use[-1]
-        if last < MAX_CONNTRACK_ZONES:
-            return max(last + 1, ZONE_START)
-        for index, used in enumerate(zones_in_use):
-            if used - index != ZONE_START:
-                # gap found, let's use it!
-                return index + ZONE_START
-        # conntrack zones exhausted :( :(
-        raise n_exc.CTZoneExhaustedError()
+        return self._zone_allocator.find_open_zone()
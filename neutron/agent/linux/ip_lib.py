@@ -865,6 +865,9 @@ class IpNeighCommand(IpDeviceCommandBase):
                            self._parent.namespace,
                            **kwargs)
 
+    def update(self, entries):
+        update_neigh_entries(entries, self.name, self._parent.namespace)
+
     def dump(self, ip_version, **kwargs):
         return dump_neigh_entries(ip_version,
                                   self.name,
@@ -1067,6 +1070,21 @@ def delete_neigh_entry(ip_address, mac_address, device, namespace=None,
                                   **kwargs)
 
 
+def update_neigh_entries(entries, device, namespace=None):
+    """Add and delete several neighbour entries in one privileged call.
+
+    :param entries: an iterable of (operation, ip_address, mac_address),
+                    where operation is 'add' or 'delete'
+    :param device: Device name to use in updating entries
+    :param namespace: The name of the namespace in which to update entries
+    """
+    privileged.update_neigh_entries(
+        [(operation, common_utils.get_ip_version(ip_address), ip_address,
+          mac_address) for operation, ip_address, mac_address in entries],
+        device,
+        namespace)
+
+
 def dump_neigh_entries(ip_version, device=None, namespace=None, **kwargs):
     """Dump all neighbour entries.
 
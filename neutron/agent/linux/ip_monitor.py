@@ -13,21 +13,34 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import contextlib
+import os
+import select
+import socket
+
 from oslo_log import log as logging
 from oslo_utils import excutils
+import pyroute2
+from pyroute2.netlink import rtnl
+from pyroute2 import netns
+import six
 
 from neutron.agent.common import async_process
 from neutron.agent.linux import ip_lib
 
 LOG = logging.getLogger(__name__)
 
+NETLINK_GROUPS = (rtnl.RTMGRP_IPV4_IFADDR | rtnl.RTMGRP_IPV6_IFADDR |
+                  rtnl.RTMGRP_LINK)
+
 
 class IPMonitorEvent(object):
-    def __init__(self, line, added, interface, cidr):
+    def __init__(self, line, added, interface, cidr, namespace=None):
         self.line = line
         self.added = added
         self.interface = interface
         self.cidr = cidr
+        self.namespace = namespace
 
     def __str__(self):
         return self.line
@@ -55,6 +68,18 @@ class IPMonitorEvent(object):
 
         return cls(line, added, interface, cidr)
 
+    @classmethod
+    def from_netlink(cls, msg, interface, namespace=None):
+        """Build an event from a RTM_NEWADDR or RTM_DELADDR message."""
+        added = msg['event'] == 'RTM_NEWADDR'
+        address = msg.get_attr('IFA_LOCAL') or msg.get_attr('IFA_ADDRESS')
+        cidr = '%s/%s' % (address, msg['prefixlen'])
+        family = 'inet' if msg['family'] == socket.AF_INET else 'inet6'
+        # NOTE: mimic `ip -o monitor address` for logging purposes
+        line = '%s%s: %s    %s %s' % ('' if added else 'Deleted ',
+                                      msg['index'], interface, family, cidr)
+        return cls(line, added, interface, cidr, namespace=namespace)
+
 
 class IPMonitor(async_process.AsyncProcess):
     """Wrapper over `ip monitor address`.
@@ -84,3 +109,122 @@ class IPMonitor(async_process.AsyncProcess):
 
     def stop(self):
         super(IPMonitor, self).stop(block=True)
+
+
+@contextlib.contextmanager
+def _in_namespace(namespace):
+    """Switch the calling thread to a network namespace and back."""
+    if namespace is None:
+        yield
+        return
+    current = os.open('/proc/self/ns/net', os.O_RDONLY)
+    try:
+        netns.setns(namespace, flags=0)
+        try:
+            yield
+        finally:
+            netns.setns(current, flags=0)
+    finally:
+        os.close(current)
+
+
+class NetlinkIPMonitor(object):
+    """Monitor IP address changes through netlink sockets.
+
+    Unlike IPMonitor, no `ip monitor` process is spawned: a netlink socket
+    subscribed to the address and link multicast groups is opened in each
+    of the given namespaces and the kernel messages are translated into
+    IPMonitorEvent objects, so a single monitor can watch many namespaces.
+    Opening a socket in a namespace requires the process to run as root;
+    the sockets stay usable after privileges are dropped.
+
+    To monitor and react indefinitely:
+        m = NetlinkIPMonitor(namespaces=['ns1', 'ns2'])
+        m.start()
+        for event in m:
+            print(event.namespace, event.added, event.interface, event.cidr)
+    """
+
+    def __init__(self, namespaces=None):
+        if namespaces is None or isinstance(namespaces, six.string_types):
+            namespaces = [namespaces]
+        self.namespaces = list(namespaces)
+        self._sockets = {}
+        self._links = {}
+
+    def is_active(self):
+        return bool(self._sockets)
+
+    def _open_socket(self, namespace):
+        with _in_namespace(namespace):
+            sock = pyroute2.IPRoute()
+            try:
+                self._links[namespace] = {
+                    link['index']: link.get_attr('IFLA_IFNAME')
+                    for link in sock.get_links()}
+                sock.bind(groups=NETLINK_GROUPS)
+            except Exception:
+                with excutils.save_and_reraise_exception():
+                    sock.close()
+        return sock
+
+    def start(self):
+        for namespace in self.namespaces:
+            sock = self._open_socket(namespace)
+            self._sockets[sock.fileno()] = (namespace, sock)
+
+    def stop(self):
+        sockets, self._sockets = self._sockets, {}
+        for _namespace, sock in sockets.values():
+            sock.close()
+
+    def add_namespace(self, namespace):
+        """Start watching one more namespace on a running monitor."""
+        sock = self._open_socket(namespace)
+        self._sockets[sock.fileno()] = (namespace, sock)
+        self.namespaces.append(namespace)
+
+    def remove_namespace(self, namespace):
+        """Stop watching a namespace, closing its socket."""
+        for fileno, (sock_namespace, sock) in list(self._sockets.items()):
+            if sock_namespace == namespace:
+                del self._sockets[fileno]
+                sock.close()
+        self._links.pop(namespace, None)
+        if namespace in self.namespaces:
+            self.namespaces.remove(namespace)
+
+    def _handle_message(self, namespace, msg):
+        links = self._links[namespace]
+        if msg['event'] == 'RTM_NEWLINK':
+            links[msg['index']] = msg.get_attr('IFLA_IFNAME')
+        elif msg['event'] == 'RTM_DELLINK':
+            links.pop(msg['index'], None)
+        elif msg['event'] in ('RTM_NEWADDR', 'RTM_DELADDR'):
+            interface = (msg.get_attr('IFA_LABEL') or
+                         links.get(msg['index'], str(msg['index'])))
+            return IPMonitorEvent.from_netlink(msg, interface, namespace)
+
+    def get_events(self, timeout=None):
+        """Return the events received by all the sockets.
+
+        Waits up to timeout seconds (forever if None) for a socket to be
+        readable, then returns every event read from the readable sockets
+        as a single batch.
+        """
+        if not self._sockets:
+            return []
+        readable, _, _ = select.select(list(self._sockets), [], [], timeout)
+        events = []
+        for fileno in readable:
+            namespace, sock = self._sockets[fileno]
+            for msg in sock.get():
+                event = self._handle_message(namespace, msg)
+                if event is not None:
+                    events.append(event)
+        return events
+
+    def __iter__(self):
+        while self._sockets:
+            for event in self.get_events():
+                yield event
@@ -76,7 +76,8 @@ class IptablesFirewallDriver(firewall.FirewallDriver):
         self.ipconntrack = ip_conntrack.get_conntrack(
             self.iptables.get_rules_for_table, self.filtered_ports,
             self.unfiltered_ports, namespace=namespace,
-            zone_per_port=self.CONNTRACK_ZONE_PER_PORT)
+            zone_per_port=self.CONNTRACK_ZONE_PER_PORT,
+            use_netlink=cfg.CONF.SECURITYGROUP.conntrack_netlink)
         self._add_fallback_chain_v4v6()
         self._defer_apply = False
         self._pre_defer_filtered_ports = None
@@ -393,13 +393,6 @@ class KeepalivedManager(object):
             fileutils.ensure_tree(conf_dir, mode=0o755)
         return os.path.join(conf_dir, filename)
 
-    def _output_config_file(self):
-        config_str = self.config.get_config_str()
-        config_path = self.get_full_config_file_path('keepalived.conf')
-        file_utils.replace_file(config_path, config_str)
-
-        return config_path
-
     @staticmethod
     def _safe_remove_pid_file(pid_file):
         try:
@@ -422,11 +415,8 @@ class KeepalivedManager(object):
                 raise
 
     def spawn(self):
-        config_path = self._output_config_file()
-
-        for key, instance in self.config.instances.items():
-            if instance.track_script:
-                instance.track_script.write_check_script()
+        config_str = self.config.get_config_str()
+        config_path = self.get_full_config_file_path('keepalived.conf')
 
         keepalived_pm = self.get_process()
         vrrp_pm = self._get_vrrp_process(
@@ -435,14 +425,26 @@ class KeepalivedManager(object):
         keepalived_pm.default_cmd_callback = (
             self._get_keepalived_process_callback(vrrp_pm, config_path))
 
-        keepalived_pm.enable(reload_cfg=True)
+        # A router update usually does not change the VRRP configuration;
+        # sending SIGHUP anyway makes keepalived reload every instance and
+        # send its gratuitous ARPs again, so only reload on a real change.
+        if keepalived_pm.active and config_str == self.get_conf_on_disk():
+            LOG.debug('Keepalived config %s is unchanged, not reloading',
+                      config_path)
+        else:
+            file_utils.replace_file(config_path, config_str)
+
+            for key, instance in self.config.instances.items():
+                if instance.track_script:
+                    instance.track_script.write_check_script()
+
+            keepalived_pm.enable(reload_cfg=True)
+            LOG.debug('Keepalived spawned with config %s', config_path)
 
         self.process_monitor.register(uuid=self.resource_id,
                                       service_name=KEEPALIVED_SERVICE_NAME,
                                       monitored_process=keepalived_pm)
 
-        LOG.debug('Keepalived spawned with config %s', config_path)
-
     def disable(self):
         self.process_monitor.unregister(uuid=self.resource_id,
                                         service_name=KEEPALIVED_SERVICE_NAME)
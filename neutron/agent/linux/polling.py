@@ -29,10 +29,13 @@ LOG = logging.getLogger(__name__)
 @contextlib.contextmanager
 def get_polling_manager(minimize_polling=False,
                         ovsdb_monitor_respawn_interval=(
-                            constants.DEFAULT_OVSDBMON_RESPAWN)):
+                            constants.DEFAULT_OVSDBMON_RESPAWN),
+                        ovsdb_monitor_interface=(
+                            constants.OVSDB_MONITOR_OVSDB_CLIENT)):
     if minimize_polling:
         pm = InterfacePollingMinimizer(
-            ovsdb_monitor_respawn_interval=ovsdb_monitor_respawn_interval)
+            ovsdb_monitor_respawn_interval=ovsdb_monitor_respawn_interval,
+            ovsdb_monitor_interface=ovsdb_monitor_interface)
         pm.start()
     else:
         pm = base_polling.AlwaysPoll()
@@ -48,12 +51,17 @@ class InterfacePollingMinimizer(base_polling.BasePollingManager):
 
     def __init__(
             self,
-            ovsdb_monitor_respawn_interval=constants.DEFAULT_OVSDBMON_RESPAWN):
+            ovsdb_monitor_respawn_interval=constants.DEFAULT_OVSDBMON_RESPAWN,
+            ovsdb_monitor_interface=constants.OVSDB_MONITOR_OVSDB_CLIENT):
 
         super(InterfacePollingMinimizer, self).__init__()
-        self._monitor = ovsdb_monitor.SimpleInterfaceMonitor(
-            respawn_interval=ovsdb_monitor_respawn_interval,
-            ovsdb_connection=cfg.CONF.OVS.ovsdb_connection)
+        if ovsdb_monitor_interface == constants.OVSDB_MONITOR_NATIVE:
+            self._monitor = ovsdb_monitor.NativeInterfaceMonitor(
+                ovsdb_connection=cfg.CONF.OVS.ovsdb_connection)
+        else:
+            self._monitor = ovsdb_monitor.SimpleInterfaceMonitor(
+                respawn_interval=ovsdb_monitor_respawn_interval,
+                ovsdb_connection=cfg.CONF.OVS.ovsdb_connection)
 
     def start(self):
         self._monitor.start(block=True)
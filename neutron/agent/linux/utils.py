@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import contextlib
 import glob
 import grp
 import os
@@ -24,6 +25,7 @@ import time
 
 import eventlet
 from eventlet.green import subprocess
+import eventlet.queue
 from neutron_lib.utils import helpers
 from oslo_config import cfg
 from oslo_log import log as logging
@@ -36,6 +38,7 @@ from six.moves import http_client as httplib
 from neutron._i18n import _
 from neutron.agent.linux import xenapi_root_helper
 from neutron.common import exceptions
+from neutron.common import stats
 from neutron.common import utils
 from neutron.conf.agent import common as config
 from neutron import wsgi
@@ -43,6 +46,49 @@ from neutron import wsgi
 
 LOG = logging.getLogger(__name__)
 
+# Latency of the commands run by this process, labelled by command, logged
+# at the end of each command trace
+COMMAND_STATS = stats.Stats()
+
+# Commands whose first positional argument selects what they do
+_SUBCOMMAND_TOOLS = ('ip', 'ipset', 'ovs-appctl', 'ovs-ofctl', 'ovs-vsctl')
+# Options of those commands which take a separate value
+_SUBCOMMAND_TOOLS_VALUE_OPTS = ('-O', '-f', '-family', '-n', '-netns')
+
+_command_tracer = None
+
+
+class RootwrapDaemonPool(object):
+    """Run commands through a pool of rootwrap daemon clients.
+
+    A rootwrap daemon client runs a single command at a time, so commands
+    issued concurrently by several green threads wait for each other. The
+    pool starts up to ``size`` clients, each with its own daemon, and runs
+    each command on the first idle one.
+    """
+
+    def __init__(self, daemon_cmd, size):
+        self._daemon_cmd = daemon_cmd
+        self._size = size
+        self._clients = []
+        self._idle = eventlet.queue.LightQueue()
+        self._lock = threading.Lock()
+
+    def _get_idle_client(self):
+        with self._lock:
+            if self._idle.empty() and len(self._clients) < self._size:
+                new_client = client.Client(self._daemon_cmd)
+                self._clients.append(new_client)
+                return new_client
+        return self._idle.get()
+
+    def execute(self, cmd, stdin=None):
+        rootwrap_client = self._get_idle_client()
+        try:
+            return rootwrap_client.execute(cmd, stdin)
+        finally:
+            self._idle.put(rootwrap_client)
+
 
 class RootwrapDaemonHelper(object):
     __client = None
@@ -56,15 +102,119 @@ class RootwrapDaemonHelper(object):
     def get_client(cls):
         with cls.__lock:
             if cls.__client is None:
-                if xenapi_root_helper.ROOT_HELPER_DAEMON_TOKEN == \
-                    cfg.CONF.AGENT.root_helper_daemon:
+                daemon_cmd = cfg.CONF.AGENT.root_helper_daemon
+                pool_size = cfg.CONF.AGENT.root_helper_daemon_pool_size
+                if xenapi_root_helper.ROOT_HELPER_DAEMON_TOKEN == daemon_cmd:
                     cls.__client = xenapi_root_helper.XenAPIClient()
+                elif pool_size > 1:
+                    cls.__client = RootwrapDaemonPool(
+                        shlex.split(daemon_cmd), pool_size)
                 else:
-                    cls.__client = client.Client(
-                        shlex.split(cfg.CONF.AGENT.root_helper_daemon))
+                    cls.__client = client.Client(shlex.split(daemon_cmd))
             return cls.__client
 
 
+def get_command_label(cmd):
+    """Return a short label identifying what a command line runs.
+
+    Environment settings and 'ip netns exec' wrappers are skipped, so that
+    'ip netns exec qrouter-x ip -4 addr add ...' is labelled 'ip addr'.
+    """
+    cmd = [str(arg) for arg in cmd]
+    while cmd:
+        if cmd[0] == 'env':
+            cmd = cmd[1:]
+            while cmd and '=' in cmd[0]:
+                cmd = cmd[1:]
+        elif cmd[:3] == ['ip', 'netns', 'exec']:
+            cmd = cmd[4:]
+        else:
+            break
+    if not cmd:
+        return ''
+    label = os.path.basename(cmd[0])
+    if label in _SUBCOMMAND_TOOLS:
+        args = iter(cmd[1:])
+        for arg in args:
+            if arg in _SUBCOMMAND_TOOLS_VALUE_OPTS:
+                next(args, None)
+            elif not arg.startswith('-'):
+                return '%s %s' % (label, arg)
+    return label
+
+
+class CommandTracer(object):
+    """Record the timeline of the commands run while it is active.
+
+    The commands of all the green threads of the process are recorded, as
+    the work of an agent loop is often handed over to other green threads,
+    e.g. the router processing pool of the L3 agent.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.start = time.time()
+        self.commands = []
+
+    def record(self, label, start, duration, returncode):
+        self.commands.append((start - self.start, duration, label,
+                              returncode))
+
+    def log_timeline(self):
+        total = sum(duration for _start, duration, _label, _rc in
+                    self.commands)
+        LOG.debug("Commands run during %(name)s: %(count)d, "
+                  "%(total).3f seconds in total",
+                  {'name': self.name, 'count': len(self.commands),
+                   'total': total})
+        for offset, duration, label, returncode in self.commands:
+            LOG.debug("%(name)s +%(offset).3fs %(label)s took "
+                      "%(duration).3fs, exit code %(rc)s",
+                      {'name': self.name, 'offset': offset, 'label': label,
+                       'duration': duration, 'rc': returncode})
+        command_stats = get_command_stats()
+        for label in sorted({label for _o, _d, label, _rc in self.commands}):
+            if label in command_stats:
+                LOG.debug("%(label)s latency since the agent started: "
+                          "%(stats)s",
+                          {'label': label, 'stats': command_stats[label]})
+
+
+@contextlib.contextmanager
+def trace_commands(name):
+    """Log the timeline of the commands run within the context.
+
+    Tracing is only done when the trace_commands option is enabled, and
+    nested traces are recorded by the outermost one only. The trace is not
+    limited to the calling green thread: every command run by the process
+    while it is active is recorded.
+    """
+    global _command_tracer
+    if not cfg.CONF.AGENT.trace_commands or _command_tracer is not None:
+        yield
+        return
+    _command_tracer = CommandTracer(name)
+    try:
+        yield
+    finally:
+        tracer, _command_tracer = _command_tracer, None
+        tracer.log_timeline()
+
+
+def get_command_stats():
+    """Return the latency of the commands run by this process, by label."""
+    return COMMAND_STATS.to_dict()['histograms']
+
+
+def _record_command(cmd, start, returncode):
+    duration = time.time() - start
+    label = get_command_label(cmd)
+    COMMAND_STATS.observe(label, duration)
+    tracer = _command_tracer
+    if tracer is not None:
+        tracer.record(label, start, duration, returncode)
+
+
 def addl_env_args(addl_env):
     """Build arguments for adding additional environment vars with env"""
 
@@ -112,6 +262,9 @@ def execute_rootwrap_daemon(cmd, process_input, addl_env):
 def execute(cmd, process_input=None, addl_env=None,
             check_exit_code=True, return_stderr=False, log_fail_as_error=True,
             extra_ok_codes=None, run_as_root=False):
+    start = time.time()
+    returncode = None
+    label_cmd = cmd
     try:
         if process_input is not None:
             _process_input = encodeutils.to_utf8(process_input)
@@ -147,6 +300,7 @@ def execute(cmd, process_input=None, addl_env=None,
                                                        returncode=returncode)
 
     finally:
+        _record_command(label_cmd, start, returncode)
         # NOTE(termie): this appears to be necessary to let the subprocess
         #               call clean something up in between calls, without
         #               it two execute calls in a row hangs the second one
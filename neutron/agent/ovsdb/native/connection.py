@@ -50,13 +50,11 @@ def configure_ssl_conn():
     Stream.ssl_set_ca_cert_file(req_ssl_opts['ssl_ca_cert_file'])
 
 
-def idl_factory():
-    conn = cfg.CONF.OVS.ovsdb_connection
-    schema_name = 'Open_vSwitch'
+def get_schema_helper(conn, schema_name='Open_vSwitch'):
     if conn.startswith('ssl:'):
         configure_ssl_conn()
     try:
-        helper = idlutils.get_schema_helper(conn, schema_name)
+        return idlutils.get_schema_helper(conn, schema_name)
     except Exception:
         helpers.enable_connection_uri(conn)
 
@@ -66,7 +64,12 @@ def idl_factory():
         def do_get_schema_helper():
             return idlutils.get_schema_helper(conn, schema_name)
 
-        helper = do_get_schema_helper()
+        return do_get_schema_helper()
+
+
+def idl_factory():
+    conn = cfg.CONF.OVS.ovsdb_connection
+    helper = get_schema_helper(conn)
 
     # TODO(twilson) We should still select only the tables/columns we use
     helper.register_all()
@@ -109,6 +109,7 @@ class PluginApi(object):
         1.4 - tunnel_sync rpc signature upgrade to obtain 'host'
         1.5 - Support update_device_list and
               get_devices_details_list_and_failed_devices
+        1.6 - tunnel_sync accepts and returns the generation of the tunnels
     '''
 
     def __init__(self, topic):
@@ -156,10 +157,21 @@ class PluginApi(object):
                           devices_up=devices_up, devices_down=devices_down,
                           agent_id=agent_id, host=host)
 
-    def tunnel_sync(self, context, tunnel_ip, tunnel_type=None, host=None):
-        cctxt = self.client.prepare(version='1.4')
+    def tunnel_sync(self, context, tunnel_ip, tunnel_type=None, host=None,
+                    tunnels_generation=None):
+        """Register the tunnel IP and return the tunnels.
+
+        When the generation of the tunnels already known is passed and the
+        tunnels did not change, only the generation is returned.
+        """
+        if tunnels_generation is None:
+            cctxt = self.client.prepare(version='1.4')
+            return cctxt.call(context, 'tunnel_sync', tunnel_ip=tunnel_ip,
+                              tunnel_type=tunnel_type, host=host)
+        cctxt = self.client.prepare(version='1.6')
         return cctxt.call(context, 'tunnel_sync', tunnel_ip=tunnel_ip,
-                          tunnel_type=tunnel_type, host=host)
+                          tunnel_type=tunnel_type, host=host,
+                          tunnels_generation=tunnels_generation)
 
 
 def create_cache_for_l2_agent():
@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import contextlib
 import io
 import os
 
@@ -145,6 +146,17 @@ def avoid_blocking_call(f, *args, **kwargs):
         return f(*args, **kwargs)
 
 
+@contextlib.contextmanager
+def trace_commands(name):
+    # NOTE: command timelines are only recorded on Linux
+    yield
+
+
+def get_command_stats():
+    # NOTE: command latencies are only recorded on Linux
+    return {}
+
+
 def get_root_helper_child_pid(pid, expected_cmd, run_as_root=False):
     # We don't use a root helper on Windows.
     return str(pid)
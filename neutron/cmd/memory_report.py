@@ -0,0 +1,107 @@
+# Copyright (c) 2018 OpenStack Foundation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+import sys
+
+from oslo_config import cfg
+import psutil
+
+from neutron._i18n import _
+from neutron.conf.agent import cmd as command
+
+
+ProcessMemory = collections.namedtuple(
+    'ProcessMemory', ['pid', 'name', 'rss', 'unique', 'shared'])
+
+
+def get_process_memory(process):
+    """Return the unique and shared resident memory of a process.
+
+    The unique set size is the memory only this process maps, and which
+    would be freed if it exited; everything else in the resident set is
+    shared with at least one other process, like the pages a worker
+    inherited from the parent it was forked from.
+    """
+    info = process.memory_full_info()
+    return ProcessMemory(pid=process.pid,
+                         name=' '.join(process.cmdline()),
+                         rss=info.rss,
+                         unique=info.uss,
+                         shared=info.rss - info.uss)
+
+
+def collect(pid):
+    parent = psutil.Process(pid)
+    report = []
+    for process in [parent] + parent.children(recursive=True):
+        try:
+            report.append(get_process_memory(process))
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    return report
+
+
+def summarize(report):
+    """Aggregate the memory of the processes sharing the same command line.
+
+    API and RPC workers are forked from the server and run the same command,
+    so the parent is reported on its own and the workers are grouped
+    together.
+    """
+    summary = collections.OrderedDict()
+    for index, mem in enumerate(report):
+        name = mem.name if index else _('%s (parent)') % mem.name
+        count, rss, unique, shared = summary.get(name, (0, 0, 0, 0))
+        summary[name] = (count + 1, rss + mem.rss, unique + mem.unique,
+                         shared + mem.shared)
+    return summary
+
+
+def _mib(value):
+    return value / 1024.0 / 1024.0
+
+
+def format_report(report):
+    lines = ['%8s %10s %10s %10s  %s' % (
+        _('PID'), _('RSS MiB'), _('Unique'), _('Shared'), _('Command'))]
+    for mem in report:
+        lines.append('%8d %10.1f %10.1f %10.1f  %s' % (
+            mem.pid, _mib(mem.rss), _mib(mem.unique), _mib(mem.shared),
+            mem.name))
+    lines.append('')
+    lines.append('%8s %10s %10s %10s  %s' % (
+        _('Count'), _('RSS MiB'), _('Unique'), _('Shared'), _('Command')))
+    for name, (count, rss, unique, shared) in summarize(report).items():
+        lines.append('%8d %10.1f %10.1f %10.1f  %s' % (
+            count, _mib(rss), _mib(unique), _mib(shared), name))
+    return '\n'.join(lines)
+
+
+def setup_conf():
+    conf = cfg.CONF
+    command.register_cmd_opts(command.memory_report_opts, conf)
+    return conf
+
+
+def main():
+    """Report the unique and shared memory of a service and its workers."""
+    conf = setup_conf()
+    conf(sys.argv[1:])
+    try:
+        report = collect(conf.pid)
+    except psutil.NoSuchProcess:
+        sys.exit(_("ERROR: process %s does not exist") % conf.pid)
+    print(format_report(report))
@@ -0,0 +1,163 @@
+# Copyright (c) 2018 OpenStack Foundation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+import sys
+import time
+
+from oslo_config import cfg
+from six.moves import builtins
+
+from neutron._i18n import _
+from neutron.common import config
+from neutron.conf.agent import cmd as command
+from neutron import server
+
+
+StageTiming = collections.namedtuple('StageTiming', ['name', 'seconds'])
+ImportTiming = collections.namedtuple('ImportTiming',
+                                      ['module', 'cumulative', 'own'])
+
+
+class ImportTimer(object):
+    """Measure the time spent importing modules for the first time.
+
+    While installed, every import of a module that is not in sys.modules yet
+    is timed. The cumulative time includes the modules imported by it, the
+    own time does not.
+    """
+
+    def __init__(self):
+        self._orig_import = None
+        self._stack = []
+        self.timings = {}
+
+    def _timed_import(self, name, *args, **kwargs):
+        if name in sys.modules:
+            return self._orig_import(name, *args, **kwargs)
+        self._stack.append(0.0)
+        start = time.time()
+        try:
+            return self._orig_import(name, *args, **kwargs)
+        finally:
+            elapsed = time.time() - start
+            nested = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += elapsed
+            if name in sys.modules and name not in self.timings:
+                self.timings[name] = ImportTiming(name, elapsed,
+                                                  elapsed - nested)
+
+    def start(self):
+        self._orig_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def stop(self):
+        if self._orig_import is not None:
+            builtins.__import__ = self._orig_import
+            self._orig_import = None
+
+    def top(self, count, key='own'):
+        return sorted(self.timings.values(),
+                      key=lambda t: getattr(t, key), reverse=True)[:count]
+
+
+class StartupProfiler(object):
+    """Time the stages neutron-server runs before forking its workers."""
+
+    def __init__(self):
+        self.import_timer = ImportTimer()
+        self.stages = []
+
+    def run_stage(self, name, func, *args, **kwargs):
+        start = time.time()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.stages.append(StageTiming(name, time.time() - start))
+
+    def profile(self, stages):
+        self.import_timer.start()
+        try:
+            for name, func in stages:
+                self.run_stage(name, func)
+        finally:
+            self.import_timer.stop()
+
+
+def _load_plugins():
+    from neutron import manager
+    manager.init()
+
+
+def _load_extensions():
+    from neutron.api import extensions
+    extensions.PluginAwareExtensionManager.get_instance()
+
+
+def _register_objects():
+    from neutron import objects
+    objects.register_objects()
+
+
+def _load_policy():
+    from neutron import policy
+    policy.init()
+
+
+def get_stages():
+    return [('plugins', _load_plugins),
+            ('extensions', _load_extensions),
+            ('objects', _register_objects),
+            ('policy', _load_policy)]
+
+
+def format_report(profiler, count):
+    lines = [_('Startup stages (seconds):')]
+    total = 0.0
+    for stage in profiler.stages:
+        lines.append('  %-30s %8.3f' % (stage.name, stage.seconds))
+        total += stage.seconds
+    lines.append('  %-30s %8.3f' % (_('total'), total))
+    lines.append(_('Slowest imports (own / cumulative seconds):'))
+    for timing in profiler.import_timer.top(count):
+        lines.append('  %-60s %8.3f %8.3f' % (timing.module, timing.own,
+                                              timing.cumulative))
+    return '\n'.join(lines)
+
+
+def setup_conf():
+    conf = cfg.CONF
+    command.register_cmd_opts(command.startup_profile_opts, conf)
+    return conf
+
+
+def main():
+    """Report import and initialization time of neutron-server.
+
+    The plugins, extensions, versioned objects and policy engine are loaded
+    the same way neutron-server loads them before forking API and RPC
+    workers, and the time spent in each stage and in the slowest module
+    imports is printed. No workers are started.
+    """
+    conf = setup_conf()
+    config.init(sys.argv[1:],
+                default_config_files=server._get_config_files())
+    config.setup_logging()
+    config.set_config_defaults()
+
+    profiler = StartupProfiler()
+    profiler.profile(get_stages())
+    print(format_report(profiler, conf.top_imports))
@@ -0,0 +1,121 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import bisect
+import collections
+import contextlib
+import threading
+import time
+
+# Upper bounds, in seconds, of the latency histogram buckets
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1, 2.5, 5, 10, 30, 60)
+
+
+class Histogram(object):
+    """Count samples into buckets of increasing upper bounds.
+
+    Only the bucket counts, the number of samples and their sum are kept, so
+    the memory used does not depend on the number of samples; percentiles
+    are approximated by the upper bound of the bucket they fall in.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        # NOTE: the last count is for samples above the highest bound
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else 0.0
+
+    def percentile(self, percent):
+        """Return the upper bound of the bucket holding the percentile."""
+        if not self.count:
+            return 0.0
+        rank = self.count * percent / 100.0
+        seen = 0
+        for index, count in enumerate(self.counts[:-1]):
+            seen += count
+            if seen >= rank:
+                return self.buckets[index]
+        return self.max
+
+    def to_dict(self):
+        return {'count': self.count,
+                'sum': self.sum,
+                'mean': self.mean,
+                'max': self.max,
+                'p50': self.percentile(50),
+                'p90': self.percentile(90),
+                'p99': self.percentile(99)}
+
+
+class Stats(object):
+    """Counters and latency histograms keyed by a label.
+
+    This is meant to be kept by long lived components (agents, notifiers,
+    managers) so they can log or expose how much work they did and how long
+    it took, without depending on an external metrics system.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self._buckets = buckets
+        self._lock = threading.Lock()
+        self.counters = collections.defaultdict(int)
+        self.histograms = {}
+
+    def increment(self, label, value=1):
+        with self._lock:
+            self.counters[label] += value
+
+    def observe(self, label, value):
+        with self._lock:
+            histogram = self.histograms.get(label)
+            if histogram is None:
+                histogram = self.histograms[label] = Histogram(self._buckets)
+            histogram.observe(value)
+
+    @contextlib.contextmanager
+    def timer(self, label):
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.observe(label, time.time() - start)
+
+    def get_counter(self, label):
+        return self.counters.get(label, 0)
+
+    def get_histogram(self, label):
+        return self.histograms.get(label)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def to_dict(self):
+        with self._lock:
+            return {'counters': dict(self.counters),
+                    'histograms': {label: histogram.to_dict()
+                                   for label, histogram in
+                                   self.histograms.items()}}
@@ -47,6 +47,20 @@ ovs_opts = [
                        'bridges.'))
 ]
 
+startup_profile_opts = [
+    cfg.IntOpt('top-imports',
+               default=20,
+               min=0,
+               help=_('Number of slowest module imports to report.')),
+]
+
+memory_report_opts = [
+    cfg.IntOpt('pid',
+               required=True,
+               help=_('Process ID of the service to report, its workers are '
+                      'found from it.')),
+]
+
 
 def register_cmd_opts(opts, cfg=cfg.CONF):
     cfg.register_cli_opts(opts)
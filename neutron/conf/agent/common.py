@@ -107,6 +107,22 @@ For the agent which needs to execute commands in Dom0 in the hypervisor of
 XenServer, this option should be set to 'xenapi_root_helper', so that it will
 keep a XenAPI session to pass commands to Dom0.
 """)),
+    cfg.IntOpt('root_helper_daemon_pool_size',
+               default=1,
+               min=1,
+               help=_("Number of root helper daemons to run. Each daemon "
+                      "runs one command at a time, so a higher number lets "
+                      "commands issued concurrently by the agent run in "
+                      "parallel instead of waiting for each other. Only "
+                      "used with the rootwrap daemon.")),
+    cfg.BoolOpt('trace_commands',
+                default=False,
+                help=_("Log, at debug level, the timeline of the commands "
+                       "run by the agent during each synchronization loop, "
+                       "with how long each of them took, and the latency of "
+                       "these commands since the agent started. The "
+                       "commands run concurrently by the agent during the "
+                       "loop are included.")),
 ]
 
 AGENT_STATE_OPTS = [
@@ -41,6 +41,16 @@ AGENT_OPTS = [
                        "enable_new_agents=False. In the case, user's "
                        "resources will not be scheduled automatically to the "
                        "agent until admin changes admin_state_up to True.")),
+    cfg.IntOpt('agent_heartbeat_flush_interval', default=0, min=0,
+               help=_("Seconds between the batched writes of the agent "
+                      "heartbeats to the database. When set, a report which "
+                      "doesn't change the agent state is only recorded in "
+                      "memory by the worker receiving it and written with "
+                      "the other heartbeats of the interval in a single "
+                      "update, which also reads back the heartbeats written "
+                      "by the other workers. It should be well below "
+                      "agent_down_time minus the agents report_interval. "
+                      "0 writes every report to the database.")),
 ]
 
 
@@ -89,6 +89,13 @@ OPTS = [
                       'neutron.agent.linux.pd_drivers namespace. See '
                       'setup.cfg for entry points included with the neutron '
                       'source.')),
+    cfg.IntOpt('namespace_cleanup_workers',
+               default=4,
+               min=1,
+               help=_("Number of stale router namespaces removed "
+                      "concurrently after the first full sync. The stale "
+                      "namespaces are removed in the background, while the "
+                      "routers of the agent are processed.")),
     cfg.BoolOpt('enable_metadata_proxy', default=True,
                 help=_("Allow running metadata proxy.")),
     cfg.StrOpt('metadata_access_mark',
@@ -55,6 +55,14 @@ OPTS = [
                       'as master, and master election will be repeated '
                       'in round-robin fashion, until one of the router '
                       'restore the gateway connection.')),
+    cfg.BoolOpt('ha_shared_state_change_monitor',
+                default=False,
+                help=_('Monitor the state changes of all the HA routers '
+                       'with a single neutron-keepalived-state-change '
+                       'process instead of one process per router. The '
+                       'list of monitored routers is rewritten and '
+                       'reloaded at most once per VRRP advertisement '
+                       'interval.')),
 ]
 
 
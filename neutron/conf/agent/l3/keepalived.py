@@ -24,6 +24,11 @@ CLI_OPTS = [
     cfg.StrOpt('conf_dir', help=_('Path to the router directory')),
     cfg.StrOpt('monitor_interface', help=_('Interface to monitor')),
     cfg.StrOpt('monitor_cidr', help=_('CIDR to monitor')),
+    cfg.StrOpt('routers_file',
+               help=_('Path to the file listing the routers to monitor. '
+                      'When set, a single process monitors all these '
+                      'routers and the router specific options are '
+                      'ignored')),
     cfg.StrOpt('pid_file', help=_('Path to PID file for this process')),
     cfg.StrOpt('user', help=_('User (uid or name) running this process '
                               'after its initialization')),
@@ -36,7 +36,18 @@ security_group_opts = [
         default=True,
         help=_('Use ipset to speed-up the iptables based security groups. '
                'Enabling ipset support requires that ipset is installed on L2 '
-               'agent node.'))
+               'agent node.')),
+    cfg.BoolOpt(
+        'conntrack_netlink',
+        default=False,
+        help=_('Delete the conntrack entries of the iptables based security '
+               'groups via netlink, in one privileged call per batch of '
+               'updates, instead of running a conntrack command for each '
+               'port IP address. This requires libnetfilter_conntrack to be '
+               'installed on the L2 agent node. Only the TCP, UDP and ICMP '
+               'entries are deleted via netlink, the conntrack command is '
+               'still used for the rules of other protocols and for the '
+               'firewalls running in a namespace.'))
 ]
 
 
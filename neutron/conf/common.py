@@ -110,6 +110,22 @@ core_opts = [
     cfg.IntOpt('send_events_interval', default=2,
                help=_('Number of seconds between sending events to nova if '
                       'there are any events to send.')),
+    cfg.IntOpt('send_events_batch_size', default=100, min=1,
+               help=_('Maximum number of events sent to nova in a single '
+                      'request. The events queued during '
+                      'send_events_interval are split in requests of at '
+                      'most this size.')),
+    cfg.IntOpt('send_events_queue_size', default=0, min=0,
+               help=_('Maximum number of events waiting to be sent to nova. '
+                      'When it is reached, the events are sent by the '
+                      'operation queueing a new one instead of waiting for '
+                      'send_events_interval. Events are never dropped. 0 '
+                      'means no limit.')),
+    cfg.IntOpt('send_events_max_retries', default=3, min=0,
+               help=_('Number of times a request sending events to nova is '
+                      'retried when it fails with a connection or server '
+                      'error. The delay between the attempts doubles '
+                      'after each one.')),
     cfg.StrOpt('ipam_driver', default='internal',
                help=_("Neutron IPAM (IP address management) driver to use. "
                       "By default, the reference implementation of the "
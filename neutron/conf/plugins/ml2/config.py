@@ -65,7 +65,21 @@ ml2_opts = [
     cfg.IntOpt('overlay_ip_version',
                default=4,
                help=_("IP version of all overlay (tunnel) network endpoints. "
-                      "Use a value of 4 for IPv4 or 6 for IPv6."))
+                      "Use a value of 4 for IPv4 or 6 for IPv6.")),
+    cfg.IntOpt('agent_cache_ttl',
+               default=10, min=0,
+               help=_("Number of seconds during which each neutron-server "
+                      "worker reuses the agents of a host it looked up to "
+                      "bind a port, and the results of the port bindings "
+                      "done on that host. Agent reports received by the "
+                      "worker refresh them earlier. 0 disables the cache.")),
+    cfg.IntOpt('binding_cache_size',
+               default=1000, min=0,
+               help=_("Maximum number of port binding results cached per "
+                      "host and worker, for the mechanism drivers whose "
+                      "bindings only depend on the host, the segments, the "
+                      "vnic_type, the device_owner and the binding profile "
+                      "of the port. 0 disables the binding results cache."))
 ]
 
 
@@ -22,6 +22,12 @@ l2_population_options = [
     cfg.IntOpt('agent_boot_time', default=180,
                help=_('Delay within which agent is expected to update '
                       'existing ports when it restarts')),
+    cfg.FloatOpt('fanout_batch_interval', default=0.5, min=0,
+                 help=_('Interval in seconds during which the FDB updates '
+                        'fanned out to all the agents are collected and '
+                        'merged into a single message. The first update of '
+                        'a burst is sent immediately. Set to 0 to send each '
+                        'update as soon as it occurs.')),
 ]
 
 
@@ -104,6 +104,15 @@ agent_opts = [
                default=constants.DEFAULT_OVSDBMON_RESPAWN,
                help=_("The number of seconds to wait before respawning the "
                       "ovsdb monitor after losing communication with it.")),
+    cfg.StrOpt('ovsdb_monitor_interface',
+               default=constants.OVSDB_MONITOR_NATIVE,
+               choices=[constants.OVSDB_MONITOR_NATIVE,
+                        constants.OVSDB_MONITOR_OVSDB_CLIENT],
+               help=_("How interface changes are detected when "
+                      "minimize_polling is enabled: 'native' follows the "
+                      "ovsdb Interface table through an in-process IDL "
+                      "connection, 'ovsdb-client' parses the output of an "
+                      "'ovsdb-client monitor' subprocess.")),
     cfg.ListOpt('tunnel_types', default=DEFAULT_TUNNEL_TYPES,
                 help=_("Network types supported by the agent "
                        "(gre, vxlan and/or geneve).")),
@@ -39,6 +39,13 @@ service_opts = [
                help=_('Range of seconds to randomly delay when starting the '
                       'periodic task scheduler to reduce stampeding. '
                       '(Disable by setting to 0)')),
+    cfg.BoolOpt('prefork_shared_state',
+                default=True,
+                help=_('Load the policy rules and move the objects created '
+                       'while loading plugins out of the garbage collector '
+                       'before forking API and RPC workers, so that the '
+                       'memory holding them stays shared between the '
+                       'workers.')),
 ]
 
 
@@ -37,10 +37,12 @@ from oslo_serialization import jsonutils
 from oslo_utils import importutils
 from oslo_utils import timeutils
 import six
+import sqlalchemy as sa
 
 from neutron.agent.common import utils
 from neutron.api.rpc.callbacks import version_manager
 from neutron.common import constants as n_const
+from neutron.common import stats
 from neutron.conf.agent.database import agents_db
 from neutron.db import _model_query as model_query
 from neutron.db import api as db_api
@@ -48,6 +50,7 @@ from neutron.db.models import agent as agent_model
 from neutron.extensions import _availability_zone_filter_lib as azfil_ext
 from neutron.extensions import agent as ext_agent
 from neutron.extensions import availability_zone as az_ext
+from neutron.notifiers import batch_notifier
 from neutron.objects import agent as agent_obj
 
 
@@ -180,6 +183,111 @@ class AgentAvailabilityZoneMixin(az_ext.AvailabilityZonePluginBase):
             raise az_exc.AvailabilityZoneNotFound(availability_zone=diff.pop())
 
 
+class AgentHeartbeats(object):
+    """Heartbeats of the agents reporting to this worker.
+
+    The reports which don't change the state of an agent only update its
+    heartbeat here. These heartbeats are written to the database in batches,
+    every flush_interval seconds, and the heartbeats written by the other
+    workers are read back at the same time.
+    """
+
+    # The reported fields whose change must be written at once
+    STATE_KEYS = ('binary', 'topic', 'availability_zone', 'configurations')
+    FLUSH_CHUNK_SIZE = 500
+
+    def __init__(self, flush_interval):
+        # (agent_type, host) -> ID, reported state and last heartbeat of the
+        # agents this worker wrote to the database
+        self.agents = {}
+        self.stats = stats.Stats()
+        self._notifier = batch_notifier.BatchNotifier(flush_interval,
+                                                      self._flush)
+
+    def _get_state(self, agent_state):
+        return {key: agent_state.get(key) for key in self.STATE_KEYS}
+
+    def record(self, agent_id, agent_state, heartbeat):
+        """Remember an agent written to the database."""
+        key = (agent_state['agent_type'], agent_state['host'])
+        self.agents[key] = {'id': agent_id,
+                            'state': self._get_state(agent_state),
+                            'heartbeat': heartbeat}
+        self.stats.increment('written')
+
+    def forget(self, agent_type, host):
+        self.agents.pop((agent_type, host), None)
+
+    def coalesce(self, agent_state, heartbeat):
+        """Record the heartbeat of a report which doesn't change its agent.
+
+        :returns: True if the report doesn't need to be written now, False
+                  if the agent is unknown, was down, restarted or changed.
+        """
+        agent = self.agents.get((agent_state['agent_type'],
+                                 agent_state['host']))
+        configurations = agent_state.get('configurations') or {}
+        if (not agent or agent_state.get('start_flag') or
+                'resource_versions' in agent_state or
+                configurations.get('log_agent_heartbeats') or
+                utils.is_agent_down(agent['heartbeat']) or
+                agent['state'] != self._get_state(agent_state)):
+            return False
+        agent['heartbeat'] = heartbeat
+        self._notifier.queue_event(agent['id'])
+        self.stats.increment('coalesced')
+        return True
+
+    @lib_db_api.retry_db_errors
+    def _flush(self, agent_ids):
+        agent_ids = set(agent_ids)
+        heartbeats = {agent['id']: agent['heartbeat']
+                      for agent in self.agents.values()
+                      if agent['id'] in agent_ids}
+        agent_ids = sorted(heartbeats)
+        admin_context = context.get_admin_context()
+        model = agent_model.Agent
+        for i in range(0, len(agent_ids), self.FLUSH_CHUNK_SIZE):
+            chunk = {agent_id: heartbeats[agent_id] for agent_id in
+                     agent_ids[i:i + self.FLUSH_CHUNK_SIZE]}
+            heartbeat = sa.case(chunk, value=model.id)
+            with db_api.context_manager.writer.using(admin_context):
+                # never move back a heartbeat written by another worker
+                admin_context.session.query(model).filter(
+                    model.id.in_(chunk),
+                    model.heartbeat_timestamp < heartbeat).update(
+                        {model.heartbeat_timestamp: heartbeat},
+                        synchronize_session=False)
+            self.stats.increment('flushes')
+            self.stats.increment('flushed', len(chunk))
+        self._refresh(admin_context)
+
+    def _refresh(self, context):
+        model = agent_model.Agent
+        with db_api.context_manager.reader.using(context):
+            rows = context.session.query(
+                model.agent_type, model.host, model.id,
+                model.heartbeat_timestamp).all()
+        in_db = {(agent_type, host): (agent_id, heartbeat)
+                 for agent_type, host, agent_id, heartbeat in rows}
+        for key, agent in list(self.agents.items()):
+            agent_id, heartbeat = in_db.get(key, (None, None))
+            if agent_id != agent['id']:
+                # deleted by another worker, the next report will write the
+                # agent again
+                del self.agents[key]
+            elif heartbeat > agent['heartbeat']:
+                agent['heartbeat'] = heartbeat
+
+    def get_stats(self):
+        """Return the number of reports written and coalesced."""
+        return {'agents': len(self.agents),
+                'written': self.stats.get_counter('written'),
+                'coalesced': self.stats.get_counter('coalesced'),
+                'flushes': self.stats.get_counter('flushes'),
+                'flushed': self.stats.get_counter('flushed')}
+
+
 class AgentDbMixin(ext_agent.AgentPluginBase, AgentAvailabilityZoneMixin):
     """Mixin class to add agent extension to db_base_plugin_v2."""
 
@@ -269,6 +377,9 @@ class AgentDbMixin(ext_agent.AgentPluginBase, AgentAvailabilityZoneMixin):
         registry.notify(resources.AGENT, events.BEFORE_DELETE, self,
                         context=context, agent=agent)
         agent.delete()
+        heartbeats = getattr(self, '_agent_heartbeats', None)
+        if heartbeats:
+            heartbeats.forget(agent.agent_type, agent.host)
 
     @db_api.retry_if_session_inactive()
     def update_agent(self, context, id, agent):
@@ -304,11 +415,28 @@ class AgentDbMixin(ext_agent.AgentPluginBase, AgentAvailabilityZoneMixin):
         return [self._make_agent_dict(agent, fields=fields)
                 for agent in agents]
 
+    def _get_enabled_agents_liveness(self, context):
+        """Return the type, host and liveness of the enabled agents.
+
+        Only the columns needed are read instead of the whole agent rows.
+        """
+        model = agent_model.Agent
+        with db_api.context_manager.reader.using(context):
+            rows = context.session.query(
+                model.agent_type, model.host,
+                model.heartbeat_timestamp).filter(
+                    model.admin_state_up.is_(True)).all()
+        return [{'agent_type': agent_type,
+                 'host': host,
+                 'heartbeat_timestamp': heartbeat,
+                 'alive': not utils.is_agent_down(heartbeat)}
+                for agent_type, host, heartbeat in rows]
+
     @lib_db_api.retry_db_errors
     def agent_health_check(self):
         """Scan agents and log if some are considered dead."""
-        agents = self.get_agents(context.get_admin_context(),
-                                 filters={'admin_state_up': [True]})
+        agents = self._get_enabled_agents_liveness(
+            context.get_admin_context())
         dead_agents = [agent for agent in agents if not agent['alive']]
         if dead_agents:
             data = '%20s %20s %s\n' % ('Type', 'Last heartbeat', "host")
@@ -365,6 +493,14 @@ class AgentDbMixin(ext_agent.AgentPluginBase, AgentAvailabilityZoneMixin):
                       'uuid': state.get('uuid'),
                       'delta': delta})
 
+    def _get_agent_heartbeats(self):
+        flush_interval = cfg.CONF.agent_heartbeat_flush_interval
+        if not flush_interval:
+            return
+        if getattr(self, '_agent_heartbeats', None) is None:
+            self._agent_heartbeats = AgentHeartbeats(flush_interval)
+        return self._agent_heartbeats
+
     @db_api.retry_if_session_inactive()
     def create_or_update_agent(self, context, agent_state):
         """Registers new agent in the database or updates existing.
@@ -372,8 +508,18 @@ class AgentDbMixin(ext_agent.AgentPluginBase, AgentAvailabilityZoneMixin):
         Returns tuple of agent status and state.
         Status is from server point of view: alive, new or revived.
         It could be used by agent to do some sync with the server if needed.
+
+        When agent_heartbeat_flush_interval is set, the reports which don't
+        change an alive agent are only recorded by AgentHeartbeats.
         """
         status = agent_consts.AGENT_ALIVE
+        heartbeats = self._get_agent_heartbeats()
+        if heartbeats and heartbeats.coalesce(agent_state,
+                                              timeutils.utcnow()):
+            registry.notify(resources.AGENT, events.AFTER_UPDATE, self,
+                            context=context, host=agent_state['host'],
+                            plugin=self, agent=agent_state)
+            return status, agent_state
         with context.session.begin(subtransactions=True):
             res_keys = ['agent_type', 'binary', 'host', 'topic']
             res = dict((k, agent_state[k]) for k in res_keys)
@@ -420,6 +566,8 @@ class AgentDbMixin(ext_agent.AgentPluginBase, AgentAvailabilityZoneMixin):
                 self._log_heartbeat(agent_state, agent, configurations_dict)
                 status = agent_consts.AGENT_NEW
             greenthread.sleep(0)
+        if heartbeats:
+            heartbeats.record(agent.id, agent_state, current_time)
 
         registry.notify(resources.AGENT, event_type, self, context=context,
                         host=agent_state['host'], plugin=self,
@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
 import datetime
 import random
 import time
@@ -370,6 +371,32 @@ class DhcpAgentSchedulerDbMixin(dhcpagentscheduler
         return [agent for agent in agent_objs
                 if self.is_eligible_agent(context, active, agent)]
 
+    def get_dhcp_agents_per_network(self, context, network_ids=None,
+                                    active=None):
+        """Return the dhcp agents hosting each network.
+
+        Same as get_dhcp_agents_hosting_networks, for all the networks or
+        network_ids at once: a dict mapping the IDs of the hosted networks to
+        the lists of their eligible agents, from a single query.
+        """
+        filters = {}
+        if network_ids is not None:
+            if not network_ids:
+                return {}
+            filters['network_id'] = list(network_ids)
+        bindings = network.NetworkDhcpAgentBinding.get_objects(context,
+                                                               **filters)
+        eligible = {}
+        hosting_agents = collections.defaultdict(list)
+        for binding in bindings:
+            agent = binding.db_obj.dhcp_agent
+            if agent.id not in eligible:
+                eligible[agent.id] = self.is_eligible_agent(context, active,
+                                                            agent)
+            if eligible[agent.id]:
+                hosting_agents[binding.network_id].append(agent)
+        return dict(hosting_agents)
+
     def add_network_to_dhcp_agent(self, context, id, network_id):
         self._get_network(context, network_id)
         with context.session.begin(subtransactions=True):
@@ -13,6 +13,7 @@
 # under the License.
 #
 
+import collections
 import functools
 
 import netaddr
@@ -680,13 +681,27 @@ class L3_HA_NAT_db_mixin(l3_dvr_db.L3_NAT_with_dvr_db_mixin,
 
     @classmethod
     def _set_router_states(cls, context, bindings, states):
+        port_ids_by_state = collections.defaultdict(list)
         for binding in bindings:
             try:
-                with context.session.begin(subtransactions=True):
-                    binding.state = states[binding.router_id]
-            except (orm.exc.StaleDataError, orm.exc.ObjectDeletedError):
+                state = states[binding.router_id]
+                if binding.state != state:
+                    port_ids_by_state[state].append(binding.port_id)
+            except orm.exc.ObjectDeletedError:
                 # Take concurrently deleted routers in to account
                 pass
+        if not port_ids_by_state:
+            return
+
+        # NOTE: one UPDATE per state is issued for all the bindings instead
+        # of flushing them one by one; the bindings of the routers deleted
+        # concurrently are simply not matched anymore.
+        binding_model = l3ha_model.L3HARouterAgentPortBinding
+        with context.session.begin(subtransactions=True):
+            for state, port_ids in port_ids_by_state.items():
+                context.session.query(binding_model).filter(
+                    binding_model.port_id.in_(port_ids)).update(
+                        {'state': state}, synchronize_session='fetch')
 
     @db_api.retry_if_session_inactive()
     def update_routers_states(self, context, states, host):
@@ -698,17 +713,24 @@ class L3_HA_NAT_db_mixin(l3_dvr_db.L3_NAT_with_dvr_db_mixin,
         self._update_router_port_bindings(context, states, host)
 
     def _update_router_port_bindings(self, context, states, host):
+        active_router_ids = [
+            router_id for router_id, state in states.items()
+            if state == n_const.HA_ROUTER_STATE_ACTIVE]
+        if not active_router_ids:
+            return
         admin_ctx = context.elevated()
-        device_filter = {'device_id': list(states.keys()),
+        device_filter = {'device_id': active_router_ids,
                          'device_owner':
                          [constants.DEVICE_OWNER_HA_REPLICATED_INT,
                           constants.DEVICE_OWNER_ROUTER_SNAT,
                           constants.DEVICE_OWNER_ROUTER_GW]}
         ports = self._core_plugin.get_ports(admin_ctx, filters=device_filter)
-        active_ports = (port for port in ports
-            if states[port['device_id']] == n_const.HA_ROUTER_STATE_ACTIVE)
+        # Updating a port already bound to the host would go through the
+        # whole port update for nothing
+        unbound_ports = (port for port in ports
+                         if port.get(portbindings.HOST_ID) != host)
 
-        for port in active_ports:
+        for port in unbound_ports:
             try:
                 self._core_plugin.update_port(
                     admin_ctx, port['id'],
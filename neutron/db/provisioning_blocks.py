@@ -17,12 +17,15 @@ from neutron_lib.callbacks import registry
 from neutron_lib.callbacks import resources
 from oslo_log import log as logging
 
+from neutron.common import stats
 from neutron.db import api as db_api
 from neutron.db import models_v2
 from neutron.objects import provisioning_blocks as pb_obj
 
 LOG = logging.getLogger(__name__)
 PROVISIONING_COMPLETE = 'provisioning_complete'
+# emitted once per batch by provisioning_complete_bulk with 'object_ids'
+PROVISIONING_COMPLETE_BULK = 'provisioning_complete_bulk'
 # identifiers for the various entities that participate in provisioning
 DHCP_ENTITY = 'DHCP'
 L2_AGENT_ENTITY = 'L2'
@@ -32,6 +35,9 @@ L2_AGENT_ENTITY = 'L2'
 # to OVO here.
 _RESOURCE_TO_MODEL_MAP = {resources.PORT: models_v2.Port}
 
+# Queries, transactions and objects handled by provisioning_complete_bulk
+PROVISIONING_STATS = stats.Stats()
+
 
 def add_model_for_resource(resource, model):
     """Adds a mapping between a callback resource and a DB model."""
@@ -141,6 +147,83 @@ def provisioning_complete(context, object_id, object_type, entity):
                         context=context, object_id=object_id)
 
 
+@db_api.retry_if_session_inactive()
+def provisioning_complete_bulk(context, object_ids, object_type, entity):
+    """Mark that the provisioning of several objects was done by entity.
+
+    Same as provisioning_complete but the blocks of all the objects are
+    removed in a single transaction and the objects with no remaining
+    provisioning components are announced with a single
+    PROVISIONING_COMPLETE_BULK event carrying their IDs. The
+    PROVISIONING_COMPLETE event of each object is still emitted after it,
+    with bulk=True so that the subscribers of both events can skip it.
+
+    :param context: neutron api request context
+    :param object_ids: IDs of the objects that have been provisioned
+    :param object_type: callback resource type of the objects
+    :param entity: The entity that has provisioned the objects
+    :return: the IDs of the objects whose provisioning is complete
+    """
+    # see provisioning_complete for why this can't be in a transaction
+    if context.session.is_active:
+        raise RuntimeError("Must not be called in a transaction")
+    with PROVISIONING_STATS.timer('provisioning_complete_bulk_duration'):
+        standard_attr_ids = _get_standard_attr_ids(context, object_ids,
+                                                   object_type)
+        PROVISIONING_STATS.increment('queries')
+        if not standard_attr_ids:
+            return []
+        with db_api.context_manager.writer.using(context):
+            removed = pb_obj.ProvisioningBlock.delete_objects(
+                context, standard_attr_id=list(standard_attr_ids.values()),
+                entity=entity)
+        PROVISIONING_STATS.increment('transactions')
+        LOG.debug("Provisioning of %(count)d %(otype)s objects completed by "
+                  "entity %(entity)s, %(removed)d blocks removed.",
+                  {'count': len(standard_attr_ids), 'otype': object_type,
+                   'entity': entity, 'removed': removed})
+        # now with that committed, check which objects have records left
+        blocked = _get_blocked_standard_attr_ids(
+            context, standard_attr_ids.values())
+        PROVISIONING_STATS.increment('queries')
+        completed = [object_id for object_id in object_ids
+                     if object_id in standard_attr_ids and
+                     standard_attr_ids[object_id] not in blocked]
+        PROVISIONING_STATS.increment('objects', len(standard_attr_ids))
+        if completed:
+            LOG.debug("Provisioning complete for %(otype)s %(oids)s "
+                      "triggered by entity %(entity)s.",
+                      {'otype': object_type, 'oids': completed,
+                       'entity': entity})
+            PROVISIONING_STATS.increment('completed', len(completed))
+            registry.notify(object_type, PROVISIONING_COMPLETE_BULK,
+                            'neutron.db.provisioning_blocks',
+                            context=context, object_ids=completed)
+            for object_id in completed:
+                registry.notify(object_type, PROVISIONING_COMPLETE,
+                                'neutron.db.provisioning_blocks',
+                                context=context, object_id=object_id,
+                                bulk=True)
+    LOG.debug("Bulk provisioning stats: %s", PROVISIONING_STATS.to_dict())
+    return completed
+
+
+@db_api.retry_if_session_inactive()
+def get_blocked_object_ids(context, object_ids, object_type):
+    """Return the set of the given object IDs with a provisioning block.
+
+    :param context: neutron api request context
+    :param object_ids: IDs of the objects to check
+    :param object_type: callback resource type of the objects
+    """
+    standard_attr_ids = _get_standard_attr_ids(context, object_ids,
+                                               object_type)
+    blocked = _get_blocked_standard_attr_ids(context,
+                                             standard_attr_ids.values())
+    return {object_id for object_id, standard_attr_id in
+            standard_attr_ids.items() if standard_attr_id in blocked}
+
+
 @db_api.retry_if_session_inactive()
 def is_object_blocked(context, object_id, object_type):
     """Return boolean indicating if object has a provisioning block.
@@ -158,13 +241,18 @@ def is_object_blocked(context, object_id, object_type):
         context, standard_attr_id=standard_attr_id)
 
 
-def _get_standard_attr_id(context, object_id, object_type):
+def _get_model(object_type):
     model = _RESOURCE_TO_MODEL_MAP.get(object_type)
     if not model:
         raise RuntimeError("Could not find model for %s. If you are "
                            "adding provisioning blocks for a new resource "
                            "you must call add_model_for_resource during "
                            "initialization for your type." % object_type)
+    return model
+
+
+def _get_standard_attr_id(context, object_id, object_type):
+    model = _get_model(object_type)
     obj = (context.session.query(model.standard_attr_id).
            enable_eagerloads(False).
            filter_by(id=object_id).first())
@@ -173,3 +261,26 @@ def _get_standard_attr_id(context, object_id, object_type):
         LOG.debug("Could not find standard attr ID for object %s.", object_id)
         return
     return obj.standard_attr_id
+
+
+def _get_standard_attr_ids(context, object_ids, object_type):
+    """Return a dict of the standard attr IDs keyed by object ID.
+
+    Objects that do not exist (e.g. concurrently deleted) are left out.
+    """
+    model = _get_model(object_type)
+    if not object_ids:
+        return {}
+    query = (context.session.query(model.id, model.standard_attr_id).
+             enable_eagerloads(False).
+             filter(model.id.in_(set(object_ids))))
+    return {obj.id: obj.standard_attr_id for obj in query}
+
+
+def _get_blocked_standard_attr_ids(context, standard_attr_ids):
+    standard_attr_ids = set(standard_attr_ids)
+    if not standard_attr_ids:
+        return set()
+    return {block.standard_attr_id for block in
+            pb_obj.ProvisioningBlock.get_objects(
+                context, standard_attr_id=list(standard_attr_ids))}
@@ -12,14 +12,42 @@
 
 import eventlet
 from neutron_lib.utils import runtime
+from oslo_log import log as logging
 from oslo_utils import uuidutils
 
+from neutron.common import stats
+
+LOG = logging.getLogger(__name__)
+
 
 class BatchNotifier(object):
-    def __init__(self, batch_interval, callback):
+    def __init__(self, batch_interval, callback, batch_size=None,
+                 max_queued=None, drop_oldest=False):
+        """Send the queued events in batches to callback.
+
+        :param batch_interval: seconds to wait after a batch is sent before
+                               sending the next one
+        :param callback: called with the list of the events of each batch
+        :param batch_size: maximum number of events in a batch, no limit if
+                           None
+        :param max_queued: maximum number of pending events, no limit if None.
+                           When it is reached, the caller queueing an event
+                           sends a batch itself.
+        :param drop_oldest: when max_queued is reached, drop the oldest
+                            pending events instead. Only for the notifiers
+                            whose events can be derived again later.
+        """
         self.pending_events = []
         self.callback = callback
         self.batch_interval = batch_interval
+        self.batch_size = batch_size
+        self.max_queued = max_queued
+        self.drop_oldest = drop_oldest
+        self.stats = stats.Stats()
+        self.max_queue_length = 0
+        # events dropped since the previous batch was sent
+        self._dropped = 0
+        self._dispatching = False
         self._lock_identifier = 'notifier-%s' % uuidutils.generate_uuid()
 
     def queue_event(self, event):
@@ -31,34 +59,102 @@ class BatchNotifier(object):
         maintaining a persistent thread in the loopingcall was also
         problematic.
 
-        This replaces the loopingcall with a mechanism that creates a
-        short-lived thread on demand whenever an event is queued. That thread
-        will wait for a lock, send all queued events and then sleep for
-        'batch_interval' seconds to allow other events to queue up.
+        This replaces the loopingcall with a single short-lived dispatcher
+        thread, created on demand when an event is queued while none is
+        running. The dispatcher sends a batch of the queued events, then
+        sleeps for 'batch_interval' seconds to allow other events to queue up,
+        and exits once there are no more events to send.
 
         This effectively acts as a rate limiter to only allow 1 batch per
         'batch_interval' seconds.
 
+        When 'max_queued' events are already pending, the caller sends a batch
+        itself, which bounds the queue and slows down the producers without
+        losing events. If 'drop_oldest' is set, the oldest pending events are
+        dropped and counted instead.
+
         :param event: the event that occurred.
         """
         if not event:
             return
 
+        if self.max_queued and len(self.pending_events) >= self.max_queued:
+            if self.drop_oldest:
+                dropped = len(self.pending_events) - self.max_queued + 1
+                del self.pending_events[:dropped]
+                self._dropped += dropped
+                self.stats.increment('events_dropped', dropped)
+            else:
+                self.stats.increment('backpressure')
+                try:
+                    self._synced_notify()
+                except Exception:
+                    LOG.exception("Failed to send a batch of events")
+
         self.pending_events.append(event)
+        self.stats.increment('events_queued')
+        self.max_queue_length = max(self.max_queue_length,
+                                    len(self.pending_events))
 
+        if not self._dispatching:
+            self._dispatching = True
+            eventlet.spawn_n(self._dispatch)
+
+    def _dispatch(self):
+        try:
+            while self.pending_events:
+                batches_sent = self.stats.get_counter('batches_sent')
+                try:
+                    self._synced_notify()
+                except Exception:
+                    LOG.exception("Failed to send a batch of events")
+                if self.stats.get_counter('batches_sent') == batches_sent:
+                    # nothing could be sent, leave the pending events to the
+                    # dispatcher started by the next queued event
+                    break
+                # sleeping after send allows subsequent events to batch up
+                eventlet.sleep(self.batch_interval)
+        finally:
+            self._dispatching = False
+
+    def _synced_notify(self):
         @runtime.synchronized(self._lock_identifier)
-        def synced_send():
+        def synced_notify():
             self._notify()
-            # sleeping after send while holding the lock allows subsequent
-            # events to batch up
-            eventlet.sleep(self.batch_interval)
 
-        eventlet.spawn_n(synced_send)
+        synced_notify()
 
     def _notify(self):
         if not self.pending_events:
             return
 
-        batched_events = self.pending_events
-        self.pending_events = []
-        self.callback(batched_events)
+        if self.batch_size:
+            batched_events = self.pending_events[:self.batch_size]
+            self.pending_events = self.pending_events[self.batch_size:]
+        else:
+            batched_events = self.pending_events
+            self.pending_events = []
+        if self._dropped:
+            LOG.warning("%d events were dropped since the previous batch, "
+                        "more than %d events were waiting to be sent",
+                        self._dropped, self.max_queued)
+            self._dropped = 0
+        self.stats.increment('batches_sent')
+        self.stats.increment('events_sent', len(batched_events))
+        with self.stats.timer('batch_duration'):
+            self.callback(batched_events)
+
+    def get_stats(self):
+        """Return the queue length, events dropped, batches sent and their
+        duration, and how many times the caller had to send a batch.
+        """
+        batch_duration = self.stats.get_histogram('batch_duration')
+        return {'queue_length': len(self.pending_events),
+                'max_queue_length': self.max_queue_length,
+                'events_queued': self.stats.get_counter('events_queued'),
+                'events_sent': self.stats.get_counter('events_sent'),
+                'batches_sent': self.stats.get_counter('batches_sent'),
+                'events_dropped': self.stats.get_counter('events_dropped'),
+                'backpressure': self.stats.get_counter('backpressure'),
+                'batch_duration': (batch_duration.to_dict()
+                                   if batch_duration else None)}
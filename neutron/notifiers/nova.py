@@ -13,6 +13,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+
+import eventlet
 from keystoneauth1 import loading as ks_loading
 from neutron_lib.callbacks import events
 from neutron_lib.callbacks import registry
@@ -29,6 +32,7 @@ from oslo_log import log as logging
 from oslo_utils import uuidutils
 from sqlalchemy.orm import attributes as sql_attr
 
+from neutron.common import stats
 from neutron.notifiers import batch_notifier
 
 
@@ -41,6 +45,8 @@ NEUTRON_NOVA_EVENT_STATUS_MAP = {constants.PORT_STATUS_ACTIVE: 'completed',
                                  constants.PORT_STATUS_ERROR: 'failed',
                                  constants.PORT_STATUS_DOWN: 'completed'}
 NOVA_API_VERSION = "2.1"
+# Seconds to wait before the first retry of a failed request to nova
+SEND_EVENTS_RETRY_DELAY = 1
 
 
 @registry.has_registry_receivers
@@ -72,7 +78,9 @@ class Notifier(object):
             endpoint_type=cfg.CONF.nova.endpoint_type,
             extensions=extensions)
         self.batch_notifier = batch_notifier.BatchNotifier(
-            cfg.CONF.send_events_interval, self.send_events)
+            cfg.CONF.send_events_interval, self.send_events,
+            max_queued=cfg.CONF.send_events_queue_size or None)
+        self.stats = stats.Stats()
 
     def _is_compute_port(self, port):
         try:
@@ -238,34 +246,99 @@ class Notifier(object):
              'tag': port.id})
         self.send_port_status(None, None, port)
 
+    def get_stats(self):
+        """Return the queue length, dedupe ratio and send latency."""
+        received = self.stats.get_counter('events_received')
+        coalesced = self.stats.get_counter('events_coalesced')
+        latency = self.stats.get_histogram('send_latency')
+        result = self.batch_notifier.get_stats()
+        result.update({
+            'dedupe_ratio': float(coalesced) / received if received else 0.0,
+            'requests': self.stats.get_counter('requests'),
+            'retries': self.stats.get_counter('retries'),
+            'send_latency': latency.to_dict() if latency else None})
+        return result
+
+    @staticmethod
+    def _coalesce_events(batched_events):
+        """Keep the latest event of each server, port and event name.
+
+        The events are kept in the order of their latest occurrence, so that
+        a port plugged, unplugged and plugged again is reported unplugged
+        then plugged.
+        """
+        coalesced = collections.OrderedDict()
+        for event in batched_events:
+            key = (event.get('server_uuid'), event.get('tag'),
+                   event.get('name'))
+            coalesced.pop(key, None)
+            coalesced[key] = event
+        return list(coalesced.values())
+
     def send_events(self, batched_events):
+        events = self._coalesce_events(batched_events)
+        self.stats.increment('events_received', len(batched_events))
+        self.stats.increment('events_coalesced',
+                             len(batched_events) - len(events))
+        batch_size = cfg.CONF.send_events_batch_size
+        for start in range(0, len(events), batch_size):
+            self._send_events(events[start:start + batch_size])
+        LOG.debug("Nova notifier stats: %s", self.get_stats())
+
+    @staticmethod
+    def _can_retry(error):
+        # NOTE: errors returned by nova for the request itself (bad request,
+        # forbidden...) would be returned again
+        return (not isinstance(error, nova_exceptions.ClientException) or
+                (error.code or 0) >= 500)
+
+    def _send_events(self, batched_events):
         LOG.debug("Sending events: %s", batched_events)
-        try:
-            response = self.nclient.server_external_events.create(
-                batched_events)
-        except nova_exceptions.NotFound:
-            LOG.debug("Nova returned NotFound for event: %s",
-                      batched_events)
-        except Exception:
-            LOG.exception("Failed to notify nova on events: %s",
+        max_retries = cfg.CONF.send_events_max_retries
+        for attempt in range(max_retries + 1):
+            if attempt:
+                self.stats.increment('retries')
+                eventlet.sleep(SEND_EVENTS_RETRY_DELAY * 2 ** (attempt - 1))
+            self.stats.increment('requests')
+            try:
+                with self.stats.timer('send_latency'):
+                    response = self.nclient.server_external_events.create(
+                        batched_events)
+            except nova_exceptions.NotFound:
+                LOG.debug("Nova returned NotFound for event: %s",
                           batched_events)
-        else:
-            if not isinstance(response, list):
-                LOG.error("Error response returned from nova: %s",
-                          response)
                 return
-            response_error = False
-            for event in response:
-                try:
-                    code = event['code']
-                except KeyError:
-                    response_error = True
+            except Exception as e:
+                if attempt < max_retries and self._can_retry(e):
+                    LOG.warning("Failed to notify nova on %(count)d events, "
+                                "retrying: %(error)s",
+                                {'count': len(batched_events), 'error': e})
                     continue
-                if code != 200:
-                    LOG.warning("Nova event: %s returned with failed "
-                                "status", event)
-                else:
-                    LOG.info("Nova event response: %s", event)
-            if response_error:
-                LOG.error("Error response returned from nova: %s",
-                          response)
+                self.stats.increment('events_failed', len(batched_events))
+                LOG.exception("Failed to notify nova on events: %s",
+                              batched_events)
+                return
+            self.stats.increment('events_sent', len(batched_events))
+            self._handle_response(response)
+            return
+
+    def _handle_response(self, response):
+        if not isinstance(response, list):
+            LOG.error("Error response returned from nova: %s",
+                      response)
+            return
+        response_error = False
+        for event in response:
+            try:
+                code = event['code']
+            except KeyError:
+                response_error = True
+                continue
+            if code != 200:
+                LOG.warning("Nova event: %s returned with failed "
+                            "status", event)
+            else:
+                LOG.info("Nova event response: %s", event)
+        if response_error:
+            LOG.error("Error response returned from nova: %s",
+                      response)
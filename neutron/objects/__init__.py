@@ -13,9 +13,18 @@
 import os
 import sys
 
+_objects_registered = False
+
 
 def register_objects():
+    # NOTE: walking the objects tree and importing every module is expensive,
+    # and it is requested by every agent resource cache, so only do it once
+    # per process.
+    global _objects_registered
+    if _objects_registered:
+        return
     # local import to avoid circular import failure
     from neutron.common import utils
     dirn = os.path.dirname(sys.modules[__name__].__file__)
     utils.import_modules_recursively(dirn)
+    _objects_registered = True
@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
 import random
 
 from neutron_lib import context as neutron_ctx
@@ -22,8 +23,10 @@ from neutron_lib.utils import helpers
 from oslo_config import cfg
 from oslo_db import exception as db_exc
 from oslo_log import log
+from sqlalchemy import sql
 
 from neutron.common import exceptions as exc
+from neutron.common import stats
 from neutron.db import api as db_api
 from neutron.objects import base as base_obj
 
@@ -31,6 +34,8 @@ from neutron.objects import base as base_obj
 LOG = log.getLogger(__name__)
 
 IDPOOL_SELECT_SIZE = 100
+# Segments tried from the block before asking for the transaction retry
+IDPOOL_MAX_ATTEMPTS = 10
 
 
 class BaseTypeDriver(api.ML2TypeDriver):
@@ -64,6 +69,12 @@ class SegmentTypeDriver(BaseTypeDriver):
             self.model = model
         self.primary_keys = set(dict(self.model.__table__.columns))
         self.primary_keys.remove("allocated")
+        self._pool_key = self._get_pool_key()
+        # Ranges of the pools and blocks of unallocated segments selected
+        # from them by this worker, by the filters of the pool
+        self._pool_ranges = {}
+        self._free_segments = {}
+        self.allocation_stats = stats.Stats()
 
     # TODO(ataraday): get rid of this method when old TypeDriver won't be used
     def _get_session(self, arg):
@@ -130,46 +141,121 @@ class SegmentTypeDriver(BaseTypeDriver):
 
         return alloc
 
+    def _get_pool_key(self):
+        """Return the integer primary key the segments are numbered by."""
+        for key in sorted(self.primary_keys):
+            column = self.model.__table__.columns[key]
+            if column.type.python_type is int:
+                return key
+
+    def _get_pool_range(self, session, filters):
+        pool_filters = tuple(sorted(filters.items()))
+        pool_range = self._pool_ranges.get(pool_filters)
+        if pool_range is None:
+            column = getattr(self.model, self._pool_key)
+            pool_range = (session.query(sql.func.min(column),
+                                        sql.func.max(column)).
+                          filter_by(**filters).one())
+            if pool_range[0] is None:
+                return
+            self._pool_ranges[pool_filters] = pool_range
+        return pool_range
+
+    def _get_free_segments_block(self, session, filters):
+        """Select a block of unallocated segments of the pool.
+
+        The block starts at a random segment of the pool, so concurrent
+        workers each take their segments from a different part of it instead
+        of all trying the first unallocated ones.
+        """
+        select = (session.query(self.model).
+                  filter_by(allocated=False, **filters))
+        pool_range = (self._pool_key and
+                      self._get_pool_range(session, filters))
+        if pool_range:
+            column = getattr(self.model, self._pool_key)
+            pivot = random.randint(*pool_range)
+            allocs = (select.filter(column >= pivot).order_by(column).
+                      limit(IDPOOL_SELECT_SIZE).all())
+            if len(allocs) < IDPOOL_SELECT_SIZE:
+                allocs += (select.filter(column < pivot).order_by(column).
+                           limit(IDPOOL_SELECT_SIZE - len(allocs)).all())
+        else:
+            allocs = select.limit(IDPOOL_SELECT_SIZE).all()
+        random.shuffle(allocs)
+        self.allocation_stats.increment('block_refills')
+        LOG.debug("%(type)s segment allocation stats: %(stats)s",
+                  {'type': self.get_type(),
+                   'stats': self.get_allocation_stats()})
+        return collections.deque(
+            dict((k, alloc[k]) for k in self.primary_keys)
+            for alloc in allocs)
+
+    def get_allocation_stats(self):
+        """Return the allocations, conflicts, retries and their duration."""
+        duration = self.allocation_stats.get_histogram('allocation_duration')
+        return {
+            'allocations': self.allocation_stats.get_counter('allocations'),
+            'conflicts': self.allocation_stats.get_counter('conflicts'),
+            'retries': self.allocation_stats.get_counter('retries'),
+            'block_refills': self.allocation_stats.get_counter(
+                'block_refills'),
+            'allocation_duration': duration.to_dict() if duration else None}
+
     def allocate_partially_specified_segment(self, context, **filters):
         """Allocate model segment from pool partially specified by filters.
 
+        Each worker keeps a block of unallocated segments selected from the
+        pool and allocates them one after the other, trying the next one
+        when a segment has been allocated by someone else meanwhile.
+
         Return allocated db object or None.
         """
 
         network_type = self.get_type()
+        pool_filters = tuple(sorted(filters.items()))
         session, ctx_manager = self._get_session(context)
-        with ctx_manager:
-            select = (session.query(self.model).
-                      filter_by(allocated=False, **filters))
-
-            # Selected segment can be allocated before update by someone else,
-            allocs = select.limit(IDPOOL_SELECT_SIZE).all()
-
-            if not allocs:
-                # No resource available
-                return
+        with self.allocation_stats.timer('allocation_duration'), ctx_manager:
+            for attempt in range(IDPOOL_MAX_ATTEMPTS):
+                block = self._free_segments.get(pool_filters)
+                if not block:
+                    block = self._get_free_segments_block(session, filters)
+                    if not block:
+                        # No resource available
+                        self._free_segments.pop(pool_filters, None)
+                        return
+                    self._free_segments[pool_filters] = block
+                try:
+                    raw_segment = block.popleft()
+                except IndexError:
+                    # Emptied by a concurrent allocation of this worker
+                    continue
 
-            alloc = random.choice(allocs)
-            raw_segment = dict((k, alloc[k]) for k in self.primary_keys)
-            LOG.debug("%(type)s segment allocate from pool "
-                      "started with %(segment)s ",
-                      {"type": network_type,
-                       "segment": raw_segment})
-            count = (session.query(self.model).
-                     filter_by(allocated=False, **raw_segment).
-                     update({"allocated": True}))
-            if count:
                 LOG.debug("%(type)s segment allocate from pool "
-                          "success with %(segment)s ",
+                          "started with %(segment)s ",
+                          {"type": network_type,
+                           "segment": raw_segment})
+                count = (session.query(self.model).
+                         filter_by(allocated=False, **raw_segment).
+                         update({"allocated": True}))
+                if count:
+                    LOG.debug("%(type)s segment allocate from pool "
+                              "success with %(segment)s ",
+                              {"type": network_type,
+                               "segment": raw_segment})
+                    self.allocation_stats.increment('allocations')
+                    return self.model(allocated=True, **raw_segment)
+
+                # Segment allocated or deleted since select
+                self.allocation_stats.increment('conflicts')
+                LOG.debug("Allocate %(type)s segment from pool "
+                          "failed with segment %(segment)s",
                           {"type": network_type,
                            "segment": raw_segment})
-                return alloc
 
-            # Segment allocated since select
-            LOG.debug("Allocate %(type)s segment from pool "
-                      "failed with segment %(segment)s",
-                      {"type": network_type,
-                       "segment": raw_segment})
+            # The block is likely outdated, select a new one on retry
+            self._free_segments.pop(pool_filters, None)
+            self.allocation_stats.increment('retries')
             # saving real exception in case we exceeded amount of attempts
             raise db_exc.RetryRequest(
                 exc.NoNetworkFoundInMaximumAllowedAttempts())
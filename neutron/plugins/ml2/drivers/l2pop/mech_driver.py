@@ -222,10 +222,11 @@ class L2populationMechanismDriver(api.MechanismDriver):
         ports.update(self._get_tunnels(
             fdb_network_ports + tunnel_network_ports,
             agent.host))
-        for agent_ip, fdbs in ports.items():
-            for binding, agent in fdb_network_ports:
-                if l2pop_db.get_agent_ip(agent) == agent_ip:
-                    fdbs.extend(self._get_port_fdb_entries(binding.port))
+        # Dispatch the ports to their agent in a single pass over them
+        for binding, port_agent in fdb_network_ports:
+            fdbs = ports.get(l2pop_db.get_agent_ip(port_agent))
+            if fdbs is not None:
+                fdbs.extend(self._get_port_fdb_entries(binding.port))
 
         return agent_fdb_entries
 
@@ -246,10 +247,10 @@ class L2populationMechanismDriver(api.MechanismDriver):
 
         return agents
 
-    def agent_restarted(self, context):
-        agent_host = context.host
-        port_context = context._plugin_context
-        agent = l2pop_db.get_agent_by_host(port_context, agent_host)
+    def agent_restarted(self, context, agent=None):
+        if agent is None:
+            agent = l2pop_db.get_agent_by_host(context._plugin_context,
+                                               context.host)
         if l2pop_db.get_agent_uptime(agent) < cfg.CONF.l2pop.agent_boot_time:
             return True
         return False
@@ -298,7 +299,8 @@ class L2populationMechanismDriver(api.MechanismDriver):
             segment, agent_ip, network_id)
         other_fdb_ports = other_fdb_entries[network_id]['ports']
 
-        if agent_active_ports == 1 or self.agent_restarted(context):
+        if (agent_active_ports == 1 or
+                self.agent_restarted(context, agent=agent)):
             # First port activated on current agent in this network,
             # we have to provide it with the whole list of fdb entries
             agent_fdb_entries = self._create_agent_fdb(port_context,
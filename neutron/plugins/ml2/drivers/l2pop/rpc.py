@@ -16,10 +16,13 @@
 import collections
 
 from neutron_lib.agent import topics
+from oslo_config import cfg
 from oslo_log import log as logging
 import oslo_messaging
 
 from neutron.common import rpc as n_rpc
+from neutron.conf.plugins.ml2.drivers import l2pop as config
+from neutron.notifiers import batch_notifier
 
 
 LOG = logging.getLogger(__name__)
@@ -27,6 +30,39 @@ LOG = logging.getLogger(__name__)
 
 PortInfo = collections.namedtuple("PortInfo", "mac_address ip_address")
 
+# The fanouts of these methods are merged when they follow each other
+MERGEABLE_METHODS = ('add_fdb_entries', 'remove_fdb_entries')
+
+config.register_l2_population_opts()
+
+
+def _merge_fdb_entries(merged, fdb_entries):
+    """Merge fdb_entries into merged, if their segments are the same.
+
+    :returns: True when merged, False if a network of fdb_entries has
+              another segment in merged.
+    """
+    for network_id, network_fdb in fdb_entries.items():
+        merged_fdb = merged.get(network_id)
+        if merged_fdb and (
+                merged_fdb['segment_id'] != network_fdb['segment_id'] or
+                merged_fdb['network_type'] != network_fdb['network_type']):
+            return False
+
+    for network_id, network_fdb in fdb_entries.items():
+        merged_fdb = merged.setdefault(
+            network_id, {'segment_id': network_fdb['segment_id'],
+                         'network_type': network_fdb['network_type'],
+                         'ports': {}})
+        for agent_ip, entries in network_fdb['ports'].items():
+            merged_entries = merged_fdb['ports'].setdefault(agent_ip, [])
+            known = set(tuple(entry) for entry in merged_entries)
+            for entry in entries:
+                if tuple(entry) not in known:
+                    known.add(tuple(entry))
+                    merged_entries.append(entry)
+    return True
+
 
 class L2populationAgentNotifyAPI(object):
 
@@ -37,6 +73,10 @@ class L2populationAgentNotifyAPI(object):
                                                         topics.UPDATE)
         target = oslo_messaging.Target(topic=topic, version='1.0')
         self.client = n_rpc.get_client(target)
+        self._fanout_batch_notifier = None
+        if cfg.CONF.l2pop.fanout_batch_interval:
+            self._fanout_batch_notifier = batch_notifier.BatchNotifier(
+                cfg.CONF.l2pop.fanout_batch_interval, self._send_fanouts)
 
     def _notification_fanout(self, context, method, fdb_entries):
         LOG.debug('Fanout notify l2population agents at %(topic)s '
@@ -45,9 +85,43 @@ class L2populationAgentNotifyAPI(object):
                    'method': method,
                    'fdb_entries': fdb_entries})
 
+        if self._fanout_batch_notifier:
+            self._fanout_batch_notifier.queue_event(
+                (context, method, fdb_entries))
+        else:
+            self._cast_fanout(context, method, fdb_entries)
+
+    def _cast_fanout(self, context, method, fdb_entries):
         cctxt = self.client.prepare(topic=self.topic_l2pop_update, fanout=True)
         cctxt.cast(context, method, fdb_entries=fdb_entries)
 
+    def _send_fanouts(self, fanouts):
+        """Send the batched fanouts, merging those which follow each other.
+
+        The FDB entries added, or removed, by consecutive fanouts are sent
+        in a single message. The order of the fanouts of different methods
+        is kept, so the agents apply them in the order they occurred.
+        """
+        messages = []
+        for context, method, fdb_entries in fanouts:
+            if messages and method in MERGEABLE_METHODS:
+                last_method, last_fdb_entries = messages[-1][1:]
+                if (last_method == method and
+                        _merge_fdb_entries(last_fdb_entries, fdb_entries)):
+                    continue
+            if method in MERGEABLE_METHODS:
+                # The entries of the next fanouts are merged into a copy
+                merged = {}
+                _merge_fdb_entries(merged, fdb_entries)
+                fdb_entries = merged
+            messages.append((context, method, fdb_entries))
+
+        LOG.debug('Sending %(messages)d l2population fanout messages for '
+                  '%(fanouts)d notifications',
+                  {'messages': len(messages), 'fanouts': len(fanouts)})
+        for context, method, fdb_entries in messages:
+            self._cast_fanout(context, method, fdb_entries)
+
     def _notification_host(self, context, method, fdb_entries, host):
         LOG.debug('Notify l2population agent %(host)s at %(topic)s the '
                   'message %(method)s with %(fdb_entries)s',
@@ -112,6 +112,10 @@ TUN_TABLE = {p_const.TYPE_GRE: GRE_TUN_TO_LV,
 # The default respawn interval for the ovsdb monitor
 DEFAULT_OVSDBMON_RESPAWN = 30
 
+# How the agent monitors the ovsdb Interface table for changes
+OVSDB_MONITOR_OVSDB_CLIENT = 'ovsdb-client'
+OVSDB_MONITOR_NATIVE = 'native'
+
 # Represent invalid OF Port
 OFPORT_INVALID = -1
 
@@ -197,6 +197,7 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
         self.ovsdb_monitor_respawn_interval = (
             agent_conf.ovsdb_monitor_respawn_interval or
             constants.DEFAULT_OVSDBMON_RESPAWN)
+        self.ovsdb_monitor_interface = agent_conf.ovsdb_monitor_interface
         self.local_ip = ovs_conf.local_ip
         self.tunnel_count = 0
         self.vxlan_udp_port = agent_conf.vxlan_udp_port
@@ -372,6 +373,8 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
         self.tun_br_ofports = {n_const.TYPE_GENEVE: {},
                                n_const.TYPE_GRE: {},
                                n_const.TYPE_VXLAN: {}}
+        # Generation of the tunnels set up by tunnel_sync, by tunnel type
+        self.tunnels_generation = {}
 
     def setup_rpc(self):
         self.plugin_rpc = OVSPluginApi(topics.PLUGIN)
@@ -527,32 +530,45 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
     def _tunnel_port_lookup(self, network_type, remote_ip):
         return self.tun_br_ofports[network_type].get(remote_ip)
 
-    def fdb_add(self, context, fdb_entries):
-        LOG.debug("fdb_add received")
+    def _get_remote_agent_ports(self, fdb_entries):
+        remote_agent_ports = []
         for lvm, agent_ports in self.get_agent_ports(fdb_entries):
             agent_ports.pop(self.local_ip, None)
             if len(agent_ports):
-                if not self.enable_distributed_routing:
-                    with self.tun_br.deferred() as deferred_br:
-                        self.fdb_add_tun(context, deferred_br, lvm,
-                                         agent_ports, self._tunnel_port_lookup)
-                else:
-                    self.fdb_add_tun(context, self.tun_br, lvm,
+                remote_agent_ports.append((lvm, agent_ports))
+        return remote_agent_ports
+
+    def fdb_add(self, context, fdb_entries):
+        LOG.debug("fdb_add received")
+        remote_agent_ports = self._get_remote_agent_ports(fdb_entries)
+        if not remote_agent_ports:
+            return
+        if not self.enable_distributed_routing:
+            # The flows of all the networks are applied at once
+            with self.tun_br.deferred() as deferred_br:
+                for lvm, agent_ports in remote_agent_ports:
+                    self.fdb_add_tun(context, deferred_br, lvm,
                                      agent_ports, self._tunnel_port_lookup)
+        else:
+            for lvm, agent_ports in remote_agent_ports:
+                self.fdb_add_tun(context, self.tun_br, lvm,
+                                 agent_ports, self._tunnel_port_lookup)
 
     def fdb_remove(self, context, fdb_entries):
         LOG.debug("fdb_remove received")
-        for lvm, agent_ports in self.get_agent_ports(fdb_entries):
-            agent_ports.pop(self.local_ip, None)
-            if len(agent_ports):
-                if not self.enable_distributed_routing:
-                    with self.tun_br.deferred() as deferred_br:
-                        self.fdb_remove_tun(context, deferred_br, lvm,
-                                            agent_ports,
-                                            self._tunnel_port_lookup)
-                else:
-                    self.fdb_remove_tun(context, self.tun_br, lvm,
-                                        agent_ports, self._tunnel_port_lookup)
+        remote_agent_ports = self._get_remote_agent_ports(fdb_entries)
+        if not remote_agent_ports:
+            return
+        if not self.enable_distributed_routing:
+            with self.tun_br.deferred() as deferred_br:
+                for lvm, agent_ports in remote_agent_ports:
+                    self.fdb_remove_tun(context, deferred_br, lvm,
+                                        agent_ports,
+                                        self._tunnel_port_lookup)
+        else:
+            for lvm, agent_ports in remote_agent_ports:
+                self.fdb_remove_tun(context, self.tun_br, lvm,
+                                    agent_ports, self._tunnel_port_lookup)
 
     def add_fdb_flow(self, br, port_info, remote_ip, lvm, ofport):
         if port_info == n_const.FLOODING_ENTRY:
@@ -1797,11 +1813,12 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
 
         try:
             for tunnel_type in self.tunnel_types:
-                details = self.plugin_rpc.tunnel_sync(self.context,
-                                                      self.local_ip,
-                                                      tunnel_type,
-                                                      self.conf.host)
-                if not self.l2_pop:
+                details = self.plugin_rpc.tunnel_sync(
+                    self.context, self.local_ip, tunnel_type, self.conf.host,
+                    self.tunnels_generation.get(tunnel_type))
+                # The tunnels are only returned when they changed since the
+                # generation passed
+                if not self.l2_pop and 'tunnels' in details:
                     tunnels = details['tunnels']
                     for tunnel in tunnels:
                         if self.local_ip != tunnel['ip_address']:
@@ -1815,6 +1832,8 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
                                                     tunnel['ip_address'],
                                                     tunnel_type)
                     self._setup_tunnel_flood_flow(self.tun_br, tunnel_type)
+                self.tunnels_generation[tunnel_type] = details.get(
+                    'tunnels_generation')
         except Exception as e:
             LOG.debug("Unable to sync tunnel IP %(local_ip)s: %(e)s",
                       {'local_ip': self.local_ip, 'e': e})
@@ -2155,8 +2174,10 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
                                   port_info)
                         provisioning_needed = (
                                 ovs_restarted or bridges_recreated)
-                        failed_devices = self.process_network_ports(
-                            port_info, provisioning_needed)
+                        with utils.trace_commands(
+                                'rpc_loop iteration %d' % self.iter_num):
+                            failed_devices = self.process_network_ports(
+                                port_info, provisioning_needed)
                         if need_clean_stale_flow:
                             self.cleanup_stale_flows()
                             need_clean_stale_flow = False
@@ -2205,7 +2226,8 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
         br_names = [br.br_name for br in self.phys_brs.values()]
         with polling.get_polling_manager(
                 self.minimize_polling,
-                self.ovsdb_monitor_respawn_interval) as pm,\
+                self.ovsdb_monitor_respawn_interval,
+                self.ovsdb_monitor_interface) as pm,\
             ovsdb_monitor.get_bridges_monitor(
                 br_names,
                 self.ovsdb_monitor_respawn_interval) as bm:
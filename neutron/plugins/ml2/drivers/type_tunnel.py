@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 import abc
+import hashlib
 import itertools
 import operator
 
@@ -27,6 +28,7 @@ from neutron_lib.plugins import utils as plugin_utils
 from oslo_config import cfg
 from oslo_db import exception as db_exc
 from oslo_log import log
+from oslo_serialization import jsonutils
 import six
 from six import moves
 from sqlalchemy import or_
@@ -396,11 +398,27 @@ class TunnelRpcCallbackMixin(object):
         self._notifier = notifier
         self._type_manager = type_manager
 
+    @staticmethod
+    def _get_tunnels_generation(tunnels):
+        """Return the generation identifying a list of tunnel endpoints.
+
+        It is computed from the endpoints, so all the servers give the same
+        generation to the same list.
+        """
+        tunnels = sorted(tunnels, key=operator.itemgetter('ip_address'))
+        return hashlib.sha1(jsonutils.dumps(
+            tunnels, sort_keys=True).encode('utf-8')).hexdigest()
+
     def tunnel_sync(self, rpc_context, **kwargs):
         """Update new tunnel.
 
         Updates the database with the tunnel IP. All listening agents will also
-        be notified about the new tunnel IP.
+        be notified about the new tunnel IP, unless the endpoint was already
+        registered.
+
+        The list of the tunnels is returned along with its generation. When
+        the agent passes the generation of the list it already has and it is
+        unchanged, only the generation is returned.
         """
         tunnel_ip = kwargs.get('tunnel_ip')
         if not tunnel_ip:
@@ -422,60 +440,82 @@ class TunnelRpcCallbackMixin(object):
 
         driver = self._type_manager.drivers.get(tunnel_type)
         if driver:
-            # The given conditional statements will verify the following
-            # things:
-            # 1. If host is not passed from an agent, it is a legacy mode.
-            # 2. If passed host and tunnel_ip are not found in the DB,
-            #    it is a new endpoint.
-            # 3. If host is passed from an agent and it is not found in DB
-            #    but the passed tunnel_ip is found, delete the endpoint
-            #    from DB and add the endpoint with (tunnel_ip, host),
-            #    it is an upgrade case.
-            # 4. If passed host is found in DB and passed tunnel ip is not
-            #    found, delete the endpoint belonging to that host and
-            #    add endpoint with latest (tunnel_ip, host), it is a case
-            #    where local_ip of an agent got changed.
-            # 5. If the passed host had another ip in the DB the host-id has
-            #    roamed to a different IP then delete any reference to the new
-            #    local_ip or the host id. Don't notify tunnel_delete for the
-            #    old IP since that one could have been taken by a different
-            #    agent host-id (neutron-ovs-cleanup should be used to clean up
-            #    the stale endpoints).
-            #    Finally create a new endpoint for the (tunnel_ip, host).
-            if host:
-                host_endpoint = driver.obj.get_endpoint_by_host(host)
-                ip_endpoint = driver.obj.get_endpoint_by_ip(tunnel_ip)
-
-                if (ip_endpoint and ip_endpoint.host is None and
-                        host_endpoint is None):
-                    driver.obj.delete_endpoint(ip_endpoint.ip_address)
-                elif (ip_endpoint and ip_endpoint.host != host):
-                    LOG.info(
-                        "Tunnel IP %(ip)s was used by host %(host)s and "
-                        "will be assigned to %(new_host)s",
-                        {'ip': ip_endpoint.ip_address,
-                         'host': ip_endpoint.host,
-                         'new_host': host})
-                    driver.obj.delete_endpoint_by_host_or_ip(
-                        host, ip_endpoint.ip_address)
-                elif (host_endpoint and host_endpoint.ip_address != tunnel_ip):
-                    # Notify all other listening agents to delete stale tunnels
-                    self._notifier.tunnel_delete(rpc_context,
-                        host_endpoint.ip_address, tunnel_type)
-                    driver.obj.delete_endpoint(host_endpoint.ip_address)
-
-            tunnel = driver.obj.add_endpoint(tunnel_ip, host)
+            # The endpoints of the host and of the tunnel IP are looked up
+            # in the list of the endpoints, which is returned to the agent
+            # anyway, rather than queried one by one.
             tunnels = driver.obj.get_endpoints()
-            entry = {'tunnels': tunnels}
-            # Notify all other listening agents
-            self._notifier.tunnel_update(rpc_context, tunnel.ip_address,
-                                         tunnel_type)
+            host_endpoint = ip_endpoint = None
+            for endpoint in tunnels:
+                if endpoint['ip_address'] == tunnel_ip:
+                    ip_endpoint = endpoint
+                if host and endpoint['host'] == host:
+                    host_endpoint = endpoint
+
+            # Nothing to update if the endpoint is already registered, as
+            # when an agent restarts: the other agents already have the
+            # tunnel.
+            if not ip_endpoint or (host and ip_endpoint['host'] != host):
+                self._update_endpoint(rpc_context, driver, tunnel_type,
+                                      tunnel_ip, host, host_endpoint,
+                                      ip_endpoint)
+                tunnels = driver.obj.get_endpoints()
+
+            generation = self._get_tunnels_generation(tunnels)
+            if kwargs.get('tunnels_generation') == generation:
+                return {'tunnels_generation': generation}
             # Return the list of tunnels IP's to the agent
-            return entry
+            return {'tunnels': tunnels, 'tunnels_generation': generation}
         else:
             msg = _("Network type value '%s' not supported") % tunnel_type
             raise exc.InvalidInput(error_message=msg)
 
+    def _update_endpoint(self, rpc_context, driver, tunnel_type, tunnel_ip,
+                         host, host_endpoint, ip_endpoint):
+        # The given conditional statements will verify the following
+        # things:
+        # 1. If host is not passed from an agent, it is a legacy mode.
+        # 2. If passed host and tunnel_ip are not found in the DB,
+        #    it is a new endpoint.
+        # 3. If host is passed from an agent and it is not found in DB
+        #    but the passed tunnel_ip is found, delete the endpoint
+        #    from DB and add the endpoint with (tunnel_ip, host),
+        #    it is an upgrade case.
+        # 4. If passed host is found in DB and passed tunnel ip is not
+        #    found, delete the endpoint belonging to that host and
+        #    add endpoint with latest (tunnel_ip, host), it is a case
+        #    where local_ip of an agent got changed.
+        # 5. If the passed host had another ip in the DB the host-id has
+        #    roamed to a different IP then delete any reference to the new
+        #    local_ip or the host id. Don't notify tunnel_delete for the
+        #    old IP since that one could have been taken by a different
+        #    agent host-id (neutron-ovs-cleanup should be used to clean up
+        #    the stale endpoints).
+        #    Finally create a new endpoint for the (tunnel_ip, host).
+        if host:
+            if (ip_endpoint and ip_endpoint['host'] is None and
+                    host_endpoint is None):
+                driver.obj.delete_endpoint(ip_endpoint['ip_address'])
+            elif (ip_endpoint and ip_endpoint['host'] != host):
+                LOG.info(
+                    "Tunnel IP %(ip)s was used by host %(host)s and "
+                    "will be assigned to %(new_host)s",
+                    {'ip': ip_endpoint['ip_address'],
+                     'host': ip_endpoint['host'],
+                     'new_host': host})
+                driver.obj.delete_endpoint_by_host_or_ip(
+                    host, ip_endpoint['ip_address'])
+            elif (host_endpoint and
+                    host_endpoint['ip_address'] != tunnel_ip):
+                # Notify all other listening agents to delete stale tunnels
+                self._notifier.tunnel_delete(rpc_context,
+                    host_endpoint['ip_address'], tunnel_type)
+                driver.obj.delete_endpoint(host_endpoint['ip_address'])
+
+        tunnel = driver.obj.add_endpoint(tunnel_ip, host)
+        # Notify all other listening agents
+        self._notifier.tunnel_update(rpc_context, tunnel.ip_address,
+                                     tunnel_type)
+
 
 class TunnelAgentRpcApiMixin(object):
 
@@ -13,6 +13,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import time
+
 from neutron_lib.api.definitions import external_net as extnet_apidef
 from neutron_lib.api.definitions import multiprovidernet as mpnet_apidef
 from neutron_lib.api.definitions import portbindings
@@ -25,10 +27,12 @@ from neutron_lib.exceptions import vlantransparent as vlan_exc
 from neutron_lib.plugins.ml2 import api
 from oslo_config import cfg
 from oslo_log import log
+from oslo_serialization import jsonutils
 from oslo_utils import excutils
 import stevedore
 
 from neutron._i18n import _
+from neutron.common import stats
 from neutron.conf.plugins.ml2 import config
 from neutron.db import api as db_api
 from neutron.db import segments_db
@@ -40,6 +44,8 @@ LOG = log.getLogger(__name__)
 MAX_BINDING_LEVELS = 10
 config.register_ml2_plugin_opts()
 
+BINDING_STATS = stats.Stats()
+
 
 class TypeManager(stevedore.named.NamedExtensionManager):
     """Manage network segment types using drivers."""
@@ -346,6 +352,9 @@ class MechanismManager(stevedore.named.NamedExtensionManager):
         # Ordered list of mechanism drivers, defining
         # the order in which the drivers are called.
         self.ordered_mech_drivers = []
+        # Results of the single level bindings done by the drivers allowing
+        # it, keyed by host then by _get_binding_cache_key()
+        self._binding_results = {}
 
         LOG.info("Configured mechanism driver names: %s",
                  cfg.CONF.ml2.mechanism_drivers)
@@ -746,8 +755,15 @@ class MechanismManager(stevedore.named.NamedExtensionManager):
                    'vnic_type': binding.vnic_type,
                    'profile': binding.profile})
         context._clear_binding_levels()
-        if not self._bind_port_level(context, 0,
-                                     context.network.network_segments):
+        segments = context.network.network_segments
+        cache_key = self._get_binding_cache_key(context, segments)
+        with BINDING_STATS.timer('bind_port'):
+            cached = self._bind_port_from_cache(context, cache_key, segments)
+            bound = cached or self._bind_port_level(context, 0, segments)
+        if bound:
+            if not cached:
+                self._cache_binding_result(context, cache_key)
+        else:
             binding.vif_type = portbindings.VIF_TYPE_BINDING_FAILED
             LOG.error("Failed to bind port %(port)s on host %(host)s "
                       "for vnic_type %(vnic_type)s using segments "
@@ -757,6 +773,80 @@ class MechanismManager(stevedore.named.NamedExtensionManager):
                        'vnic_type': binding.vnic_type,
                        'segments': context.network.network_segments})
 
+    def _get_binding_cache_key(self, context, segments):
+        if not (cfg.CONF.ml2.agent_cache_ttl and
+                cfg.CONF.ml2.binding_cache_size):
+            return
+        binding = context._binding
+        return (binding.vnic_type, context.current.get('device_owner'),
+                binding.profile,
+                tuple(segment[api.ID] for segment in segments))
+
+    def _bind_port_from_cache(self, context, cache_key, segments):
+        if not cache_key:
+            return False
+        cached = self._binding_results.get(context.host, {}).get(cache_key)
+        if not cached or cached[0] < time.time():
+            BINDING_STATS.increment('cache_misses')
+            return False
+        (driver_name, segment_id, vif_type, vif_details,
+         status) = cached[1]
+        context._prepare_to_bind(segments)
+        context.set_binding(segment_id, vif_type, vif_details, status)
+        context._push_binding_level(
+            models.PortBindingLevel(port_id=context.current['id'],
+                                    host=context.host,
+                                    level=0,
+                                    driver=driver_name,
+                                    segment_id=segment_id))
+        BINDING_STATS.increment('cache_hits')
+        LOG.debug("Bound port %(port)s on host %(host)s as a previous "
+                  "port with driver %(driver)s and segment %(segment)s",
+                  {'port': context.current['id'], 'host': context.host,
+                   'driver': driver_name, 'segment': segment_id})
+        return True
+
+    def _cache_binding_result(self, context, cache_key):
+        """Remember the result of a binding its driver allows to reuse.
+
+        Only the bindings done at a single level by a driver whose
+        cache_binding_results attribute is True are cached: the mechanism
+        drivers are otherwise free to bind a port according to anything
+        else, like its ID, and their results can't be reused.
+        """
+        if not cache_key or len(context._binding_levels) != 1:
+            return
+        level = context._binding_levels[0]
+        driver = self.mech_drivers.get(level.driver)
+        if not getattr(driver and driver.obj, 'cache_binding_results',
+                       False):
+            return
+        results = self._binding_results.setdefault(context.host, {})
+        if (cache_key not in results and
+                len(results) >= cfg.CONF.ml2.binding_cache_size):
+            results.clear()
+        binding = context._binding
+        results[cache_key] = (
+            time.time() + cfg.CONF.ml2.agent_cache_ttl,
+            (level.driver, level.segment_id, binding.vif_type,
+             jsonutils.loads(binding.vif_details),
+             context._new_port_status))
+
+    def invalidate_binding_results(self, host):
+        """Forget the results of the bindings done on host."""
+        self._binding_results.pop(host, None)
+
+    def get_binding_stats(self):
+        """Return the binding durations and the binding cache usage."""
+        duration = BINDING_STATS.get_histogram('bind_port')
+        return {'bind_port': duration.to_dict() if duration else None,
+                'cache_hits': BINDING_STATS.get_counter('cache_hits'),
+                'cache_misses': BINDING_STATS.get_counter('cache_misses'),
+                'agent_cache_hits': BINDING_STATS.get_counter(
+                    'agent_cache_hits'),
+                'agent_cache_misses': BINDING_STATS.get_counter(
+                    'agent_cache_misses')}
+
     def _bind_port_level(self, context, level, segments_to_bind):
         binding = context._binding
         port_id = context.current['id']
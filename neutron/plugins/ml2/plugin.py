@@ -13,6 +13,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import copy
+import time
+
 from eventlet import greenthread
 from neutron_lib.agent import topics
 from neutron_lib.api.definitions import allowedaddresspairs as addr_apidef
@@ -67,6 +70,7 @@ from neutron.api.rpc.handlers import securitygroups_rpc
 from neutron.common import constants as n_const
 from neutron.common import exceptions as n_exc
 from neutron.common import rpc as n_rpc
+from neutron.common import stats
 from neutron.common import utils
 from neutron.db import _model_query as model_query
 from neutron.db import _resource_extend as resource_extend
@@ -105,6 +109,10 @@ from neutron.services.segments import plugin as segments_plugin
 
 LOG = log.getLogger(__name__)
 
+# Port status updates applied by update_port_statuses and the transactions
+# they took
+PORT_STATUS_STATS = stats.Stats()
+
 MAX_BIND_TRIES = 10
 
 
@@ -203,6 +211,8 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
         security_group=sg_models.SecurityGroup,
         security_group_rule=sg_models.SecurityGroupRule)
     def __init__(self):
+        # Agents looked up to bind ports, keyed by host and agent type
+        self._host_agents = {}
         # First load drivers, then initialize DB, then initialize drivers
         self.type_manager = managers.TypeManager()
         self.extension_manager = managers.ExtensionManager()
@@ -248,10 +258,48 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
                         driver=extension_driver, service_plugin=service_plugin
                     )
 
+    def get_host_agents(self, context, agent_type, host):
+        """Return the agents of agent_type on host to bind a port.
+
+        The agents are cached for agent_cache_ttl seconds, or until the
+        worker receives a report or an update of an agent of the host.
+        """
+        ttl = cfg.CONF.ml2.agent_cache_ttl
+        cached = self._host_agents.get(host, {}).get(agent_type)
+        if ttl and cached and cached[0] >= time.time():
+            managers.BINDING_STATS.increment('agent_cache_hits')
+            return copy.deepcopy(cached[1])
+        agents = self.get_agents(context,
+                                 filters={'agent_type': [agent_type],
+                                          'host': [host]})
+        if ttl:
+            managers.BINDING_STATS.increment('agent_cache_misses')
+            self._host_agents.setdefault(host, {})[agent_type] = (
+                time.time() + ttl, copy.deepcopy(agents))
+        return agents
+
+    def _invalidate_host_agents(self, host):
+        self._host_agents.pop(host, None)
+        self.mechanism_manager.invalidate_binding_results(host)
+
+    @registry.receives(resources.AGENT, [events.AFTER_CREATE,
+                                         events.AFTER_UPDATE,
+                                         events.BEFORE_DELETE])
+    def _agent_changed(self, resource, event, trigger, agent, **kwargs):
+        self._invalidate_host_agents(agent['host'])
+
+    def update_agent(self, context, id, agent):
+        agent = super(Ml2Plugin, self).update_agent(context, id, agent)
+        self._invalidate_host_agents(agent['host'])
+        return agent
+
     @registry.receives(resources.PORT,
                        [provisioning_blocks.PROVISIONING_COMPLETE])
     def _port_provisioned(self, rtype, event, trigger, context, object_id,
                           **kwargs):
+        if kwargs.get('bulk'):
+            # already handled with the other ports by _ports_provisioned
+            return
         port_id = object_id
         port = db.get_port(context, port_id)
         port_binding = p_utils.get_port_binding_by_status_and_host(
@@ -283,6 +331,44 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
             return
         self.update_port_status(context, port_id, const.PORT_STATUS_ACTIVE)
 
+    @registry.receives(resources.PORT,
+                       [provisioning_blocks.PROVISIONING_COMPLETE_BULK])
+    def _ports_provisioned(self, rtype, event, trigger, context, object_ids,
+                           **kwargs):
+        """Set the ports provisioned together to ACTIVE in bulk.
+
+        Same checks as _port_provisioned, with one query for the ports and
+        one for their provisioning blocks.
+        """
+        with db_api.context_manager.reader.using(context):
+            ports = db.get_port_db_objects(context, object_ids)
+        blocked = provisioning_blocks.get_blocked_object_ids(
+            context, object_ids, resources.PORT)
+        port_id_to_status = {}
+        for port_id in object_ids:
+            port = ports.get(port_id)
+            port_binding = (
+                port and p_utils.get_port_binding_by_status_and_host(
+                    getattr(port, 'port_bindings', []), const.ACTIVE))
+            if not port or not port_binding:
+                LOG.debug("Port %s was deleted so its status cannot be "
+                          "updated.", port_id)
+            elif port_binding.vif_type in (
+                    portbindings.VIF_TYPE_BINDING_FAILED,
+                    portbindings.VIF_TYPE_UNBOUND):
+                LOG.debug("Port %s cannot update to ACTIVE because it "
+                          "is not bound.", port_id)
+            elif port_id in blocked:
+                LOG.debug("Port %s had new provisioning blocks added so it "
+                          "will not transition to active.", port_id)
+            elif not port.admin_state_up:
+                LOG.debug("Port %s is administratively disabled so it will "
+                          "not transition to active.", port_id)
+            else:
+                port_id_to_status[port_id] = const.PORT_STATUS_ACTIVE
+        if port_id_to_status:
+            self.update_port_statuses(context, port_id_to_status)
+
     @log_helpers.log_method_call
     def _start_rpc_notifiers(self):
         """Initialize RPC notifiers for agents."""
@@ -1762,33 +1848,138 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
         result = {}
         port_ids = port_id_to_status.keys()
         port_dbs_by_id = db.get_port_db_objects(context, port_ids)
+        PORT_STATUS_STATS.increment('queries')
+        bulk_ports = []
         for port_id, status in port_id_to_status.items():
-            if not port_dbs_by_id.get(port_id):
+            port = port_dbs_by_id.get(port_id)
+            if not port:
                 LOG.debug("Port %(port)s update to %(val)s by agent not found",
                           {'port': port_id, 'val': status})
                 result[port_id] = None
-                continue
-            result[port_id] = self._safe_update_individual_port_db_status(
-                context, port_dbs_by_id[port_id], status, host)
+            elif port['device_owner'] == const.DEVICE_OWNER_DVR_INTERFACE:
+                # NOTE: DVR ports have a status per host binding that has to
+                # be aggregated, leave them to the individual update
+                result[port_id] = self._safe_update_individual_port_db_status(
+                    context, port, status, host)
+                PORT_STATUS_STATS.increment('transactions')
+            elif port.status == status:
+                # nothing to write, no need for a transaction
+                result[port_id] = port_id
+                PORT_STATUS_STATS.increment('unchanged')
+            else:
+                bulk_ports.append(port)
+        if len(bulk_ports) > 1:
+            result.update(self._update_port_db_statuses(
+                context, bulk_ports, port_id_to_status, host))
+        else:
+            for port in bulk_ports:
+                result[port.id] = self._safe_update_individual_port_db_status(
+                    context, port, port_id_to_status[port.id], host)
+                PORT_STATUS_STATS.increment('transactions')
+        if len(port_id_to_status) > 1:
+            LOG.debug("Port status update stats: %s",
+                      PORT_STATUS_STATS.to_dict()['counters'])
         return result
 
+    def _update_port_db_statuses(self, context, ports, port_id_to_status,
+                                 host):
+        """Update the status of several non DVR ports in one transaction.
+
+        The ports are updated as _update_individual_port_db_status would do,
+        sharing the transaction and the flush. If that transaction fails,
+        e.g. because one of the ports was concurrently deleted, each port is
+        updated again on its own.
+        """
+        for port in ports:
+            attr = {
+                'id': port.id,
+                portbindings.HOST_ID: host,
+                'status': port_id_to_status[port.id]
+            }
+            registry.notify(resources.PORT, events.BEFORE_UPDATE, self,
+                            original_port=port,
+                            context=context, port=attr)
+        port_ids = [port.id for port in ports]
+        mech_contexts = []
+        try:
+            with db_api.context_manager.writer.using(context):
+                original_ports = []
+                for port in ports:
+                    context.session.add(port)  # bring port into writer session
+                    original_ports.append(self._make_port_dict(port))
+                    port.status = port_id_to_status[port.id]
+                # explicit flush before _make_port_dict to ensure extensions
+                # listening for db events can modify the ports if necessary
+                context.session.flush()
+                for port, original_port in zip(ports, original_ports):
+                    updated_port = self._make_port_dict(port)
+                    binding = p_utils.get_port_binding_by_status_and_host(
+                        port.port_bindings, const.ACTIVE,
+                        raise_if_not_found=True, port_id=port.id)
+                    levels = db.get_binding_levels(context, port.id,
+                                                   binding.host)
+                    mech_context = driver_context.PortContext(
+                        self, context, updated_port, None, binding, levels,
+                        original_port=original_port)
+                    self.mechanism_manager.update_port_precommit(mech_context)
+                    mech_contexts.append(mech_context)
+        except Exception:
+            LOG.debug("Failure updating the status of %d ports at once, "
+                      "updating them one by one", len(ports), exc_info=True)
+            PORT_STATUS_STATS.increment('bulk_failures')
+            result = {}
+            port_dbs_by_id = db.get_port_db_objects(context, port_ids)
+            for port_id, port in port_dbs_by_id.items():
+                if not port:
+                    result[port_id] = None
+                    continue
+                # BEFORE_UPDATE was already sent for the port
+                result[port_id] = self._safe_update_individual_port_db_status(
+                    context, port, port_id_to_status[port_id], host,
+                    notify_before_update=False)
+                PORT_STATUS_STATS.increment('transactions')
+            return result
+        PORT_STATUS_STATS.increment('transactions')
+        PORT_STATUS_STATS.increment('bulk_updates', len(ports))
+
+        for mech_context in mech_contexts:
+            # NOTE: the statuses are committed, a failure of one port must
+            # not prevent the postcommit and notifications of the others
+            try:
+                self.mechanism_manager.update_port_postcommit(mech_context)
+                kwargs = {'context': context, 'port': mech_context.current,
+                          'original_port': mech_context.original}
+                if mech_context.current['status'] == const.PORT_STATUS_ACTIVE:
+                    # NOTE: see _update_individual_port_db_status
+                    kwargs['update_device_up'] = True
+                registry.notify(resources.PORT, events.AFTER_UPDATE, self,
+                                **kwargs)
+            except Exception:
+                LOG.exception("Failure completing the status update of "
+                              "port %s", mech_context.current['id'])
+        return {port_id: port_id for port_id in port_ids}
+
     def _safe_update_individual_port_db_status(self, context, port,
-                                               status, host):
+                                               status, host,
+                                               notify_before_update=True):
         port_id = port.id
         try:
             return self._update_individual_port_db_status(
-                context, port, status, host)
+                context, port, status, host,
+                notify_before_update=notify_before_update)
         except Exception:
             with excutils.save_and_reraise_exception() as ectx:
                 # don't reraise if port doesn't exist anymore
                 ectx.reraise = bool(db.get_port(context, port_id))
 
-    def _update_individual_port_db_status(self, context, port, status, host):
+    def _update_individual_port_db_status(self, context, port, status, host,
+                                          notify_before_update=True):
         updated = False
         network = None
         port_id = port.id
-        if ((port.status != status and
-                port['device_owner'] != const.DEVICE_OWNER_DVR_INTERFACE) or
+        if notify_before_update and (
+                (port.status != status and
+                 port['device_owner'] != const.DEVICE_OWNER_DVR_INTERFACE) or
                 port['device_owner'] == const.DEVICE_OWNER_DVR_INTERFACE):
             attr = {
                 'id': port.id,
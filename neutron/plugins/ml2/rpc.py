@@ -13,6 +13,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+
 from neutron_lib.agent import topics
 from neutron_lib.api.definitions import port_security as psec
 from neutron_lib.api.definitions import portbindings
@@ -52,7 +54,8 @@ class RpcCallbacks(type_tunnel.TunnelRpcCallbackMixin):
     #   1.4 tunnel_sync rpc signature upgrade to obtain 'host'
     #   1.5 Support update_device_list and
     #       get_devices_details_list_and_failed_devices
-    target = oslo_messaging.Target(version='1.5')
+    #   1.6 tunnel_sync accepts and returns the generation of the tunnels
+    target = oslo_messaging.Target(version='1.6')
 
     def __init__(self, notifier, type_manager):
         self.setup_tunnel_callback_mixin(notifier, type_manager)
@@ -275,11 +278,20 @@ class RpcCallbacks(type_tunnel.TunnelRpcCallbackMixin):
                     plugin.nova_notifier.notify_port_active_direct(port)
                     return
         else:
-            self.update_port_status_to_active(port, rpc_context, port_id, host)
+            self.update_port_status_to_active(
+                port, rpc_context, port_id, host,
+                pending_provisioning=kwargs.get('pending_provisioning'))
         self.notify_l2pop_port_wiring(port_id, rpc_context,
                                       n_const.PORT_STATUS_ACTIVE, host)
 
-    def update_port_status_to_active(self, port, rpc_context, port_id, host):
+    def update_port_status_to_active(self, port, rpc_context, port_id, host,
+                                     pending_provisioning=None):
+        """Complete the L2 provisioning of a port bound to host.
+
+        If pending_provisioning is a list, the ID of a port that is not DVR
+        is appended to it instead, for the caller to complete the
+        provisioning of several ports at once.
+        """
         plugin = directory.get_plugin()
         if port and port['device_owner'] == n_const.DEVICE_OWNER_DVR_INTERFACE:
             # NOTE(kevinbenton): we have to special case DVR ports because of
@@ -296,6 +308,9 @@ class RpcCallbacks(type_tunnel.TunnelRpcCallbackMixin):
             if not port:
                 # port doesn't exist, no need to add a provisioning block
                 return
+            if pending_provisioning is not None:
+                pending_provisioning.append(port['id'])
+                return
             provisioning_blocks.provisioning_complete(
                 rpc_context, port['id'], resources.PORT,
                 provisioning_blocks.L2_AGENT_ENTITY)
@@ -345,6 +360,33 @@ class RpcCallbacks(type_tunnel.TunnelRpcCallbackMixin):
         else:
             l2pop_driver.obj.update_port_down(port_context)
 
+    def _complete_l2_provisioning(self, rpc_context, port_devices):
+        """Complete the L2 provisioning of ports in bulk.
+
+        :param port_devices: the devices, keyed by the ID of their port
+        :return: the devices whose provisioning could not be completed
+        """
+        if not port_devices:
+            return []
+        try:
+            provisioning_blocks.provisioning_complete_bulk(
+                rpc_context, list(port_devices), resources.PORT,
+                provisioning_blocks.L2_AGENT_ENTITY)
+            return []
+        except Exception:
+            LOG.exception("Failure completing the provisioning of %d ports, "
+                          "retrying them one by one", len(port_devices))
+        failed_devices = []
+        for port_id, device in port_devices.items():
+            try:
+                provisioning_blocks.provisioning_complete(
+                    rpc_context, port_id, resources.PORT,
+                    provisioning_blocks.L2_AGENT_ENTITY)
+            except Exception:
+                failed_devices.append(device)
+                LOG.error("Failed to update device %s up", device)
+        return failed_devices
+
     def update_device_list(self, rpc_context, **kwargs):
         devices_up = []
         failed_devices_up = []
@@ -352,17 +394,39 @@ class RpcCallbacks(type_tunnel.TunnelRpcCallbackMixin):
         failed_devices_down = []
         devices = kwargs.get('devices_up')
         if devices:
+            # NOTE: the L2 provisioning of the ports brought up is completed
+            # once for all of them, after all the devices were processed.
+            # The l2pop driver needs the port to be ACTIVE when it is wired
+            # to count the active ports of its agent on the network and
+            # send the whole FDB to the agent of the first one, so the
+            # devices are still provisioned one by one when it is enabled.
+            plugin = directory.get_plugin()
+            if 'l2population' in plugin.mechanism_manager.mech_drivers:
+                pending_provisioning = None
+            else:
+                pending_provisioning = []
+            pending_devices = collections.OrderedDict()
             for device in devices:
                 try:
                     self.update_device_up(
                         rpc_context,
                         device=device,
+                        pending_provisioning=pending_provisioning,
                         **kwargs)
                 except Exception:
                     failed_devices_up.append(device)
                     LOG.error("Failed to update device %s up", device)
                 else:
                     devices_up.append(device)
+                if pending_provisioning:
+                    for port_id in pending_provisioning:
+                        pending_devices[port_id] = device
+                    del pending_provisioning[:]
+            for device in self._complete_l2_provisioning(rpc_context,
+                                                         pending_devices):
+                if device in devices_up:
+                    devices_up.remove(device)
+                    failed_devices_up.append(device)
 
         devices = kwargs.get('devices_down')
         if devices:
@@ -347,6 +347,44 @@ def delete_neigh_entry(ip_version, ip_address, mac_address, device, namespace,
         raise
 
 
+@privileged.default.entrypoint
+def update_neigh_entries(entries, device, namespace):
+    """Add and delete several neighbour entries of a device.
+
+    The device is looked up once and all the changes are sent over the same
+    netlink socket, instead of one privileged call per entry.
+
+    :param entries: a list of (operation, ip_version, ip_address,
+                    mac_address), where operation is 'add' or 'delete'
+    :param device: Device name to use in updating entries
+    :param namespace: The name of the namespace in which to update entries
+    """
+    try:
+        with _get_iproute(namespace) as ip:
+            idx = _get_link_id(device, namespace)
+            for operation, ip_version, ip_address, mac_address in entries:
+                family = _IP_VERSION_FAMILY_MAP[ip_version]
+                if operation == 'add':
+                    ip.neigh('replace', ifindex=idx, dst=ip_address,
+                             lladdr=mac_address, family=family,
+                             state=ndmsg.states['permanent'])
+                    continue
+                try:
+                    ip.neigh('delete', ifindex=idx, dst=ip_address,
+                             lladdr=mac_address, family=family)
+                except NetlinkError as e:
+                    # trying to delete a non-existent entry shouldn't raise
+                    # an error
+                    if e.code != errno.ENOENT:
+                        raise
+    except NetlinkError as e:
+        _translate_ip_device_exception(e, device, namespace)
+    except OSError as e:
+        if e.errno == errno.ENOENT:
+            raise NetworkNamespaceNotFound(netns_name=namespace)
+        raise
+
+
 @privileged.default.entrypoint
 def dump_neigh_entries(ip_version, device, namespace, **kwargs):
     """Dump all neighbour entries.
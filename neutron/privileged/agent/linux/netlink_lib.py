@@ -38,7 +38,9 @@
 import ctypes
 from ctypes import util
 import re
+import time
 
+import netaddr
 from neutron_lib import constants
 from oslo_log import log as logging
 
@@ -94,6 +96,8 @@ NFCT_CALLBACK = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_int,
 class ConntrackManager(object):
     def __init__(self, family_socket=None):
         self.family_socket = family_socket
+        # number of entries dumped by the last list_entries call
+        self.dumped_entries = 0
         self.set_functions = {
             'src': {4: nfct.nfct_set_attr,
                     6: nfct.nfct_set_attr},
@@ -129,12 +133,22 @@ class ConntrackManager(object):
                            'zone': int
                            }
 
-    def list_entries(self):
+    def list_entries(self, zones=None):
+        """Dump the conntrack entries of the address family of the manager.
+
+        The kernel only dumps the entries of that family. The entries of the
+        zones not in zones, if given, are skipped before being formatted.
+        """
         entries = []
         raw_entry = ctypes.create_string_buffer(nl_constants.BUFFER)
+        self.dumped_entries = 0
 
         @NFCT_CALLBACK
         def callback(type_, conntrack, data):
+            self.dumped_entries += 1
+            if (zones is not None and nfct.nfct_get_attr_u16(
+                    conntrack, nl_constants.ATTR_ZONE) not in zones):
+                return nl_constants.NFCT_CB_CONTINUE
             nfct.nfct_snprintf(raw_entry, nl_constants.BUFFER,
                                conntrack, type_,
                                nl_constants.NFCT_O_PLAIN,
@@ -273,3 +287,103 @@ def delete_entries(entries):
 
     with ConntrackManager() as conntrack:
         conntrack.delete_entries(entry_args)
+
+
+def _parse_entry_attributes(raw_entry, ipversion):
+    """Parse entry from text to the attributes needed to delete it
+
+    :param raw_entry: raw conntrack entry
+    :param ipversion: ip version 4 or 6
+    :return: dict of the attributes of the original direction of the entry,
+        in the format expected by ConntrackManager.delete_entries, or None
+        if the protocol of the entry is not supported
+    example: {'ipversion': 4, 'protocol': 'tcp', 'sport': 1, 'dport': 2,
+              'src': '1.1.1.1', 'dst': '2.2.2.2', 'zone': 1}
+    """
+    fields = raw_entry.split()
+    protocol = fields[1]
+    if protocol not in ATTR_POSITIONS:
+        return
+    values = {}
+    for field in fields[2:]:
+        key, sep, value = field.partition('=')
+        # the attributes of the reply direction follow the original ones
+        if sep and key not in values:
+            values[key] = value
+    entry = {'ipversion': ipversion, 'protocol': protocol}
+    for attr, _position in ATTR_POSITIONS[protocol]:
+        value = values.get(attr, 0)
+        try:
+            entry[attr] = int(value)
+        except ValueError:
+            entry[attr] = value
+    return entry
+
+
+def _entry_matches(entry, conntrack_filter):
+    for attr, value in conntrack_filter.items():
+        if attr in ('src', 'dst'):
+            if netaddr.IPAddress(entry[attr]) not in value:
+                return False
+        elif entry[attr] != value:
+            return False
+    return True
+
+
+@privileged.default.entrypoint
+def delete_entries_by_filters(filters):
+    """Delete all the conntrack entries matching any of the filters
+
+    The entries of each IP version used by the filters are dumped once and
+    the matching ones are deleted with a single conntrack handler, so a
+    whole batch of filters only needs one call.
+
+    The kernel still walks the whole conntrack table of the IP version, as
+    each conntrack -D command deleting the entries of a zone did, but only
+    the entries of the zones of the filters are formatted and parsed here.
+    The number of entries dumped and the duration of each call are logged.
+
+    :param filters: list of dicts with the 'ipversion' of the entries to
+        delete and optionally their 'protocol', 'zone' and the 'src' and
+        'dst' IP addresses or CIDRs of their original direction
+    example: [{'ipversion': 4, 'protocol': 'tcp', 'zone': 1,
+               'dst': '1.1.1.1', 'src': '2.2.2.0/24'}]
+    :return: number of entries deleted
+    """
+    filters_by_version = {}
+    for conntrack_filter in filters:
+        conntrack_filter = dict(conntrack_filter)
+        for attr in ('src', 'dst'):
+            if attr in conntrack_filter:
+                conntrack_filter[attr] = netaddr.IPNetwork(
+                    conntrack_filter[attr])
+        filters_by_version.setdefault(
+            conntrack_filter['ipversion'], []).append(conntrack_filter)
+
+    start = time.time()
+    dumped = 0
+    entries = []
+    for ipversion, version_filters in filters_by_version.items():
+        zones = {conntrack_filter.get('zone') for conntrack_filter in
+                 version_filters}
+        if None in zones:
+            # a filter matches the entries of all the zones
+            zones = None
+        with ConntrackManager(nl_constants.IPVERSION_SOCKET[ipversion]) \
+                as conntrack:
+            raw_entries = conntrack.list_entries(zones=zones)
+            dumped += conntrack.dumped_entries
+        for raw_entry in raw_entries:
+            entry = _parse_entry_attributes(raw_entry, ipversion)
+            if entry and any(_entry_matches(entry, conntrack_filter)
+                             for conntrack_filter in version_filters):
+                entries.append(entry)
+
+    if entries:
+        with ConntrackManager() as conntrack:
+            conntrack.delete_entries(entries)
+    LOG.debug("Deleted %(deleted)d of the %(dumped)d conntrack entries "
+              "dumped for %(filters)d filters in %(duration).3fs",
+              {'deleted': len(entries), 'dumped': dumped,
+               'filters': len(filters), 'duration': time.time() - start})
+    return len(entries)
@@ -64,14 +64,21 @@ class AutoScheduler(object):
 
             segments_on_host = {s.segment_id for s in segment_host_mapping}
 
+            # the agents hosting each network and the AZ hints of the
+            # networks, loaded at once instead of for each network
+            hosting_agents = None
+            az_hints = {}
             for dhcp_agent in dhcp_agents:
                 if agent_utils.is_agent_down(
                     dhcp_agent.heartbeat_timestamp):
                     LOG.warning('DHCP agent %s is not active', dhcp_agent.id)
                     continue
+                if hosting_agents is None:
+                    hosting_agents = plugin.get_dhcp_agents_per_network(
+                        context)
+                candidate_net_ids = []
                 for net_id, is_routed_network in net_ids.items():
-                    agents = plugin.get_dhcp_agents_hosting_networks(
-                        context, [net_id])
+                    agents = hosting_agents.get(net_id, [])
                     segments_on_network = net_segment_ids[net_id]
                     if is_routed_network:
                         if len(segments_on_network & segments_on_host) == 0:
@@ -81,11 +88,21 @@ class AutoScheduler(object):
                             continue
                     if any(dhcp_agent.id == agent.id for agent in agents):
                         continue
-                    net = plugin.get_network(context, net_id)
-                    az_hints = (net.get(az_def.AZ_HINTS) or
-                                cfg.CONF.default_availability_zones)
-                    if (az_hints and
-                            dhcp_agent['availability_zone'] not in az_hints):
+                    candidate_net_ids.append(net_id)
+                missing_net_ids = [net_id for net_id in candidate_net_ids
+                                   if net_id not in az_hints]
+                if missing_net_ids:
+                    az_hints.update(self._get_networks_az_hints(
+                        plugin, context, missing_net_ids))
+                for net_id in candidate_net_ids:
+                    if net_id not in az_hints:
+                        # the network was deleted meanwhile
+                        continue
+                    net_az_hints = (az_hints[net_id] or
+                                    cfg.CONF.default_availability_zones)
+                    if (net_az_hints and
+                            dhcp_agent['availability_zone'] not in
+                            net_az_hints):
                         continue
                     bindings_to_add.append((dhcp_agent, net_id))
         # do it outside transaction so particular scheduling results don't
@@ -94,6 +111,13 @@ class AutoScheduler(object):
             self.resource_filter.bind(context, [agent], net_id)
         return True
 
+    @staticmethod
+    def _get_networks_az_hints(plugin, context, network_ids):
+        networks = plugin.get_networks(
+            context, filters={'id': network_ids},
+            fields=['id', az_def.AZ_HINTS])
+        return {net['id']: net.get(az_def.AZ_HINTS) for net in networks}
+
 
 class ChanceScheduler(base_scheduler.BaseChanceScheduler, AutoScheduler):
 
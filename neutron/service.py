@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import gc
 import inspect
 import os
 import random
@@ -37,6 +38,7 @@ from neutron.common import profiler
 from neutron.common import rpc as n_rpc
 from neutron.conf import service
 from neutron.db import api as session
+from neutron import policy
 from neutron import wsgi
 
 
@@ -218,6 +220,21 @@ class AllServicesNeutronWorker(neutron_worker.BaseWorker):
         self._launcher.restart()
 
 
+def _prepare_shared_state():
+    """Build the state shared by all the workers before they are forked."""
+    if not cfg.CONF.prefork_shared_state:
+        return
+    # NOTE: the plugins, drivers and extensions are already loaded at this
+    # point, load the policy rules too instead of doing it in every worker.
+    policy.init()
+    # NOTE: the garbage collector writes into the header of every object it
+    # tracks, which copies the page holding it in the child process. Freezing
+    # moves everything allocated so far into a generation it never scans.
+    if hasattr(gc, 'freeze'):
+        gc.collect()
+        gc.freeze()
+
+
 def _start_workers(workers):
     process_workers = [
         plugin_worker for plugin_worker in workers
@@ -245,6 +262,7 @@ def _start_workers(workers):
             # be shared DB connections in child processes which may cause
             # DB errors.
             session.context_manager.dispose_pool()
+            _prepare_shared_state()
 
             for worker in process_workers:
                 worker_launcher.launch_service(worker,
@@ -297,6 +315,7 @@ def _run_wsgi(app_name):
 
 def run_wsgi_app(app):
     server = wsgi.Server("Neutron")
+    _prepare_shared_state()
     server.start(app, cfg.CONF.bind_port, cfg.CONF.bind_host,
                  workers=_get_api_workers())
     LOG.info("Neutron service started, listening on %(host)s:%(port)s",
@@ -90,6 +90,7 @@ class MeteringAgent(MeteringPluginRpc, manager.Manager):
                                                                 self.conf)
 
     def _metering_notification(self):
+        notifier = n_rpc.get_notifier('metering')
         for label_id, info in self.metering_infos.items():
             data = {'label_id': label_id,
                     'tenant_id': self.label_tenant_id.get(label_id),
@@ -101,7 +102,6 @@ class MeteringAgent(MeteringPluginRpc, manager.Manager):
                     'host': self.host}
 
             LOG.debug("Send metering report: %s", data)
-            notifier = n_rpc.get_notifier('metering')
             notifier.info(self.context, 'l3.meter', data)
             info['pkts'] = 0
             info['bytes'] = 0
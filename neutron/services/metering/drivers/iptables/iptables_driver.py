@@ -97,6 +97,8 @@ class RouterWithMetering(object):
                 state_less=True,
                 use_ipv6=ipv6_utils.is_enabled_and_bind_by_default())
         self.metering_labels = {}
+        # Last counters read from each label chain, which are not zeroed
+        self.traffic_counters = {}
 
 
 class IptablesMeteringDriver(abstract_driver.MeteringAbstractDriver):
@@ -392,6 +394,56 @@ class IptablesMeteringDriver(abstract_driver.MeteringAbstractDriver):
         for router in routers:
             self._process_disassociate_metering_label(router)
 
+    @staticmethod
+    def _get_label_chain_name(label_id):
+        return iptables_manager.get_chain_name(WRAP_NAME + LABEL + label_id,
+                                               wrap=False)
+
+    def _get_router_traffic_counters(self, rm):
+        """Return the traffic counted by each label since the last call.
+
+        The counters of the chains already known are read in one pass per
+        table and the traffic is computed from their previous values.
+        New chains are read and zeroed one by one, as every chain used to
+        be: the traffic they counted until then is reported and the next
+        calls count from zero.
+        """
+        chains = {self._get_label_chain_name(label_id): label_id
+                  for label_id in rm.metering_labels}
+        known_chains = [chain for chain in chains
+                        if chain in rm.traffic_counters]
+        new_chains = set(chains) - set(known_chains)
+        chain_accs = rm.iptables_manager.get_traffic_counters_by_chain(
+            known_chains, wrap=False) if known_chains else {}
+        for chain in new_chains:
+            chain_accs[chain] = rm.iptables_manager.get_traffic_counters(
+                chain, wrap=False, zero=True)
+
+        accs = {}
+        for chain, label_id in chains.items():
+            chain_acc = chain_accs.get(chain)
+            if not chain_acc:
+                rm.traffic_counters.pop(chain, None)
+                continue
+            if chain in new_chains:
+                # the chain has just been zeroed, count from there
+                rm.traffic_counters[chain] = {'pkts': 0, 'bytes': 0}
+                accs[label_id] = chain_acc
+                continue
+            last_acc = rm.traffic_counters[chain]
+            if (chain_acc['pkts'] < last_acc['pkts'] or
+                    chain_acc['bytes'] < last_acc['bytes']):
+                # the counters have been reset
+                last_acc = {'pkts': 0, 'bytes': 0}
+            accs[label_id] = {
+                'pkts': chain_acc['pkts'] - last_acc['pkts'],
+                'bytes': chain_acc['bytes'] - last_acc['bytes']}
+            rm.traffic_counters[chain] = chain_acc
+
+        for chain in set(rm.traffic_counters) - set(chains):
+            del rm.traffic_counters[chain]
+        return accs
+
     @log_helpers.log_method_call
     def get_traffic_counters(self, context, routers):
         accs = {}
@@ -401,24 +453,15 @@ class IptablesMeteringDriver(abstract_driver.MeteringAbstractDriver):
             if not rm:
                 continue
 
-            for label_id in rm.metering_labels:
-                try:
-                    chain = iptables_manager.get_chain_name(WRAP_NAME +
-                                                            LABEL +
-                                                            label_id,
-                                                            wrap=False)
-
-                    chain_acc = rm.iptables_manager.get_traffic_counters(
-                        chain, wrap=False, zero=True)
-                except RuntimeError:
-                    LOG.exception('Failed to get traffic counters, '
-                                  'router: %s', router)
-                    routers_to_reconfigure.add(router['id'])
-                    continue
-
-                if not chain_acc:
-                    continue
+            try:
+                router_accs = self._get_router_traffic_counters(rm)
+            except RuntimeError:
+                LOG.exception('Failed to get traffic counters, '
+                              'router: %s', router)
+                routers_to_reconfigure.add(router['id'])
+                continue
 
+            for label_id, chain_acc in router_accs.items():
                 acc = accs.get(label_id, {'pkts': 0, 'bytes': 0})
 
                 acc['pkts'] += chain_acc['pkts']
@@ -11,20 +11,28 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+import threading
+
 from neutron_lib.db import api as db_api
 from neutron_lib.services import base as service_base
 from oslo_log import log as logging
 import sqlalchemy
+from sqlalchemy import engine
 from sqlalchemy.orm import exc
 from sqlalchemy.orm import session as se
 import webob.exc
 
 from neutron._i18n import _
+from neutron.common import stats
 from neutron.db import _resource_extend as resource_extend
 from neutron.db import standard_attr
 
 LOG = logging.getLogger(__name__)
 
+# session.info key of the revision bump counters of the request
+REQUEST_STATS_KEY = 'revision_bump_stats'
+
 
 @resource_extend.has_resource_extenders
 class RevisionPlugin(service_base.ServicePluginBase):
@@ -37,7 +45,13 @@ class RevisionPlugin(service_base.ServicePluginBase):
 
     def __init__(self):
         super(RevisionPlugin, self).__init__()
+        self.stats = stats.Stats()
+        # the session whose related objects are being walked by the current
+        # (green) thread, if any
+        self._walking = threading.local()
         db_api.sqla_listen(se.Session, 'before_flush', self.bump_revisions)
+        db_api.sqla_listen(engine.Engine, 'before_cursor_execute',
+                           self._count_statement)
         db_api.sqla_listen(se.Session, 'after_commit',
                            self._clear_rev_bumped_flags)
         db_api.sqla_listen(se.Session, 'after_rollback',
@@ -56,10 +70,31 @@ class RevisionPlugin(service_base.ServicePluginBase):
             o for o in session.deleted | session.dirty | session.new
             if getattr(o, 'revises_on_change', ())
         ]
-        for obj in objects_with_related_revisions:
-            self._bump_related_revisions(session, obj)
-
-    def _bump_related_revisions(self, session, obj):
+        if not objects_with_related_revisions:
+            return
+        # the objects whose related revisions were bumped during this flush,
+        # e.g. the port shared by all the fixed IPs and bindings updated
+        walked = set()
+        self._walking.session = session
+        try:
+            for obj in objects_with_related_revisions:
+                self._bump_related_revisions(session, obj, walked)
+        finally:
+            self._walking.session = None
+        LOG.debug("Revision bumps of the request: %s",
+                  self.get_request_stats(session))
+
+    def _count_statement(self, *args):
+        """Count the SQL statements issued to walk the related objects."""
+        session = getattr(self._walking, 'session', None)
+        if session is not None:
+            self._count(session, 'queries')
+
+    def _bump_related_revisions(self, session, obj, walked=None):
+        if walked is not None:
+            if id(obj) in walked:
+                return
+            walked.add(id(obj))
         for revises_col in getattr(obj, 'revises_on_change', ()):
             try:
                 related_obj = self._find_related_obj(session, obj, revises_col)
@@ -69,7 +104,7 @@ class RevisionPlugin(service_base.ServicePluginBase):
                                 {'obj': obj, 'col': revises_col})
                     continue
                 # if related object revises others, bump those as well
-                self._bump_related_revisions(session, related_obj)
+                self._bump_related_revisions(session, related_obj, walked)
                 # no need to bump revisions on related objects being deleted
                 if related_obj not in session.deleted:
                     self._bump_obj_revision(session, related_obj)
@@ -95,6 +130,7 @@ class RevisionPlugin(service_base.ServicePluginBase):
         Raises a runtime error if the relationship isn't configured correctly
         for revision bumping.
         """
+        self._count(session, 'related_lookups')
         # first check to see if it's directly attached to the object already
         related_obj = getattr(obj, relationship_col)
         if related_obj:
@@ -108,6 +144,16 @@ class RevisionPlugin(service_base.ServicePluginBase):
                                      "bump parent revisions on create: %s"),
                                    relationship_col)
 
+    def _count(self, session, label):
+        self.stats.increment(label)
+        session.info.setdefault(REQUEST_STATS_KEY,
+                                collections.Counter())[label] += 1
+
+    @staticmethod
+    def get_request_stats(session):
+        """Return the revision bump counters of the session of a request."""
+        return dict(session.info.get(REQUEST_STATS_KEY, {}))
+
     def _clear_rev_bumped_flags(self, session):
         """This clears all flags on commit/rollback to enable rev bumps."""
         for inst in session:
@@ -128,6 +174,7 @@ class RevisionPlugin(service_base.ServicePluginBase):
             self._enforce_if_match_constraints(session)
         obj.bump_revision()
         setattr(obj, '_rev_bumped', True)
+        self._count(session, 'bumps')
 
     def _find_instance_by_column_value(self, session, model, column, value):
         """Lookup object in session or from DB based on a column's value."""
@@ -0,0 +1,82 @@
+# Copyright (c) 2018 OpenStack Foundation.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import time
+
+import mock
+import netaddr
+from neutron_lib import constants as lib_constants
+from oslo_log import log as logging
+from oslo_utils import uuidutils
+
+from neutron.agent.l3 import router_info
+from neutron.agent.linux import iptables_manager
+from neutron.tests.common import net_helpers
+from neutron.tests.functional import base
+
+LOG = logging.getLogger(__name__)
+
+
+class TestFloatingIpNatRules(base.BaseSudoTestCase):
+
+    def setUp(self):
+        super(TestFloatingIpNatRules, self).setUp()
+        namespace = self.useFixture(net_helpers.NamespaceFixture()).name
+        self.router = {lib_constants.FLOATINGIP_KEY: []}
+        self.ri = router_info.RouterInfo(
+            mock.Mock(), uuidutils.generate_uuid(), self.router,
+            mock.Mock(), mock.Mock())
+        self.ri.iptables_manager = iptables_manager.IptablesManager(
+            namespace=namespace)
+        self.fixed_ips = netaddr.IPNetwork('10.0.0.0/16').iter_hosts()
+        self.floating_ips = netaddr.IPNetwork('172.24.0.0/16').iter_hosts()
+
+    def _associate(self, count=1):
+        fips = self.router[lib_constants.FLOATINGIP_KEY]
+        for _i in range(count):
+            fips.append({'fixed_ip_address': str(next(self.fixed_ips)),
+                         'floating_ip_address': str(next(self.floating_ips))})
+        start = time.time()
+        self.ri.process_floating_ip_nat_rules()
+        return time.time() - start
+
+    def _get_fip_rules(self):
+        return [line for line in
+                self.ri.iptables_manager.get_rules_for_table('nat').split('\n')
+                if 'DNAT' in line or 'SNAT --to-source' in line]
+
+    def test_associate_and_disassociate(self):
+        self._associate(count=2)
+        self.assertEqual(6, len(self._get_fip_rules()))
+        fip = self.router[lib_constants.FLOATINGIP_KEY].pop(0)
+        self.ri.process_floating_ip_nat_rules()
+        rules = self._get_fip_rules()
+        self.assertEqual(3, len(rules))
+        self.assertFalse([rule for rule in rules
+                          if fip['floating_ip_address'] in rule])
+
+    def test_associate_latency_benchmark(self):
+        """Measure the latency of a FIP association against the FIP count."""
+        latencies = []
+        count = 0
+        for fip_count in (10, 100, 1000):
+            self._associate(fip_count - count)
+            count = fip_count
+            latencies.append((fip_count, self._associate()))
+            count += 1
+        self.assertEqual(3 * count, len(self._get_fip_rules()))
+        for fip_count, latency in latencies:
+            LOG.info("Associated a floating IP on a router with %(count)d "
+                     "floating IPs in %(latency).3fs",
+                     {'count': fip_count, 'latency': latency})
@@ -0,0 +1,106 @@
+# Copyright (c) 2018 OpenStack Foundation.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import time
+
+import mock
+from oslo_log import log as logging
+
+from neutron.agent.l3 import ha
+from neutron.common import utils as common_utils
+from neutron.tests.functional import base
+
+LOG = logging.getLogger(__name__)
+
+
+class _AgentBase(object):
+    def __init__(self, host):
+        pass
+
+
+class _HaAgent(ha.AgentMixin, _AgentBase):
+    """Only what is needed to report the HA routers states."""
+
+    def __init__(self, conf):
+        self.conf = conf
+        self.context = mock.sentinel.context
+        self.plugin_rpc = mock.Mock()
+        self.process_monitor = mock.Mock()
+        self.router_info = {}
+        super(_HaAgent, self).__init__('host')
+
+
+class TestHaStateReportBenchmark(base.BaseLoggingTestCase):
+
+    ROUTERS = 1000
+
+    def setUp(self):
+        super(TestHaStateReportBenchmark, self).setUp()
+        temp_dir = self.get_default_temp_dir().path
+        conf = mock.Mock(ha_confs_path=temp_dir, state_path=temp_dir,
+                         ha_vrrp_advert_int=0,
+                         ha_shared_state_change_monitor=False)
+        # The keepalived notifications server is not needed to queue states
+        with mock.patch.object(ha.eventlet, 'spawn'):
+            self.agent = _HaAgent(conf)
+        self.router_ids = ['router-%d' % i for i in range(self.ROUTERS)]
+
+    def _failover(self, states):
+        """Queue the states and return the time to report them."""
+        rpc = self.agent.plugin_rpc.update_ha_routers_states
+        start = time.time()
+        for router_id, state in states:
+            self.agent.state_change_notifier.queue_event((router_id, state))
+        common_utils.wait_until_true(
+            lambda: not self.agent.state_change_notifier.pending_events,
+            timeout=30)
+        # Let the notifier release its lock so the next failover is sent
+        # in a batch of its own
+        time.sleep(0.1)
+        duration = time.time() - start
+        reported = sum(len(call[0][1]) for call in rpc.call_args_list)
+        calls = rpc.call_count
+        rpc.reset_mock()
+        return duration, calls, reported
+
+    def test_failover_benchmark(self):
+        """Report the failover of 1k HA routers, flapping ones included."""
+        # Every router becomes master, flapping once on its way
+        states = []
+        for router_id in self.router_ids:
+            states += [(router_id, 'master'), (router_id, 'backup'),
+                       (router_id, 'master')]
+        duration, calls, reported = self._failover(states)
+        self.assertEqual(self.ROUTERS, reported)
+        LOG.info("Failover of %(routers)d routers (%(events)d events) "
+                 "reported in %(calls)d RPC calls in %(time).3fs",
+                 {'routers': self.ROUTERS, 'events': len(states),
+                  'calls': calls, 'time': duration})
+
+        # keepalived restarts and announces the same states again
+        duration, calls, reported = self._failover(
+            [(router_id, 'master') for router_id in self.router_ids])
+        self.assertEqual(0, reported)
+        LOG.info("Unchanged states of %(routers)d routers handled with "
+                 "%(calls)d RPC calls in %(time).3fs",
+                 {'routers': self.ROUTERS, 'calls': calls,
+                  'time': duration})
+
+        # Half of the routers fail over back to backup
+        duration, calls, reported = self._failover(
+            [(router_id, 'backup') for router_id in self.router_ids[::2]])
+        self.assertEqual(self.ROUTERS // 2, reported)
+        LOG.info("Failback of %(routers)d routers reported in %(calls)d "
+                 "RPC calls in %(time).3fs",
+                 {'routers': reported, 'calls': calls, 'time': duration})
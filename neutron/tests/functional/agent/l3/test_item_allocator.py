@@ -0,0 +1,66 @@
+# Copyright (c) 2018 OpenStack Foundation.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import time
+
+from oslo_log import log as logging
+
+from neutron.agent.l3 import fip_rule_priority_allocator as frpa
+from neutron.tests.functional import base
+
+LOG = logging.getLogger(__name__)
+
+
+class TestItemAllocatorJournal(base.BaseLoggingTestCase):
+
+    ALLOCATIONS = 50000
+
+    def setUp(self):
+        super(TestItemAllocatorJournal, self).setUp()
+        self.state_file = os.path.join(self.get_default_temp_dir().path,
+                                       'fip-priorities')
+
+    def _create_allocator(self):
+        return frpa.FipRulePriorityAllocator(
+            self.state_file, 32768, 32768 + self.ALLOCATIONS)
+
+    def test_allocations_benchmark(self):
+        """Allocate, release and recover 50k FIP rule priorities."""
+        allocator = self._create_allocator()
+        keys = ['fip-%d' % i for i in range(self.ALLOCATIONS)]
+
+        start = time.time()
+        for key in keys:
+            allocator.allocate(key)
+        allocate_time = time.time() - start
+
+        start = time.time()
+        for key in keys[::2]:
+            allocator.release(key)
+        release_time = time.time() - start
+
+        start = time.time()
+        recovered = self._create_allocator()
+        recover_time = time.time() - start
+
+        for key in keys[1::2]:
+            self.assertEqual(allocator.lookup(key), recovered.lookup(key))
+        for key in keys[::2]:
+            self.assertIsNone(recovered.lookup(key))
+        LOG.info("%(count)d allocations in %(allocate).3fs, %(released)d "
+                 "releases in %(release).3fs, recovered in %(recover).3fs",
+                 {'count': self.ALLOCATIONS, 'allocate': allocate_time,
+                  'released': len(keys[::2]), 'release': release_time,
+                  'recover': recover_time})
@@ -21,6 +21,8 @@ from neutron.agent.l3 import dvr_snat_ns
 from neutron.agent.l3 import namespace_manager
 from neutron.agent.l3 import namespaces
 from neutron.agent.linux import ip_lib
+from neutron.common import utils
+from neutron.conf.agent.l3 import config as l3_config
 from neutron.tests.functional import base
 
 _uuid = uuidutils.generate_uuid
@@ -30,6 +32,7 @@ class NamespaceManagerTestFramework(base.BaseSudoTestCase):
 
     def setUp(self):
         super(NamespaceManagerTestFramework, self).setUp()
+        l3_config.register_l3_agent_config_opts(l3_config.OPTS, cfg.CONF)
         self.agent_conf = cfg.CONF
         self.metadata_driver_mock = mock.Mock()
         self.namespace_manager = namespace_manager.NamespaceManager(
@@ -79,6 +82,10 @@ class NamespaceManagerTestCase(NamespaceManagerTestFramework):
                     id_to_keep = ns_manager.get_prefix_and_id(ns_name)[1]
                     ns_manager.keep_router(id_to_keep)
 
+        # The stale namespaces are removed in the background
+        utils.wait_until_true(
+            lambda: not any(self._namespace_exists(ns_name)
+                            for ns_name in to_delete))
         for ns_name in to_keep:
             self.assertTrue(self._namespace_exists(ns_name))
         for ns_name in to_delete:
@@ -13,10 +13,18 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import os
+import time
+
+import netaddr
+from oslo_log import log as logging
+
 from neutron.agent.common import async_process
 from neutron.agent.linux import ip_monitor
 from neutron.tests.functional.agent.linux import test_ip_lib
 
+LOG = logging.getLogger(__name__)
+
 
 class TestIPMonitor(test_ip_lib.IpLibTestFramework):
     def setUp(self):
@@ -65,3 +73,62 @@ class TestIPMonitor(test_ip_lib.IpLibTestFramework):
         self.assertEqual(expected_name, event.interface)
         self.assertEqual(expected_added, event.added)
         self.assertEqual(expected_cidr, event.cidr)
+
+
+class TestNetlinkIPMonitor(test_ip_lib.IpLibTestFramework):
+    def setUp(self):
+        super(TestNetlinkIPMonitor, self).setUp()
+        if os.geteuid() != 0:
+            self.skipTest('Opening a netlink socket in a namespace requires '
+                          'running as root')
+        attr = self.generate_device_details()
+        self.device = self.manage_device(attr)
+        self.monitor = ip_monitor.NetlinkIPMonitor(namespaces=attr.namespace)
+        self.addCleanup(self.monitor.stop)
+
+    def _wait_for_events(self, count, timeout=10):
+        events = []
+        deadline = time.time() + timeout
+        while len(events) < count and time.time() < deadline:
+            events.extend(self.monitor.get_events(timeout=1))
+        return events
+
+    def test_netlink_ip_monitor_events(self):
+        self.monitor.start()
+        cidr = '169.254.128.1/24'
+        self.device.addr.add(cidr)
+        self.device.addr.delete(cidr)
+        events = [e for e in self._wait_for_events(2) if e.cidr == cidr]
+        self.assertEqual([(self.device.name, True),
+                          (self.device.name, False)],
+                         [(e.interface, e.added) for e in events])
+
+    def test_replay_address_changes_benchmark(self):
+        """Replay address changes and compare both monitors' latency."""
+        changes = 100
+        cidrs = ['%s/32' % ip for ip in
+                 netaddr.IPNetwork('169.254.0.0/24')[1:changes + 1]]
+
+        self.monitor.start()
+        start = time.time()
+        for cidr in cidrs:
+            self.device.addr.add(cidr)
+        events = self._wait_for_events(changes, timeout=60)
+        netlink_time = time.time() - start
+        self.assertEqual(set(cidrs),
+                         {e.cidr for e in events if e.added} & set(cidrs))
+
+        ip_mon = ip_monitor.IPMonitor(self.device.namespace)
+        ip_mon.start()
+        self.addCleanup(ip_mon.stop)
+        start = time.time()
+        for cidr in cidrs:
+            self.device.addr.delete(cidr)
+        lines = ip_mon.iter_stdout(block=True)
+        for _i in range(changes):
+            next(lines)
+        text_time = time.time() - start
+        LOG.info("Replayed %(changes)d address changes: netlink monitor "
+                 "%(netlink).3fs, ip monitor %(text).3fs",
+                 {'changes': changes, 'netlink': netlink_time,
+                  'text': text_time})
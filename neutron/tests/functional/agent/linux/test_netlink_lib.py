@@ -125,3 +125,19 @@ class NetlinkLibTestCase(functional_base.BaseSudoTestCase):
         )
         remain_entries = ()
         self._delete_entry(delete_entries, remain_entries, _zone)
+
+    def test_delete_entries_by_filters(self):
+        _zone = self._find_unused_zone_id(111, 130)
+        other_zone = self._find_unused_zone_id(_zone + 1, 150)
+        self._create_entries(zone=_zone)
+        self._create_entries(zone=other_zone)
+        deleted = nl_lib.delete_entries_by_filters(
+            [{'ipversion': 4, 'zone': _zone, 'protocol': 'tcp',
+              'src': '1.1.1.1'},
+             {'ipversion': 4, 'zone': _zone, 'protocol': 'udp',
+              'dst': '2.2.2.0/24'}])
+        self.assertEqual(2, deleted)
+        self.assertEqual(
+            [(4, 'icmp', 8, 0, '1.1.1.1', '2.2.2.2', 3333, _zone)],
+            nl_lib.list_entries(zone=_zone))
+        self.assertEqual(3, len(nl_lib.list_entries(zone=other_zone)))
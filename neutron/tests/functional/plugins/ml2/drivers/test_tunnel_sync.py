@@ -0,0 +1,123 @@
+# Copyright (c) 2018 OpenStack Foundation.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import time
+
+import mock
+from neutron_lib import constants as p_const
+from oslo_log import log as logging
+
+from neutron.conf.plugins.ml2 import config as ml2_config
+from neutron.plugins.ml2.drivers import type_tunnel
+from neutron.tests.functional import base
+
+LOG = logging.getLogger(__name__)
+
+
+class _Endpoint(object):
+    def __init__(self, ip_address, host):
+        self.ip_address = ip_address
+        self.host = host
+
+
+class _EndpointsDriver(object):
+    """In memory endpoints, standing for the endpoints table."""
+
+    def __init__(self):
+        self.endpoints = {}
+
+    def get_endpoints(self):
+        return [{'ip_address': ip, 'host': host}
+                for ip, host in self.endpoints.items()]
+
+    def add_endpoint(self, ip, host):
+        self.endpoints.setdefault(ip, host)
+        return _Endpoint(ip, self.endpoints[ip])
+
+    def delete_endpoint(self, ip):
+        self.endpoints.pop(ip, None)
+
+    def delete_endpoint_by_host_or_ip(self, host, ip):
+        for endpoint_ip, endpoint_host in list(self.endpoints.items()):
+            if endpoint_ip == ip or endpoint_host == host:
+                del self.endpoints[endpoint_ip]
+
+
+class _TunnelRpcCallback(type_tunnel.TunnelRpcCallbackMixin):
+    def __init__(self, driver):
+        type_manager = mock.Mock()
+        type_manager.drivers = {p_const.TYPE_VXLAN: mock.Mock(obj=driver)}
+        self.setup_tunnel_callback_mixin(mock.Mock(), type_manager)
+
+
+class TestTunnelSyncBenchmark(base.BaseLoggingTestCase):
+
+    NODES = 3000
+
+    def setUp(self):
+        super(TestTunnelSyncBenchmark, self).setUp()
+        ml2_config.register_ml2_plugin_opts()
+        self.driver = _EndpointsDriver()
+        self.callback = _TunnelRpcCallback(self.driver)
+        self.nodes = [('host-%d' % i, '10.%d.%d.%d' % (
+            i // 65536, i // 256 % 256, i % 256)) for i in range(self.NODES)]
+        self.generations = {}
+
+    def _sync_nodes(self, use_generation):
+        """Sync every node, the way they do when they (re)start.
+
+        Return the duration, the number of tunnel_update messages received
+        by the agents and the number of endpoints sent to the agents.
+        """
+        notifier = self.callback._notifier
+        notifier.reset_mock()
+        endpoints = 0
+        start = time.time()
+        for host, ip in self.nodes:
+            details = self.callback.tunnel_sync(
+                mock.sentinel.context, tunnel_ip=ip, host=host,
+                tunnel_type=p_const.TYPE_VXLAN,
+                tunnels_generation=(self.generations.get(host)
+                                    if use_generation else None))
+            endpoints += len(details.get('tunnels', []))
+            self.generations[host] = details['tunnels_generation']
+        duration = time.time() - start
+        # Each tunnel_update is a fanout to every agent
+        messages = notifier.tunnel_update.call_count * self.NODES
+        return duration, messages, endpoints
+
+    def _log(self, phase, duration, messages, endpoints):
+        LOG.info("%(phase)s of %(nodes)d nodes: %(messages)d tunnel_update "
+                 "messages, %(endpoints)d endpoints returned in %(time).3fs",
+                 {'phase': phase, 'nodes': self.NODES, 'messages': messages,
+                  'endpoints': endpoints, 'time': duration})
+
+    def test_rolling_restart_benchmark(self):
+        duration, messages, endpoints = self._sync_nodes(False)
+        self.assertEqual(self.NODES * self.NODES, messages)
+        self._log("Initial sync", duration, messages, endpoints)
+
+        # The agents restart one after the other, without the generation of
+        # the tunnels they had before
+        duration, messages, endpoints = self._sync_nodes(False)
+        self.assertEqual(0, messages)
+        self.assertEqual(self.NODES * self.NODES, endpoints)
+        self._log("Rolling restart", duration, messages, endpoints)
+
+        # The agents sync again, e.g. after a failure to sync another
+        # tunnel type, with the generation of the tunnels they have
+        duration, messages, endpoints = self._sync_nodes(True)
+        self.assertEqual(0, messages)
+        self.assertEqual(0, endpoints)
+        self._log("Resync", duration, messages, endpoints)
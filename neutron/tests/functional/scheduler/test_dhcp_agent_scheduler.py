@@ -15,15 +15,18 @@
 
 import collections
 from operator import attrgetter
+import time
 
 from neutron_lib.api.definitions import provider_net as providernet
 from neutron_lib import constants
 from neutron_lib import context
+from oslo_log import log as logging
 from oslo_utils import uuidutils
 import testscenarios
 
 from neutron.db import agents_db
 from neutron.db import agentschedulers_db
+from neutron.db import api as db_api
 from neutron.db import common_db_mixin
 from neutron.objects import network
 from neutron.scheduler import dhcp_agent_scheduler
@@ -32,6 +35,8 @@ from neutron.tests.unit.plugins.ml2 import test_plugin
 from neutron.tests.unit.scheduler import (test_dhcp_agent_scheduler as
                                           test_dhcp_sch)
 
+LOG = logging.getLogger(__name__)
+
 # Required to generate tests from scenarios. Not compatible with nose.
 load_tests = testscenarios.load_tests_apply_scenarios
 
@@ -368,11 +373,12 @@ class TestAutoSchedule(test_dhcp_sch.TestDhcpSchedulerBaseTestCase,
                             'segment_id': None})
         return subnets
 
-    def get_network(self, context, net_id):
+    def get_networks(self, context, filters=None, fields=None):
         az_hints = []
         if getattr(self, 'no_network_with_az_match', False):
             az_hints = ['not-match']
-        return {'availability_zone_hints': az_hints}
+        return [{'id': net_id, 'availability_zone_hints': az_hints}
+                for net_id in filters['id']]
 
     def _get_hosted_networks_on_dhcp_agent(self, agent_id):
         binding_objs = network.NetworkDhcpAgentBinding.get_objects(
@@ -433,6 +439,58 @@ class TestAutoSchedule(test_dhcp_sch.TestDhcpSchedulerBaseTestCase,
             self._test_auto_schedule(i)
 
 
+class TestAutoScheduleBenchmark(test_dhcp_sch.TestDhcpSchedulerBaseTestCase,
+                                agentschedulers_db.DhcpAgentSchedulerDbMixin,
+                                agents_db.AgentDbMixin,
+                                common_db_mixin.CommonDbMixin):
+    """Resync of DHCP agents while many networks are hosted."""
+
+    NETWORKS = 5000
+    AGENTS = 200
+    AGENTS_PER_NETWORK = 2
+    SYNCS = 10
+
+    def setUp(self):
+        super(TestAutoScheduleBenchmark, self).setUp()
+        self.config(dhcp_agents_per_network=self.AGENTS_PER_NETWORK)
+        self.hosts = ['agent-%d' % i for i in range(self.AGENTS)]
+        agents = self._create_and_set_agents_down(self.hosts)
+        self.network_ids = [uuidutils.generate_uuid()
+                            for _ in range(self.NETWORKS)]
+        with db_api.context_manager.writer.using(self.ctx):
+            for i, net_id in enumerate(self.network_ids):
+                network.Network(self.ctx, id=net_id).create()
+                for j in range(self.AGENTS_PER_NETWORK):
+                    agent = agents[(i + j) % self.AGENTS]
+                    network.NetworkDhcpAgentBinding(
+                        self.ctx, dhcp_agent_id=agent.id,
+                        network_id=net_id).create()
+
+    def get_subnets(self, context, fields=None):
+        return [{'network_id': net_id, 'enable_dhcp': True,
+                 'segment_id': None} for net_id in self.network_ids]
+
+    def get_networks(self, context, filters=None, fields=None):
+        return [{'id': net_id, 'availability_zone_hints': []}
+                for net_id in filters['id']]
+
+    def test_auto_schedule_benchmark(self):
+        scheduler = dhcp_agent_scheduler.ChanceScheduler()
+        bindings = network.NetworkDhcpAgentBinding.count(self.ctx)
+        start = time.time()
+        for host in self.hosts[:self.SYNCS]:
+            self.assertTrue(
+                scheduler.auto_schedule_networks(self, self.ctx, host))
+        duration = time.time() - start
+        # every network is already hosted by enough agents
+        self.assertEqual(bindings,
+                         network.NetworkDhcpAgentBinding.count(self.ctx))
+        LOG.info("%(syncs)d DHCP agents auto scheduled %(networks)d "
+                 "networks hosted by %(agents)d agents in %(time).3fs",
+                 {'syncs': self.SYNCS, 'networks': self.NETWORKS,
+                  'agents': self.AGENTS, 'time': duration})
+
+
 class TestAZAwareWeightScheduler(test_dhcp_sch.TestDhcpSchedulerBaseTestCase,
                                  agentschedulers_db.DhcpAgentSchedulerDbMixin,
                                  agents_db.AgentDbMixin,
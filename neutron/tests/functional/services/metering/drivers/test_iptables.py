@@ -0,0 +1,114 @@
+# Copyright (c) 2018 OpenStack Foundation.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import time
+
+import mock
+from oslo_config import cfg
+from oslo_log import log as logging
+
+from neutron.agent.linux import iptables_manager
+from neutron.conf.agent import common as agent_config
+from neutron.services.metering.drivers.iptables import iptables_driver
+from neutron.tests.functional import base
+
+LOG = logging.getLogger(__name__)
+
+LIST_OUTPUT = (
+    'Chain %(chain)s (0 references)\n'
+    '    pkts      bytes target     prot opt in     out     source'
+    '               destination         \n'
+    '       1       100 ACCEPT     all  --  *      *       0.0.0.0/0'
+    '            0.0.0.0/0           \n')
+
+
+class TestMeteringCountersBenchmark(base.BaseLoggingTestCase):
+    """Compare the collection of the counters of many metering labels."""
+
+    ROUTERS = 500
+    LABELS = 10
+
+    def setUp(self):
+        super(TestMeteringCountersBenchmark, self).setUp()
+        mock.patch.object(iptables_driver.ip_lib, 'network_namespace_exists',
+                          return_value=True).start()
+        mock.patch.object(iptables_driver.ipv6_utils,
+                          'is_enabled_and_bind_by_default',
+                          return_value=False).start()
+        self.execute = mock.patch.object(
+            iptables_manager.linux_utils, 'execute',
+            side_effect=self._execute).start()
+        agent_config.register_agent_state_opts_helper(cfg.CONF)
+        cfg.CONF.set_override('interface_driver',
+                              'neutron.agent.linux.interface.NullDriver')
+        self.driver = iptables_driver.IptablesMeteringDriver('metering',
+                                                             cfg.CONF)
+        self.routers = []
+        self.saved_tables = {}
+        for i in range(self.ROUTERS):
+            router = {'id': 'router-%d' % i, 'distributed': False}
+            rm = iptables_driver.RouterWithMetering(self.driver.conf, router)
+            rules = []
+            for j in range(self.LABELS):
+                label_id = 'label-%d-%d' % (i, j)
+                chain = self.driver._get_label_chain_name(label_id)
+                rm.iptables_manager.ipv4['filter'].add_chain(chain,
+                                                             wrap=False)
+                rm.metering_labels[label_id] = 'fake'
+                rules += ['[1:100] -A %s -j ACCEPT' % chain] * 2
+            self.saved_tables[rm.ns_name] = (
+                '*filter\n%s\nCOMMIT\n' % '\n'.join(rules))
+            self.driver.routers[router['id']] = rm
+            self.routers.append(router)
+
+    def _execute(self, cmd, *args, **kwargs):
+        if '-L' in cmd:
+            return LIST_OUTPUT % {'chain': cmd[cmd.index('-L') + 1]}
+        # ['ip', 'netns', 'exec', namespace, 'iptables-save', ...]
+        return self.saved_tables[cmd[3]]
+
+    def _get_counters_per_chain(self):
+        """The collection as it was done before, one chain at a time."""
+        accs = {}
+        for router in self.routers:
+            rm = self.driver.routers[router['id']]
+            for label_id in rm.metering_labels:
+                chain = self.driver._get_label_chain_name(label_id)
+                accs[label_id] = rm.iptables_manager.get_traffic_counters(
+                    chain, wrap=False, zero=True)
+        return accs
+
+    def _measure(self, method):
+        self.execute.reset_mock()
+        start = time.time()
+        accs = method()
+        return accs, time.time() - start, self.execute.call_count
+
+    def test_get_traffic_counters_benchmark(self):
+        labels = self.ROUTERS * self.LABELS
+        accs, duration, calls = self._measure(self._get_counters_per_chain)
+        self.assertEqual(labels, len(accs))
+        LOG.info("Counters of %(labels)d labels read one chain at a time "
+                 "with %(calls)d commands in %(time).3fs",
+                 {'labels': labels, 'calls': calls, 'time': duration})
+
+        # The first collection zeroes the chains the driver has not seen
+        self.driver.get_traffic_counters(None, self.routers)
+        accs, duration, calls = self._measure(
+            lambda: self.driver.get_traffic_counters(None, self.routers))
+        self.assertEqual(labels, len(accs))
+        self.assertEqual(self.ROUTERS, calls)
+        LOG.info("Counters of %(labels)d labels read in one pass per router "
+                 "with %(calls)d commands in %(time).3fs",
+                 {'labels': labels, 'calls': calls, 'time': duration})
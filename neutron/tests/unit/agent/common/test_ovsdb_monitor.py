@@ -13,6 +13,7 @@
 #    under the License.
 
 import mock
+from ovs.db import idl
 
 from neutron.agent.common import async_process
 from neutron.agent.common import ovs_lib
@@ -85,3 +86,115 @@ class TestSimpleInterfaceMonitor(base.BaseTestCase):
             self.monitor.process_events()
             self.assertEqual(self.monitor.new_events['added'][0]['ofport'],
                              ovs_lib.UNASSIGNED_OFPORT)
+
+
+def _fake_row(uuid, name, ofport=None, external_ids=None):
+    row = mock.Mock(uuid=uuid, ofport=[ofport] if ofport else [],
+                    external_ids=external_ids or {})
+    row.name = name
+    return row
+
+
+class TestInterfaceIdl(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestInterfaceIdl, self).setUp()
+        mock.patch.object(idl.Idl, '__init__', return_value=None).start()
+        self.idl_run = mock.patch.object(idl.Idl, 'run').start()
+        self.idl = ovsdb_monitor.InterfaceIdl('tcp:127.0.0.1:6640',
+                                              mock.Mock())
+        self._connect(seqno=1)
+
+    def _connect(self, seqno):
+        self.idl._last_seqno = seqno
+        self.idl._monitor_request_id = 'monitor'
+        self.idl.run()
+        self.idl._monitor_request_id = None
+
+    def test_row_events(self):
+        row = _fake_row('uuid1', 'tap1', external_ids={'iface-id': 'p1'})
+        self.idl.notify(idl.ROW_CREATE, row)
+        self.assertTrue(self.idl.has_updates)
+        self.assertEqual(
+            {'added': [{'name': 'tap1', 'ofport': [],
+                        'external_ids': {'iface-id': 'p1'}}],
+             'removed': [], 'modified': []},
+            self.idl.get_events())
+        self.assertFalse(self.idl.has_updates)
+
+        row.ofport = [3]
+        self.idl.notify(idl.ROW_UPDATE, row)
+        self.idl.notify(idl.ROW_DELETE, row)
+        events = self.idl.get_events()
+        self.assertEqual([3], [dev['ofport'] for dev in events['modified']])
+        self.assertEqual(['tap1'], [dev['name'] for dev in events['removed']])
+
+    def test_update_merged_into_pending_add(self):
+        row = _fake_row('uuid1', 'tap1')
+        self.idl.notify(idl.ROW_CREATE, row)
+        row.ofport = [5]
+        self.idl.notify(idl.ROW_UPDATE, row)
+        events = self.idl.get_events()
+        self.assertEqual([5], [dev['ofport'] for dev in events['added']])
+        self.assertEqual([], events['modified'])
+
+    def test_unchanged_update_is_ignored(self):
+        row = _fake_row('uuid1', 'tap1', ofport=1)
+        self.idl.notify(idl.ROW_CREATE, row)
+        self.idl.get_events()
+        self.idl.notify(idl.ROW_UPDATE, row)
+        self.assertFalse(self.idl.has_updates)
+
+    def test_resync_after_reconnect(self):
+        kept = _fake_row('uuid1', 'tap1', ofport=1)
+        changed = _fake_row('uuid2', 'tap2', ofport=2)
+        deleted = _fake_row('uuid3', 'tap3', ofport=3)
+        for row in (kept, changed, deleted):
+            self.idl.notify(idl.ROW_CREATE, row)
+        self.idl.get_events()
+
+        # ovsdb-server restarted: the whole table is sent again
+        self.idl._last_seqno = 2
+        self.idl._monitor_request_id = 'monitor'
+        self.idl.run()
+        changed.ofport = [4]
+        new = _fake_row('uuid4', 'tap4', ofport=5)
+        for row in (kept, changed, new):
+            self.idl.notify(idl.ROW_CREATE, row)
+        self.idl._monitor_request_id = None
+        self.idl.run()
+
+        events = self.idl.get_events()
+        self.assertEqual(['tap4'], [dev['name'] for dev in events['added']])
+        self.assertEqual(['tap2'],
+                         [dev['name'] for dev in events['modified']])
+        self.assertEqual(['tap3'],
+                         [dev['name'] for dev in events['removed']])
+
+
+class TestNativeInterfaceMonitor(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestNativeInterfaceMonitor, self).setUp()
+        self.connection = mock.patch.object(
+            ovsdb_monitor.connection, 'Connection').start()
+        mock.patch.object(ovsdb_monitor.NativeInterfaceMonitor,
+                          '_idl_factory').start()
+        self.monitor = ovsdb_monitor.NativeInterfaceMonitor(
+            ovsdb_connection='tcp:127.0.0.1:6640', timeout=10)
+
+    def test_not_started(self):
+        self.assertFalse(self.monitor.is_active())
+        self.assertFalse(self.monitor.has_updates)
+        self.assertEqual({'added': [], 'removed': [], 'modified': []},
+                         self.monitor.get_events())
+
+    def test_start_stop(self):
+        self.monitor.start(block=True)
+        conn = self.connection.return_value
+        conn.start.assert_called_once_with()
+        conn.idl.get_events.return_value = mock.sentinel.events
+        self.assertEqual(mock.sentinel.events, self.monitor.get_events())
+        self.monitor.stop()
+        conn.stop.assert_called_once_with()
+        self.assertFalse(self.monitor.is_active())
@@ -34,6 +34,7 @@ from testtools import matchers
 
 from neutron.agent.l3 import agent as l3_agent
 from neutron.agent.l3 import dvr_edge_router as dvr_router
+from neutron.agent.l3 import dvr_fip_ns
 from neutron.agent.l3 import dvr_router_base
 from neutron.agent.l3 import dvr_snat_ns
 from neutron.agent.l3 import ha_router
@@ -280,6 +281,49 @@ class TestBasicRouterOperations(BasicRouterOperationsFramework):
                                             n_const.HA_ROUTER_STATE_STANDBY)
             queue_event.assert_not_called()
 
+    def test_check_ha_state_for_router_forgets_reported_state(self):
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        router_info = mock.MagicMock(ha_state='master')
+        agent.router_info['1234'] = router_info
+        agent.notify_server([('1234', 'master')])
+        agent.check_ha_state_for_router('1234',
+                                        n_const.HA_ROUTER_STATE_STANDBY)
+        agent.notify_server([('1234', 'master')])
+        self.assertEqual(
+            2, self.plugin_api.update_ha_routers_states.call_count)
+
+    def test_notify_server_coalesces_states(self):
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        agent.notify_server([('r1', 'master'), ('r2', 'backup'),
+                             ('r1', 'backup'), ('r1', 'master')])
+        self.plugin_api.update_ha_routers_states.assert_called_once_with(
+            mock.ANY, {'r1': n_const.HA_ROUTER_STATE_ACTIVE,
+                       'r2': n_const.HA_ROUTER_STATE_STANDBY})
+
+    def test_notify_server_skips_reported_states(self):
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        agent.notify_server([('r1', 'master'), ('r2', 'backup')])
+        self.plugin_api.update_ha_routers_states.reset_mock()
+
+        # r1 flapped back to master within the batch interval
+        agent.notify_server([('r1', 'backup'), ('r1', 'master')])
+        self.assertFalse(self.plugin_api.update_ha_routers_states.called)
+
+        agent.notify_server([('r1', 'master'), ('r2', 'master')])
+        self.plugin_api.update_ha_routers_states.assert_called_once_with(
+            mock.ANY, {'r2': n_const.HA_ROUTER_STATE_ACTIVE})
+
+    def test_notify_server_failure_is_not_recorded(self):
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        self.plugin_api.update_ha_routers_states.side_effect = (
+            oslo_messaging.MessagingTimeout)
+        self.assertRaises(oslo_messaging.MessagingTimeout,
+                          agent.notify_server, [('r1', 'master')])
+        self.plugin_api.update_ha_routers_states.side_effect = None
+        agent.notify_server([('r1', 'master')])
+        self.assertEqual(
+            2, self.plugin_api.update_ha_routers_states.call_count)
+
     def test_periodic_sync_routers_task_raise_exception(self):
         agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
         self.plugin_api.get_router_ids.return_value = ['fake_id']
@@ -362,7 +406,9 @@ class TestBasicRouterOperations(BasicRouterOperationsFramework):
         self.list_network_namespaces.return_value = namespace_list
         driver = metadata_driver.MetadataDriver
         with mock.patch.object(
-                driver, 'destroy_monitored_metadata_proxy') as destroy_proxy:
+                driver, 'destroy_monitored_metadata_proxy') as destroy_proxy, \
+                mock.patch.object(namespace_manager.eventlet, 'spawn_n',
+                                  side_effect=lambda f, *args: f(*args)):
             agent.periodic_sync_routers_task(agent.context)
 
             expected_calls = [
@@ -372,6 +418,63 @@ class TestBasicRouterOperations(BasicRouterOperationsFramework):
             self.assertEqual(len(stale_router_ids), destroy_proxy.call_count)
             destroy_proxy.assert_has_calls(expected_calls, any_order=True)
 
+    def _test_periodic_sync_routers_task_fingerprints(self, changed):
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        agent._queue = mock.Mock()
+        routers = [{'id': _uuid(), 'external_gateway_info': {},
+                    'routes': [], 'admin_state_up': True}
+                   for _ in range(3)]
+        for router in routers:
+            agent._process_router_if_compatible(router)
+        self.plugin_api.get_router_ids.return_value = [r['id'] for r
+                                                       in routers]
+        sync_routers = [dict(r) for r in routers]
+        for index in changed:
+            sync_routers[index]['routes'] = [
+                {'destination': '10.0.0.0/24', 'nexthop': '10.0.1.1'}]
+        self.plugin_api.get_routers.return_value = sync_routers
+
+        agent.periodic_sync_routers_task(agent.context)
+
+        queued = [call[0][0].id for call in agent._queue.add.call_args_list]
+        self.assertEqual([routers[index]['id'] for index in changed],
+                         queued)
+        self.assertEqual(len(changed),
+                         agent.sync_stats.get_counter('routers_queued'))
+        self.assertEqual(len(routers) - len(changed),
+                         agent.sync_stats.get_counter('routers_skipped'))
+
+    def test_periodic_sync_routers_task_skips_unchanged_routers(self):
+        self._test_periodic_sync_routers_task_fingerprints(changed=[])
+
+    def test_periodic_sync_routers_task_queues_changed_routers(self):
+        self._test_periodic_sync_routers_task_fingerprints(changed=[0, 2])
+
+    def test_periodic_sync_routers_task_unchanged_ha_router_state(self):
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        agent._queue = mock.Mock()
+        router = {'id': _uuid(), 'ha': True,
+                  n_const.HA_ROUTER_STATE_KEY: 'standby'}
+        agent.router_info[router['id']] = mock.Mock(ha_state='master')
+        agent._router_fingerprints[router['id']] = (
+            l3_agent.get_router_fingerprint(router))
+        self.plugin_api.get_router_ids.return_value = [router['id']]
+        self.plugin_api.get_routers.return_value = [router]
+        with mock.patch.object(agent,
+                               'check_ha_state_for_router') as chsfr:
+            agent.periodic_sync_routers_task(agent.context)
+        chsfr.assert_called_once_with(router['id'], 'standby')
+        self.assertFalse(agent._queue.add.called)
+
+    def test_router_removed_clears_fingerprint(self):
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        router = {'id': _uuid(), 'external_gateway_info': {},
+                  'routes': [], 'admin_state_up': True}
+        agent._process_router_if_compatible(router)
+        self.assertIn(router['id'], agent._router_fingerprints)
+        agent._router_removed(router['id'])
+        self.assertNotIn(router['id'], agent._router_fingerprints)
+
     def test_router_info_create(self):
         id = _uuid()
         agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
@@ -2486,6 +2589,20 @@ class TestBasicRouterOperations(BasicRouterOperationsFramework):
         agent._process_router_update()
         self.assertTrue(agent.plugin_rpc.get_routers.called)
 
+    def test_process_routers_update_failure_clears_fingerprint(self):
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        agent._router_fingerprints[42] = 'fingerprint'
+        agent._process_router_if_compatible = mock.Mock(
+            side_effect=RuntimeError())
+        update = router_processing_queue.RouterUpdate(
+            42,
+            router_processing_queue.PRIORITY_SYNC_ROUTERS_TASK,
+            router=mock.Mock(),
+            timestamp=timeutils.utcnow())
+        agent._queue.add(update)
+        agent._process_router_update()
+        self.assertNotIn(42, agent._router_fingerprints)
+
     def test_process_routers_update_rpc_timeout_on_get_ext_net(self):
         self._test_process_routers_update_rpc_timeout(ext_net_call=True,
                                                       ext_net_call_failed=True)
@@ -2662,7 +2779,10 @@ class TestBasicRouterOperations(BasicRouterOperationsFramework):
         pm = self.external_process.return_value
         pm.reset_mock()
 
-        with agent.namespaces_manager as ns_manager:
+        # Remove the stale namespaces right away instead of in the background
+        with mock.patch.object(namespace_manager.eventlet, 'spawn_n',
+                               side_effect=lambda f, *args: f(*args)), \
+                agent.namespaces_manager as ns_manager:
             for r in router_list:
                 ns_manager.keep_router(r['id'])
         qrouters = [n for n in stale_namespace_list
@@ -2766,6 +2886,42 @@ class TestBasicRouterOperations(BasicRouterOperationsFramework):
 
         self.assertEqual(tuple(), agent.neutron_service_plugins)
 
+    def test_get_fip_ns_cancels_stale_namespace_cleanup(self):
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        ext_net_id = _uuid()
+        ns_manager = agent.namespaces_manager
+        # The FIP namespace was found stale by the first full sync
+        ns_manager._stale[ext_net_id] = [dvr_fip_ns.FIP_NS_PREFIX]
+
+        fip_ns = agent.get_fip_ns(ext_net_id)
+        with mock.patch.object(ns_manager, '_cleanup') as mock_cleanup:
+            ns_manager._cleanup_stale()
+
+        self.assertFalse(mock_cleanup.called)
+        self.assertEqual(ext_net_id, fip_ns._ext_net_id)
+
+    def test_get_fip_ns_waits_for_stale_namespace_removal(self):
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        ext_net_id = _uuid()
+        ns_manager = agent.namespaces_manager
+        ns_manager._stale[ext_net_id] = [dvr_fip_ns.FIP_NS_PREFIX]
+        fip_namespaces = []
+        built_during_removal = []
+
+        def _cleanup(ns_prefix, ns_id):
+            eventlet.spawn_n(
+                lambda: fip_namespaces.append(agent.get_fip_ns(ns_id)))
+            eventlet.sleep(0)
+            built_during_removal.extend(fip_namespaces)
+
+        with mock.patch.object(ns_manager, '_cleanup',
+                               side_effect=_cleanup):
+            ns_manager._cleanup_stale()
+        eventlet.sleep(0)
+        # The namespace is only built once its removal is over
+        self.assertEqual([], built_during_removal)
+        self.assertEqual(1, len(fip_namespaces))
+
     def test_external_gateway_removed_ext_gw_port_no_fip_ns(self):
         agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
         agent.conf.agent_mode = 'dvr_snat'
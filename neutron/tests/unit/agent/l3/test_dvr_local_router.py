@@ -523,13 +523,63 @@ class TestDvrRouterOperations(base.BaseTestCase):
                                '_process_arp_cache_for_internal_port') as parp:
             ri._set_subnet_arp_info(subnet_id)
         self.assertEqual(1, parp.call_count)
-        self.mock_ip_dev.neigh.add.assert_called_once_with(
-            '1.2.3.4', '00:11:22:33:44:55')
+        self.mock_ip_dev.neigh.update.assert_called_once_with(
+            [('add', '1.2.3.4', '00:11:22:33:44:55')])
+        self.assertEqual(1, ri.arp_stats.get_counter('arp_add'))
+        self.assertEqual(1, ri.arp_stats.get_counter('arp_batches'))
 
         # Test negative case
         router['distributed'] = False
         ri._set_subnet_arp_info(subnet_id)
         self.mock_ip_dev.neigh.add.never_called()
+        # The ports of the subnet are only fetched once
+        self.plugin_api.get_ports_by_subnet.assert_called_once_with(
+            mock.ANY, subnet_id)
+
+    def test_subnet_arp_entries_follow_arp_rpcs(self):
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        router = l3_test_common.prepare_router_data(num_internal_ports=2)
+        router['distributed'] = True
+        subnet_id = l3_test_common.get_subnet_id(
+            router[lib_constants.INTERFACE_KEY][0])
+        self.plugin_api.get_ports_by_subnet.return_value = [
+            {'mac_address': '00:11:22:33:44:55',
+             'device_owner': lib_constants.DEVICE_OWNER_DHCP,
+             'fixed_ips': [{'ip_address': '1.2.3.4',
+                            'subnet_id': subnet_id}]}]
+        self.assertEqual({'1.2.3.4': '00:11:22:33:44:55'},
+                         agent.get_subnet_arp_entries(subnet_id))
+
+        def _payload(ip_address, mac_address):
+            return {'router_id': router['id'],
+                    'arp_table': {'ip_address': ip_address,
+                                  'mac_address': mac_address,
+                                  'subnet_id': subnet_id}}
+
+        agent.add_arp_entry(None, _payload('1.2.3.5', '00:11:22:33:44:66'))
+        agent.del_arp_entry(None, _payload('1.2.3.4', '00:11:22:33:44:55'))
+        self.assertEqual({'1.2.3.5': '00:11:22:33:44:66'},
+                         agent.get_subnet_arp_entries(subnet_id))
+        self.assertEqual(1, self.plugin_api.get_ports_by_subnet.call_count)
+
+        # No local router uses the subnet anymore
+        agent.release_subnet_arp_entries(subnet_id)
+        agent.get_subnet_arp_entries(subnet_id)
+        self.assertEqual(2, self.plugin_api.get_ports_by_subnet.call_count)
+
+    def test_release_subnet_arp_entries_still_in_use(self):
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        router = l3_test_common.prepare_router_data(num_internal_ports=2)
+        router['distributed'] = True
+        subnet_id = l3_test_common.get_subnet_id(
+            router[lib_constants.INTERFACE_KEY][0])
+        self.plugin_api.get_ports_by_subnet.return_value = []
+        agent._router_added(router['id'], router)
+        agent.get_subnet_arp_entries(subnet_id)
+        agent.release_subnet_arp_entries(subnet_id)
+        agent.get_subnet_arp_entries(subnet_id)
+        self.assertEqual(1, self.plugin_api.get_ports_by_subnet.call_count)
+        agent.router_deleted(None, router['id'])
 
     def test_add_arp_entry(self):
         agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
@@ -0,0 +1,110 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import signal
+
+import mock
+from oslo_serialization import jsonutils
+
+from neutron.agent.l3 import ha
+from neutron.agent.l3 import ha_router
+from neutron.tests import base
+
+
+class TestSharedStateChangeMonitor(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestSharedStateChangeMonitor, self).setUp()
+        self.spawn_n = mock.patch.object(ha.eventlet, 'spawn_n').start()
+        self.replace_file = mock.patch.object(ha.file_utils,
+                                              'replace_file').start()
+        self.pm_cls = mock.patch.object(ha.external_process,
+                                        'ProcessManager').start()
+        self.conf = mock.Mock(ha_vrrp_advert_int=0,
+                              ha_confs_path='/ha',
+                              state_path='/state')
+        self.process_monitor = mock.Mock()
+        self.monitor = ha.SharedStateChangeMonitor(self.conf,
+                                                   self.process_monitor)
+
+    def _add_router(self, router_id='r1', cidr='169.254.0.1/24'):
+        self.monitor.add_router(router_id, 'qrouter-%s' % router_id,
+                                '/ha/%s' % router_id, 'ha-%s' % router_id,
+                                cidr)
+
+    def test_add_router_schedules_update(self):
+        self._add_router()
+        self.spawn_n.assert_called_once_with(self.monitor._update_monitor)
+        self.assertEqual(
+            {'r1': {'namespace': 'qrouter-r1', 'conf_dir': '/ha/r1',
+                    'interface': 'ha-r1', 'cidr': '169.254.0.1/24'}},
+            self.monitor.routers)
+
+    def test_add_router_unchanged(self):
+        self._add_router()
+        self._add_router()
+        self.assertEqual(1, self.spawn_n.call_count)
+        self._add_router(cidr='169.254.0.2/24')
+        self.assertEqual(2, self.spawn_n.call_count)
+
+    def test_remove_router(self):
+        self.monitor.remove_router('r1')
+        self.assertFalse(self.spawn_n.called)
+        self._add_router()
+        self.monitor.remove_router('r1')
+        self.assertEqual(2, self.spawn_n.call_count)
+        self.assertEqual({}, self.monitor.routers)
+
+    def test_update_monitor(self):
+        self._add_router()
+        self._add_router('r2')
+        self.monitor._update_monitor()
+
+        path, content = self.replace_file.call_args[0]
+        self.assertEqual(self.monitor.get_routers_file_path(), path)
+        self.assertEqual(self.monitor.routers, jsonutils.loads(content))
+        pm = self.pm_cls.return_value
+        pm.enable.assert_called_once_with(reload_cfg=True)
+        self.process_monitor.register.assert_called_once_with(
+            ha.SHARED_STATE_CHANGE_MONITOR_UUID,
+            ha_router.IP_MONITOR_PROCESS_SERVICE, pm)
+
+        callback = self.pm_cls.call_args[1]['default_cmd_callback']
+        cmd = callback('/pids/monitor.pid')
+        self.assertEqual('neutron-keepalived-state-change', cmd[0])
+        self.assertIn('--routers_file=%s' % path, cmd)
+        self.assertIn('--pid_file=/pids/monitor.pid', cmd)
+
+    def test_update_monitor_error_is_logged(self):
+        self.replace_file.side_effect = OSError
+        with mock.patch.object(ha.LOG, 'exception') as log_exception:
+            self.monitor._update_monitor()
+        self.assertTrue(log_exception.called)
+        self.assertFalse(self.process_monitor.register.called)
+
+    def test_cleanup(self):
+        with mock.patch.object(ha.os.path, 'exists', return_value=True), \
+                mock.patch.object(ha.fileutils,
+                                  'delete_if_exists') as delete:
+            self.monitor.cleanup()
+        self.process_monitor.unregister.assert_called_once_with(
+            ha.SHARED_STATE_CHANGE_MONITOR_UUID,
+            ha_router.IP_MONITOR_PROCESS_SERVICE)
+        self.pm_cls.return_value.disable.assert_called_once_with(
+            sig=str(int(signal.SIGTERM)))
+        delete.assert_called_once_with(self.monitor.get_routers_file_path())
+
+    def test_cleanup_never_shared(self):
+        with mock.patch.object(ha.os.path, 'exists', return_value=False):
+            self.monitor.cleanup()
+        self.assertFalse(self.pm_cls.called)
+        self.assertFalse(self.process_monitor.unregister.called)
@@ -30,10 +30,11 @@ class TestBasicRouterOperations(base.BaseTestCase):
     def _create_router(self, router=None, **kwargs):
         if not router:
             router = mock.MagicMock()
-        self.agent_conf = mock.Mock()
+        self.agent_conf = mock.Mock(ha_shared_state_change_monitor=False)
+        self.agent = mock.Mock()
         self.router_id = _uuid()
         return ha_router.HaRouter(mock.sentinel.enqueue_state,
-                                  mock.sentinel.agent,
+                                  self.agent,
                                   self.router_id,
                                   router,
                                   self.agent_conf,
@@ -117,6 +118,42 @@ class TestBasicRouterOperations(base.BaseTestCase):
                  "sig='str(%d)'" % signal.SIGKILL]
         mock_pm.disable.has_calls(calls)
 
+    def _test_shared_state_change_monitor(self, pm_active):
+        ri = self._create_router(mock.MagicMock())
+        self.agent_conf.ha_shared_state_change_monitor = True
+        ri.ha_port = {'id': _uuid()}
+        ri.keepalived_manager = mock.Mock()
+        ri.keepalived_manager.get_conf_dir.return_value = '/ha/router'
+        shared_monitor = self.agent.shared_state_change_monitor
+        with mock.patch.object(ri,
+                               '_get_state_change_monitor_process_manager')\
+                as m_get_state, \
+                mock.patch.object(ri, '_get_primary_vip',
+                                  return_value='169.254.0.1/24'), \
+                mock.patch.object(ri, 'get_ha_device_name',
+                                  return_value='ha-1'):
+            mock_pm = m_get_state.return_value
+            mock_pm.active = pm_active
+            ri.spawn_state_change_monitor(mock.sentinel.process_monitor)
+            shared_monitor.add_router.assert_called_once_with(
+                self.router_id, ri.ha_namespace, '/ha/router', 'ha-1',
+                '169.254.0.1/24')
+            self.assertFalse(mock_pm.enable.called)
+
+            ri.destroy_state_change_monitor(mock.sentinel.process_monitor)
+            shared_monitor.remove_router.assert_called_once_with(
+                self.router_id)
+        return mock_pm
+
+    def test_shared_state_change_monitor(self):
+        mock_pm = self._test_shared_state_change_monitor(False)
+        self.assertFalse(mock_pm.disable.called)
+
+    def test_shared_state_change_monitor_stops_router_monitor(self):
+        mock_pm = self._test_shared_state_change_monitor(True)
+        mock_pm.disable.assert_called_once_with(
+            sig=str(int(signal.SIGTERM)))
+
     def _test_ha_state(self, read_return, expected):
         ri = self._create_router(mock.MagicMock())
         ri.keepalived_manager = mock.Mock()
@@ -12,6 +12,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import os
+
 import mock
 
 from neutron.agent.l3 import item_allocator as ia
@@ -138,4 +140,52 @@ class TestItemAllocator(base.BaseTestCase):
         self.assertNotIn('deadbeef', a.allocations)
         self.assertIn(allocation, a.pool)
         self.assertEqual({}, a.allocations)
-        write.assert_called_once_with([])
+        write.assert_called_once_with(['deadbeef,\n'], append=True)
+
+    def test__init__replays_journal(self):
+        test_pool = set(TestObject(s) for s in range(32768, 40000))
+        with mock.patch.object(ia.ItemAllocator, '_read') as read,\
+                mock.patch.object(ia.ItemAllocator, '_write') as write:
+            read.return_value = ["da873ca2,10\n",
+                                 "42c9daf7,11\n",
+                                 "da873ca2,\n",
+                                 "42c9daf7,12\n",
+                                 "5e3a1b2c,1"]
+            a = ia.ItemAllocator('/file', TestObject, test_pool)
+
+        self.assertEqual({'42c9daf7': '12'},
+                         {k: str(v) for k, v in a.remembered.items()})
+        # The partially written last record is dropped
+        write.assert_called_once_with(['42c9daf7,12\n'])
+
+    def test_journal_compaction(self):
+        test_pool = set(TestObject(s) for s in range(32768, 40000))
+        with mock.patch.object(ia.ItemAllocator, '_write') as write,\
+                mock.patch.object(ia.ItemAllocator,
+                                  'COMPACTION_THRESHOLD', 2):
+            a = ia.ItemAllocator('/file', TestObject, test_pool)
+            allocation = a.allocate('deadbeef')
+            a.release('deadbeef')
+            a.allocate('deadbeef')
+            self.assertEqual(3, write.call_count)
+            a.release('deadbeef')
+
+        write.assert_called_with([])
+        self.assertEqual(0, a._journal_size)
+        self.assertIn(allocation, a.pool)
+
+    def test_restart_recovers_from_journal(self):
+        state_file = os.path.join(self.get_default_temp_dir().path,
+                                  'allocations')
+        a = ia.ItemAllocator(state_file, TestObject,
+                             set(TestObject(s) for s in range(10)))
+        first = a.allocate('first')
+        a.allocate('second')
+        a.release('second')
+        third = a.allocate('third')
+
+        a = ia.ItemAllocator(state_file, TestObject,
+                             set(TestObject(s) for s in range(10)))
+        self.assertEqual(str(first), str(a.lookup('first')))
+        self.assertIsNone(a.lookup('second'))
+        self.assertEqual(str(third), str(a.lookup('third')))
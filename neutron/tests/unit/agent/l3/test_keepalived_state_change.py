@@ -0,0 +1,111 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import errno
+import select
+
+import mock
+from oslo_serialization import jsonutils
+
+from neutron.agent.l3 import keepalived_state_change
+from neutron.agent.linux import ip_monitor
+from neutron.tests import base
+
+
+def _router(router_id):
+    return {'namespace': 'qrouter-%s' % router_id,
+            'conf_dir': '/ha/%s' % router_id,
+            'interface': 'ha-%s' % router_id,
+            'cidr': '169.254.0.1/24'}
+
+
+class TestSharedMonitorDaemon(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestSharedMonitorDaemon, self).setUp()
+        self.routers_file = self.get_temp_file_path('routers.json')
+        self.daemon = keepalived_state_change.SharedMonitorDaemon(
+            None, self.routers_file)
+        self.daemon.monitor = mock.Mock()
+
+    def _write_routers(self, *router_ids):
+        with open(self.routers_file, 'w') as routers_file:
+            routers_file.write(jsonutils.dumps(
+                {router_id: _router(router_id) for router_id in router_ids}))
+
+    def test_load_routers(self):
+        self._write_routers('r1', 'r2')
+        self.daemon.load_routers()
+        self.assertEqual({'qrouter-r1', 'qrouter-r2'},
+                         set(self.daemon.routers))
+        self.assertEqual(2, self.daemon.monitor.add_namespace.call_count)
+
+        self._write_routers('r2', 'r3')
+        self.daemon.load_routers()
+        self.assertEqual({'qrouter-r2', 'qrouter-r3'},
+                         set(self.daemon.routers))
+        self.daemon.monitor.remove_namespace.assert_called_once_with(
+            'qrouter-r1')
+        self.daemon.monitor.add_namespace.assert_called_with('qrouter-r3')
+        self.assertEqual(3, self.daemon.monitor.add_namespace.call_count)
+
+    def test_load_routers_retries_failed_namespace(self):
+        self._write_routers('r1')
+        self.daemon.monitor.add_namespace.side_effect = OSError
+        self.daemon.load_routers()
+        self.assertEqual({}, self.daemon.routers)
+
+        self.daemon.monitor.add_namespace.side_effect = None
+        self.daemon.load_routers()
+        self.assertEqual(['qrouter-r1'], list(self.daemon.routers))
+
+    def test_load_routers_invalid_file(self):
+        with open(self.routers_file, 'w') as routers_file:
+            routers_file.write('{')
+        self.daemon.load_routers()
+        self.assertEqual({}, self.daemon.routers)
+
+    def test_handle_event(self):
+        self._write_routers('r1', 'r2')
+        self.daemon.load_routers()
+        handler = self.daemon.routers['qrouter-r2']
+        event = ip_monitor.IPMonitorEvent('', True, 'ha-r2',
+                                          '169.254.0.1/24',
+                                          namespace='qrouter-r2')
+        with mock.patch.object(handler, 'write_state_change') as write, \
+                mock.patch.object(handler, 'notify_agent') as notify:
+            self.daemon.handle_event(event)
+            # Events of a namespace no longer monitored are ignored
+            event.namespace = 'qrouter-r3'
+            self.daemon.handle_event(event)
+        write.assert_called_once_with('master')
+        notify.assert_called_once_with('master')
+
+    def test_get_events(self):
+        self.daemon.monitor.get_events.return_value = [mock.sentinel.event]
+        self.assertEqual([mock.sentinel.event], self.daemon.get_events())
+        self.daemon.monitor.get_events.assert_called_once_with(
+            timeout=keepalived_state_change.RELOAD_CHECK_INTERVAL)
+
+    def test_get_events_interrupted(self):
+        self.daemon.monitor.get_events.side_effect = select.error(
+            errno.EINTR, 'Interrupted system call')
+        self.assertEqual([], self.daemon.get_events())
+
+    def test_get_events_without_routers(self):
+        self.daemon.monitor.is_active.return_value = False
+        with mock.patch.object(keepalived_state_change.time,
+                               'sleep') as sleep:
+            self.assertEqual([], self.daemon.get_events())
+        sleep.assert_called_once_with(
+            keepalived_state_change.RELOAD_CHECK_INTERVAL)
+        self.assertFalse(self.daemon.monitor.get_events.called)
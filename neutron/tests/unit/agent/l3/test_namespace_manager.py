@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import eventlet
 import mock
 from oslo_utils import uuidutils
 
@@ -112,3 +113,71 @@ class TestNamespaceManager(NamespaceManagerTestCaseFramework):
                         mock.call(dvr_snat_ns.SNAT_NS_PREFIX, router_id)]
             mock_cleanup.assert_has_calls(expected, any_order=True)
             self.assertEqual(2, mock_cleanup.call_count)
+
+    def _exit_with_stale(self, ns_names, keep=()):
+        self.agent_conf.namespace_cleanup_workers = 2
+        with mock.patch.object(self.ns_manager, 'list_all',
+                               return_value=set(ns_names)), \
+                mock.patch.object(namespace_manager.eventlet,
+                                  'spawn_n') as spawn_n:
+            with self.ns_manager as ns_manager:
+                for ns_id in keep:
+                    ns_manager.keep_router(ns_id)
+        return spawn_n
+
+    def test_exit_cleans_up_in_background(self):
+        router_id = _uuid()
+        ext_net_id = _uuid()
+        spawn_n = self._exit_with_stale(
+            [namespaces.NS_PREFIX + router_id,
+             dvr_snat_ns.SNAT_NS_PREFIX + router_id,
+             dvr_fip_ns.FIP_NS_PREFIX + ext_net_id,
+             namespaces.NS_PREFIX + 'kept'], keep=['kept'])
+        spawn_n.assert_called_once_with(self.ns_manager._cleanup_stale)
+
+        with mock.patch.object(self.ns_manager, '_cleanup') as mock_cleanup:
+            self.ns_manager._cleanup_stale()
+        expected = [mock.call(namespaces.NS_PREFIX, router_id),
+                    mock.call(dvr_snat_ns.SNAT_NS_PREFIX, router_id),
+                    mock.call(dvr_fip_ns.FIP_NS_PREFIX, ext_net_id)]
+        mock_cleanup.assert_has_calls(expected, any_order=True)
+        self.assertEqual(3, mock_cleanup.call_count)
+        self.assertEqual(3, self.ns_manager.stats.get_counter('removed'))
+        self.assertEqual(
+            3, self.ns_manager.stats.get_histogram('namespace_cleanup').count)
+
+    def test_exit_without_stale_namespaces(self):
+        spawn_n = self._exit_with_stale([namespaces.NS_PREFIX + 'kept'],
+                                        keep=['kept'])
+        self.assertFalse(spawn_n.called)
+
+    def test_cancel_cleanup(self):
+        router_id = _uuid()
+        self._exit_with_stale([namespaces.NS_PREFIX + router_id])
+        self.ns_manager.cancel_cleanup(router_id)
+        with mock.patch.object(self.ns_manager, '_cleanup') as mock_cleanup:
+            self.ns_manager._cleanup_stale()
+        self.assertFalse(mock_cleanup.called)
+
+    def test_cancel_cleanup_in_progress(self):
+        router_id = _uuid()
+        self._exit_with_stale([namespaces.NS_PREFIX + router_id])
+        waited = []
+
+        def _cleanup(ns_prefix, ns_id):
+            # A router added meanwhile waits until the removal is over
+            self.assertIn(ns_id, self.ns_manager._cleanups_in_progress)
+            eventlet.spawn_n(
+                lambda: waited.append(
+                    self.ns_manager.cancel_cleanup(ns_id)))
+            eventlet.sleep(0)
+            self.assertEqual([], waited)
+
+        with mock.patch.object(self.ns_manager, '_cleanup',
+                               side_effect=_cleanup):
+            self.ns_manager._cleanup_stale()
+        eventlet.sleep(0)
+        self.assertEqual([None], waited)
+        self.assertEqual({}, self.ns_manager._cleanups_in_progress)
+        # Nothing to wait for once the removal is done
+        self.ns_manager.cancel_cleanup(router_id)
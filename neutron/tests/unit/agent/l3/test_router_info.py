@@ -247,15 +247,43 @@ class TestBasicRouterOperations(BasicRouterTestCaseFramework):
 
         ri.process_floating_ip_nat_rules()
 
-        # Be sure that the rules are cleared first and apply is called last
-        self.assertEqual(mock.call.clear_rules_by_tag('floating_ip'),
-                         ipv4_nat.mock_calls[0])
+        # Be sure that apply is called last
         self.assertEqual(mock.call.apply(), ri.iptables_manager.mock_calls[-1])
 
-        # Be sure that add_rule is called somewhere in the middle
         ipv4_nat.add_rule.assert_called_once_with(mock.sentinel.chain,
                                                   mock.sentinel.rule,
                                                   tag='floating_ip')
+        self.assertFalse(ipv4_nat.remove_rule.called)
+
+        # The rules of a floating ip which didn't change are left alone
+        ipv4_nat.reset_mock()
+        ri.process_floating_ip_nat_rules()
+        self.assertFalse(ipv4_nat.add_rule.called)
+        self.assertFalse(ipv4_nat.remove_rule.called)
+
+    def test_process_floating_ip_nat_rules_changed(self):
+        ri = self._create_router()
+        fips = [{'fixed_ip_address': '10.0.0.1',
+                 'floating_ip_address': '172.24.4.1'},
+                {'fixed_ip_address': '10.0.0.2',
+                 'floating_ip_address': '172.24.4.2'}]
+        ri.get_floating_ips = mock.Mock(return_value=fips)
+        ri.iptables_manager = mock.MagicMock()
+        ipv4_nat = ri.iptables_manager.ipv4['nat']
+        ri.process_floating_ip_nat_rules()
+        self.assertEqual(6, ipv4_nat.add_rule.call_count)
+
+        # Reassociate the first floating ip and remove the second one
+        ipv4_nat.reset_mock()
+        fips[0]['fixed_ip_address'] = '10.0.0.3'
+        del fips[1]
+        ri.process_floating_ip_nat_rules()
+        self.assertEqual(6, ipv4_nat.remove_rule.call_count)
+        ipv4_nat.add_rule.assert_has_calls(
+            [mock.call(chain, rule, tag='floating_ip') for chain, rule in
+             ri.floating_forward_rules(fips[0])])
+        self.assertEqual(3, ipv4_nat.add_rule.call_count)
+        self.assertEqual(['172.24.4.1'], list(ri.floating_ip_nat_rules))
 
     def test_process_floating_ip_nat_rules_removed(self):
         ri = self._create_router()
@@ -265,13 +293,11 @@ class TestBasicRouterOperations(BasicRouterTestCaseFramework):
 
         ri.process_floating_ip_nat_rules()
 
-        # Be sure that the rules are cleared first and apply is called last
-        self.assertEqual(mock.call.clear_rules_by_tag('floating_ip'),
-                         ipv4_nat.mock_calls[0])
+        # Be sure that apply is called last
         self.assertEqual(mock.call.apply(), ri.iptables_manager.mock_calls[-1])
 
-        # Be sure that add_rule is called somewhere in the middle
         self.assertFalse(ipv4_nat.add_rule.called)
+        self.assertFalse(ipv4_nat.remove_rule.called)
 
     def test_process_floating_ip_address_scope_rules_diff_scopes(self):
         ri = self._create_router()
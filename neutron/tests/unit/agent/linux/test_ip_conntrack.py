@@ -13,11 +13,17 @@
 #    limitations under the License.
 
 import mock
+import testtools
 
 from neutron.agent.linux import ip_conntrack
+from neutron.common import exceptions as n_exc
 from neutron.tests import base
 
 
+DELETE_ENTRIES_BY_FILTERS = ('neutron.privileged.agent.linux.netlink_lib.'
+                             'delete_entries_by_filters')
+
+
 class IPConntrackTestCase(base.BaseTestCase):
 
     def setUp(self):
@@ -39,3 +45,161 @@ class IPConntrackTestCase(base.BaseTestCase):
         dev_info_list = [dev_info for _ in range(10)]
         self.mgr._delete_conntrack_state(dev_info_list, rule)
         self.assertEqual(1, len(self.execute.mock_calls))
+
+    def _drain_queue(self):
+        self.mgr._process_queue()
+        self.assertEqual(0, self.mgr.get_queue_depth())
+
+    def test_process_queue_batches_updates(self):
+        dev_info = {'device': 'tapdevice', 'fixed_ips': ['1.2.3.4']}
+        self.mgr.delete_conntrack_state_by_rule(
+            [dev_info], {'ethertype': 'IPv4', 'direction': 'ingress'})
+        self.mgr.delete_conntrack_state_by_remote_ips(
+            [dev_info], 'IPv4', ['10.0.0.1', '10.0.0.2'])
+        self.mgr.delete_conntrack_state_by_rule(
+            [dev_info], {'ethertype': 'IPv4', 'direction': 'ingress'})
+        self.assertEqual(4, self.mgr.get_queue_depth())
+
+        self._drain_queue()
+        self.assertEqual(
+            [['conntrack', '-D', '-f', 'ipv4', '-d', '1.2.3.4', '-w', 100],
+             ['conntrack', '-D', '-f', 'ipv4', '-d', '1.2.3.4', '-w', 100,
+              '-s', '10.0.0.1'],
+             ['conntrack', '-D', '-f', 'ipv4', '-d', '1.2.3.4', '-w', 100,
+              '-s', '10.0.0.2'],
+             ['conntrack', '-D', '-f', 'ipv4', '-s', '1.2.3.4', '-w', 100,
+              '-d', '10.0.0.1'],
+             ['conntrack', '-D', '-f', 'ipv4', '-s', '1.2.3.4', '-w', 100,
+              '-d', '10.0.0.2']],
+            [call[0][0] for call in self.execute.call_args_list])
+        self.assertEqual(1, self.mgr.stats.get_counter('batches'))
+        self.assertEqual(4, self.mgr.stats.get_counter('updates'))
+        self.assertEqual(
+            4, self.mgr.stats.get_histogram('queue_latency').count)
+
+    def test_process_queue_netlink(self):
+        self.mgr.use_netlink = True
+        dev_info = {'device': 'tapdevice',
+                    'fixed_ips': ['1.2.3.4', 'fe80::1']}
+        self.mgr.delete_conntrack_state_by_rule(
+            [dev_info], {'ethertype': 'IPv6', 'direction': 'egress',
+                         'protocol': '58'})
+        self.mgr.delete_conntrack_state_by_remote_ips(
+            [dev_info], 'IPv4', ['10.0.0.1'])
+        self.mgr.delete_conntrack_state_by_rule(
+            [dev_info], {'ethertype': 'IPv4', 'direction': 'ingress',
+                         'protocol': 'sctp'})
+        with mock.patch(DELETE_ENTRIES_BY_FILTERS,
+                        return_value=3) as delete:
+            self._drain_queue()
+        delete.assert_called_once_with(
+            [{'ipversion': 6, 'zone': 100, 'protocol': 'icmpv6',
+              'src': 'fe80::1'}] +
+            [{'ipversion': 4, 'zone': 100, 'protocol': protocol,
+              'dst': '1.2.3.4', 'src': '10.0.0.1'}
+             for protocol in ('tcp', 'udp', 'icmp')] +
+            [{'ipversion': 4, 'zone': 100, 'protocol': protocol,
+              'src': '1.2.3.4', 'dst': '10.0.0.1'}
+             for protocol in ('tcp', 'udp', 'icmp')])
+        # SCTP entries can only be deleted by the conntrack command
+        self.execute.assert_called_once_with(
+            ['conntrack', '-D', '-p', 'sctp', '-f', 'ipv4', '-d', '1.2.3.4',
+             '-w', 100], run_as_root=True, check_exit_code=True,
+            extra_ok_codes=[1])
+        self.assertEqual(3, self.mgr.stats.get_counter('entries_deleted'))
+        self.assertEqual(
+            1, self.mgr.stats.get_histogram('netlink_duration').count)
+
+    def test_process_queue_netlink_remote_ips_of_many_ports(self):
+        self.mgr.use_netlink = True
+        dev_infos = [{'device': 'tapdevice%d' % i,
+                      'fixed_ips': ['1.2.3.%d' % i]} for i in range(20)]
+        for dev_info in dev_infos:
+            self.mgr.get_device_zone(dev_info)
+        self.mgr.delete_conntrack_state_by_remote_ips(
+            dev_infos, 'IPv4', ['10.0.0.1', '10.0.0.2'])
+        with mock.patch(DELETE_ENTRIES_BY_FILTERS,
+                        return_value=0) as delete:
+            self._drain_queue()
+        delete.assert_called_once_with(mock.ANY)
+        # 20 ports, 2 remote IPs, 2 directions and 3 protocols
+        self.assertEqual(240, len(delete.call_args[0][0]))
+        self.assertFalse(self.execute.called)
+
+    def test_process_queue_netlink_failure(self):
+        self.mgr.use_netlink = True
+        rule = {'ethertype': 'IPv4', 'direction': 'ingress',
+                'protocol': 'tcp'}
+        dev_info = {'device': 'tapdevice', 'fixed_ips': ['1.2.3.4']}
+        self.mgr.delete_conntrack_state_by_rule([dev_info], rule)
+        with mock.patch(DELETE_ENTRIES_BY_FILTERS, side_effect=OSError):
+            self._drain_queue()
+        self.assertFalse(self.mgr.use_netlink)
+        self.execute.assert_called_once_with(
+            ['conntrack', '-D', '-p', 'tcp', '-f', 'ipv4', '-d', '1.2.3.4',
+             '-w', 100],
+            run_as_root=True, check_exit_code=True, extra_ok_codes=[1])
+
+    def test_netlink_not_used_in_namespace(self):
+        mgr = ip_conntrack.IpConntrackManager(
+            self._get_rule_for_table, {}, {}, self.execute,
+            namespace='ns', use_netlink=True)
+        self.assertFalse(mgr.use_netlink)
+
+    def test_get_device_zone_per_network_takes_over_device_zone(self):
+        mgr = ip_conntrack.IpConntrackManager(
+            self._get_rule_for_table, {}, {}, self.execute)
+        port = {'device': 'tapdevice', 'network_id': 'net-1'}
+        self.assertEqual(100, mgr.get_device_zone(port, create=False))
+        self.assertEqual(100, mgr.get_device_zone(
+            {'device': 'tapother', 'network_id': 'net-1'}))
+        self.assertEqual(1, mgr._zone_allocator.used_zones())
+
+
+class ZoneAllocatorTestCase(base.BaseTestCase):
+
+    def setUp(self):
+        super(ZoneAllocatorTestCase, self).setUp()
+        self.allocator = ip_conntrack.ZoneAllocator(start=10, end=15)
+
+    def test_rebuild(self):
+        self.allocator.rebuild({'a': 11, 'b': 13, 'c': 13})
+        self.assertEqual(2, self.allocator.used_zones())
+        # zones above the highest one first, then the gaps
+        self.assertEqual([14, 15, 10, 12],
+                         [self.allocator.allocate(key)
+                          for key in ('d', 'e', 'f', 'g')])
+        self.assertRaises(n_exc.CTZoneExhaustedError,
+                          self.allocator.allocate, 'h')
+
+    def test_release_reuses_zone_last(self):
+        zones = [self.allocator.allocate(key) for key in 'abcd']
+        self.assertEqual([10, 11, 12, 13], zones)
+        self.allocator.release('b')
+        self.allocator.release('a')
+        self.assertEqual([14, 15, 11, 10],
+                         [self.allocator.allocate(key) for key in 'efgh'])
+
+    def test_shared_zone_released_with_last_key(self):
+        self.allocator.allocate('a')
+        self.allocator.assign('b', 10)
+        self.allocator.release('a')
+        self.assertEqual(10, self.allocator.get('b'))
+        self.assertEqual(1, self.allocator.used_zones())
+        self.allocator.release('b')
+        self.assertEqual(0, self.allocator.used_zones())
+        self.allocator.release('b')
+
+    def test_assign_above_next_zone(self):
+        self.allocator.assign('a', 15)
+        self.assertEqual([10, 11, 12, 13, 14],
+                         [self.allocator.allocate(key) for key in 'bcdef'])
+        with testtools.ExpectedException(n_exc.CTZoneExhaustedError):
+            self.allocator.find_open_zone()
+
+    def test_reassign_releases_previous_zone(self):
+        self.allocator.allocate('a')
+        self.allocator.assign('a', 12)
+        self.assertEqual(1, self.allocator.used_zones())
+        self.assertEqual([13, 14, 15, 10, 11],
+                         [self.allocator.allocate(key) for key in 'bcdef'])
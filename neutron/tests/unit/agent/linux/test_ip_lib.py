@@ -1666,6 +1666,31 @@ class TestIpNeighCommand(TestIPCmdBase):
         mock_run_iproute.side_effect = NetlinkError(errno.ENOENT, None)
         self.neigh_cmd.delete('192.168.45.100', 'cc:dd:ee:ff:ab:cd')
 
+    @mock.patch.object(pyroute2, 'NetNS')
+    def test_update_entries(self, mock_netns):
+        mock_netns_instance = mock_netns.return_value
+        mock_netns_enter = mock_netns_instance.__enter__.return_value
+        mock_netns_enter.link_lookup.return_value = [1]
+        mock_netns_enter.neigh.side_effect = [
+            None, NetlinkError(errno.ENOENT, None)]
+        self.neigh_cmd.update(
+            [('add', '192.168.45.100', 'cc:dd:ee:ff:ab:cd'),
+             ('delete', 'fd00::10', 'cc:dd:ee:ff:ab:ce')])
+        mock_netns_enter.link_lookup.assert_called_once_with(ifname='tap0')
+        mock_netns_enter.neigh.assert_has_calls([
+            mock.call('replace', ifindex=1, dst='192.168.45.100',
+                      lladdr='cc:dd:ee:ff:ab:cd', family=2,
+                      state=ndmsg.states['permanent']),
+            mock.call('delete', ifindex=1, dst='fd00::10',
+                      lladdr='cc:dd:ee:ff:ab:ce', family=10)])
+
+    @mock.patch.object(pyroute2, 'NetNS')
+    def test_update_entries_nonexistent_namespace(self, mock_netns):
+        mock_netns.side_effect = OSError(errno.ENOENT, None)
+        with testtools.ExpectedException(ip_lib.NetworkNamespaceNotFound):
+            self.neigh_cmd.update(
+                [('add', '192.168.45.100', 'cc:dd:ee:ff:ab:cd')])
+
     @mock.patch.object(pyroute2, 'NetNS')
     def test_dump_entries(self, mock_netns):
         mock_netns_instance = mock_netns.return_value
@@ -13,6 +13,12 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import socket
+
+import mock
+from pyroute2.netlink.rtnl import ifaddrmsg
+from pyroute2.netlink.rtnl import ifinfmsg
+
 from neutron.agent.linux import ip_monitor
 from neutron.tests import base
 
@@ -34,3 +40,137 @@ class TestIPMonitorEvent(base.BaseTestCase):
         self.assertEqual('lo', event.interface)
         self.assertFalse(event.added)
         self.assertEqual('127.0.0.2/8', event.cidr)
+
+    def test_from_netlink_ipv4(self):
+        msg = _addr_msg('RTM_NEWADDR', 3, '192.168.3.59', 24)
+        msg['attrs'].append(['IFA_LOCAL', '192.168.3.60'])
+        event = ip_monitor.IPMonitorEvent.from_netlink(msg, 'eth0', 'ns')
+        self.assertEqual('eth0', event.interface)
+        self.assertTrue(event.added)
+        self.assertEqual('192.168.3.60/24', event.cidr)
+        self.assertEqual('ns', event.namespace)
+        self.assertEqual('3: eth0    inet 192.168.3.60/24', str(event))
+
+    def test_from_netlink_ipv6_deleted(self):
+        msg = _addr_msg('RTM_DELADDR', 3, 'fe80::1', 64,
+                        family=socket.AF_INET6)
+        event = ip_monitor.IPMonitorEvent.from_netlink(msg, 'eth0')
+        self.assertFalse(event.added)
+        self.assertEqual('fe80::1/64', event.cidr)
+        self.assertEqual('Deleted 3: eth0    inet6 fe80::1/64', str(event))
+
+
+def _addr_msg(event, index, address, prefixlen, family=socket.AF_INET,
+              label=None):
+    msg = ifaddrmsg.ifaddrmsg()
+    msg['event'] = event
+    msg['index'] = index
+    msg['family'] = family
+    msg['prefixlen'] = prefixlen
+    msg['attrs'] = [['IFA_ADDRESS', address]]
+    if label:
+        msg['attrs'].append(['IFA_LABEL', label])
+    return msg
+
+
+def _link_msg(event, index, name):
+    msg = ifinfmsg.ifinfmsg()
+    msg['event'] = event
+    msg['index'] = index
+    msg['attrs'] = [['IFLA_IFNAME', name]]
+    return msg
+
+
+class TestNetlinkIPMonitor(base.BaseTestCase):
+    def setUp(self):
+        super(TestNetlinkIPMonitor, self).setUp()
+        self.iproute = mock.patch.object(ip_monitor.pyroute2,
+                                         'IPRoute').start()
+        self.sock = self.iproute.return_value
+        self.sock.fileno.return_value = 7
+        self.sock.get_links.return_value = [_link_msg('RTM_NEWLINK', 2,
+                                                      'qr-1')]
+        self.in_namespace = mock.patch.object(ip_monitor,
+                                              '_in_namespace').start()
+        self.select = mock.patch.object(ip_monitor.select, 'select').start()
+        self.select.return_value = ([7], [], [])
+        self.monitor = ip_monitor.NetlinkIPMonitor(namespaces='qrouter-1')
+
+    def test_start_opens_socket_in_namespace(self):
+        self.monitor.start()
+        self.assertTrue(self.monitor.is_active())
+        self.in_namespace.assert_called_once_with('qrouter-1')
+        self.sock.bind.assert_called_once_with(
+            groups=ip_monitor.NETLINK_GROUPS)
+
+    def test_start_without_namespace(self):
+        monitor = ip_monitor.NetlinkIPMonitor()
+        monitor.start()
+        self.in_namespace.assert_called_once_with(None)
+        self.assertEqual([None], monitor.namespaces)
+
+    def test_start_closes_socket_on_error(self):
+        self.sock.bind.side_effect = OSError
+        self.assertRaises(OSError, self.monitor.start)
+        self.sock.close.assert_called_once_with()
+        self.assertFalse(self.monitor.is_active())
+
+    def test_stop_closes_sockets(self):
+        self.monitor.start()
+        self.monitor.stop()
+        self.sock.close.assert_called_once_with()
+        self.assertFalse(self.monitor.is_active())
+        self.assertEqual([], self.monitor.get_events())
+
+    def test_add_and_remove_namespace(self):
+        monitor = ip_monitor.NetlinkIPMonitor(namespaces=[])
+        monitor.start()
+        self.assertFalse(monitor.is_active())
+        monitor.add_namespace('qrouter-2')
+        self.assertTrue(monitor.is_active())
+        self.assertEqual(['qrouter-2'], monitor.namespaces)
+        self.in_namespace.assert_called_once_with('qrouter-2')
+        monitor.remove_namespace('qrouter-2')
+        self.sock.close.assert_called_once_with()
+        self.assertFalse(monitor.is_active())
+        self.assertEqual([], monitor.namespaces)
+
+    def test_get_events_batches_messages(self):
+        self.sock.get.return_value = [
+            _addr_msg('RTM_NEWADDR', 2, '10.0.0.1', 24),
+            _link_msg('RTM_NEWLINK', 3, 'qg-1'),
+            _addr_msg('RTM_DELADDR', 3, '2001:db8::1', 64,
+                      family=socket.AF_INET6),
+            _addr_msg('RTM_NEWADDR', 4, '10.0.1.1', 24, label='ha-1')]
+        self.monitor.start()
+        events = self.monitor.get_events(timeout=1)
+        self.select.assert_called_once_with([7], [], [], 1)
+        self.assertEqual(
+            [('qr-1', '10.0.0.1/24', True),
+             ('qg-1', '2001:db8::1/64', False),
+             ('ha-1', '10.0.1.1/24', True)],
+            [(e.interface, e.cidr, e.added) for e in events])
+        self.assertEqual({'qrouter-1'}, {e.namespace for e in events})
+
+    def test_get_events_timeout(self):
+        self.select.return_value = ([], [], [])
+        self.monitor.start()
+        self.assertEqual([], self.monitor.get_events(timeout=1))
+        self.assertFalse(self.sock.get.called)
+
+
+class TestInNamespace(base.BaseTestCase):
+    def test_in_namespace(self):
+        with mock.patch.object(ip_monitor.netns, 'setns') as setns, \
+                mock.patch.object(ip_monitor.os, 'open', return_value=99), \
+                mock.patch.object(ip_monitor.os, 'close') as close:
+            with ip_monitor._in_namespace('ns'):
+                setns.assert_called_once_with('ns', flags=0)
+            setns.assert_called_with(99, flags=0)
+            close.assert_called_once_with(99)
+
+    def test_in_namespace_none(self):
+        with mock.patch.object(ip_monitor.netns, 'setns') as setns:
+            with ip_monitor._in_namespace(None):
+                pass
+        self.assertFalse(setns.called)
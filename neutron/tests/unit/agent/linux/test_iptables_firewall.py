@@ -2309,9 +2309,9 @@ class OVSHybridIptablesFirewallTestCase(BaseIptablesFirewallTestCase):
         self.assertEqual(4106,
                    self.firewall.ipconntrack._generate_device_zone('test'))
 
-        # once it's maxed out, it scans for gaps
-        self.firewall.ipconntrack._device_zone_map['someport'] = (
-            ip_conntrack.MAX_CONNTRACK_ZONES)
+        # once it's maxed out, it uses the gaps
+        self.firewall.ipconntrack._zone_allocator.assign(
+            'someport', ip_conntrack.MAX_CONNTRACK_ZONES)
         for i in range(4099, 4105):
             self.assertEqual(i,
                    self.firewall.ipconntrack._generate_device_zone(i))
@@ -2320,15 +2320,14 @@ class OVSHybridIptablesFirewallTestCase(BaseIptablesFirewallTestCase):
         self.assertEqual(4107,
                    self.firewall.ipconntrack._generate_device_zone('p11'))
 
-        # take out zone 4097 and make sure it's selected
-        self.firewall.ipconntrack._device_zone_map.pop('e804433b-61')
+        # release zone 4097, it is only reused after the other free zones
+        self.firewall.ipconntrack._zone_allocator.release('e804433b-61')
+        for i in range(4108, ip_conntrack.MAX_CONNTRACK_ZONES):
+            self.firewall.ipconntrack._generate_device_zone('dev-%s' % i)
         self.assertEqual(4097,
                    self.firewall.ipconntrack._generate_device_zone('p1'))
 
-        # fill it up and then make sure an extra throws an error
-        for i in range(ip_conntrack.ZONE_START,
-            ip_conntrack.MAX_CONNTRACK_ZONES):
-            self.firewall.ipconntrack._device_zone_map['dev-%s' % i] = i
+        # it is full, make sure an extra throws an error
         with testtools.ExpectedException(n_exc.CTZoneExhaustedError):
             self.firewall.ipconntrack._find_open_zone()
 
@@ -2339,6 +2338,13 @@ class OVSHybridIptablesFirewallTestCase(BaseIptablesFirewallTestCase):
         self.assertEqual({'p12': ip_conntrack.ZONE_START},
                    self.firewall.ipconntrack._device_zone_map)
 
+    def test__populate_initial_zone_map_rebuilds_allocator(self):
+        self.assertEqual(3, self.firewall.ipconntrack._zone_allocator.
+                         used_zones())
+        self.firewall.ipconntrack._device_zone_map = {}
+        self.assertEqual(ip_conntrack.ZONE_START,
+                   self.firewall.ipconntrack._generate_device_zone('test'))
+
     def test_get_device_zone(self):
         dev = {'device': 'tap1234', 'network_id': '12345678901234567'}
         # initial data has 4097, 4098, and 4105 in use.
@@ -1099,6 +1099,62 @@ class IptablesManagerStateFulTestCase(IptablesManagerBaseTestCase):
         tools.verify_mock_calls(self.execute, expected_calls_and_values,
                                 any_order=True)
 
+    def test_get_traffic_counters_by_chain(self):
+        self.iptables.ipv4['filter'].add_chain('meter')
+        self.iptables.ipv4['filter'].add_chain('other')
+        if self.use_ipv6:
+            self.iptables.ipv6['filter'].add_chain('meter')
+        wrap = '%s-' % iptables_manager.binary_name
+        save_dump = ('*filter\n'
+                     ':%(wrap)smeter - [0:0]\n'
+                     '[10:1000] -A %(wrap)smeter -s 10.0.0.0/24 -j ACCEPT\n'
+                     '[5:500] -A %(wrap)smeter -d 10.0.0.0/24 -j ACCEPT\n'
+                     '[7:700] -A %(wrap)sother -j ACCEPT\n'
+                     '[3:300] -A %(wrap)smeter-x -j ACCEPT\n'
+                     'COMMIT\n' % {'wrap': wrap})
+
+        expected_calls_and_values = [
+            (mock.call(['iptables-save', '-c', '-t', 'filter'],
+                       run_as_root=True),
+             save_dump)]
+        exp_packets = 15
+        exp_bytes = 1500
+        if self.use_ipv6:
+            expected_calls_and_values.append(
+                (mock.call(['ip6tables-save', '-c', '-t', 'filter'],
+                           run_as_root=True),
+                 save_dump))
+            exp_packets *= 2
+            exp_bytes *= 2
+        tools.setup_mock_calls(self.execute, expected_calls_and_values)
+
+        accs = self.iptables.get_traffic_counters_by_chain(['meter',
+                                                            'missing'])
+        self.assertEqual({'meter': {'pkts': exp_packets,
+                                    'bytes': exp_bytes}}, accs)
+        tools.verify_mock_calls(self.execute, expected_calls_and_values,
+                                any_order=True)
+
+    def test_get_traffic_counters_by_chain_in_namespace(self):
+        iptables = iptables_manager.IptablesManager(namespace='qrouter-1',
+                                                    use_ipv6=False)
+        execute = mock.patch.object(iptables, 'execute').start()
+        execute.return_value = (
+            '*filter\n'
+            '[4:400] -A meter-a -j ACCEPT\n'
+            '[6:600] -A meter-b -j ACCEPT\n'
+            'COMMIT\n')
+        iptables.ipv4['filter'].add_chain('meter-a', wrap=False)
+        iptables.ipv4['filter'].add_chain('meter-b', wrap=False)
+
+        accs = iptables.get_traffic_counters_by_chain(['meter-a', 'meter-b'],
+                                                      wrap=False)
+        self.assertEqual({'meter-a': {'pkts': 4, 'bytes': 400},
+                          'meter-b': {'pkts': 6, 'bytes': 600}}, accs)
+        execute.assert_called_once_with(
+            ['ip', 'netns', 'exec', 'qrouter-1',
+             'iptables-save', '-c', '-t', 'filter'], run_as_root=True)
+
     def test_add_blank_rule(self):
         iptables_args = {}
         iptables_args.update(IPTABLES_ARG)
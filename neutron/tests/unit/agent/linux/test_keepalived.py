@@ -191,6 +191,57 @@ class KeepalivedConfTestCase(base.BaseTestCase,
         self.assertEqual(['192.168.2.0/24', '192.168.3.0/24'], current_vips)
 
 
+class KeepalivedManagerTestCase(base.BaseTestCase,
+                                KeepalivedConfBaseMixin):
+
+    def setUp(self):
+        super(KeepalivedManagerTestCase, self).setUp()
+        self.config = self._get_config()
+        self.process_monitor = mock.Mock()
+        self.manager = keepalived.KeepalivedManager(
+            'router1', self.config, self.process_monitor,
+            conf_path='/ha_confs')
+        mock.patch.object(
+            self.manager, 'get_full_config_file_path',
+            return_value='/ha_confs/router1/keepalived.conf').start()
+        self.replace_file = mock.patch.object(keepalived.file_utils,
+                                              'replace_file').start()
+        mock.patch.object(self.manager, '_get_vrrp_process').start()
+        get_process = mock.patch.object(self.manager, 'get_process').start()
+        self.pm = get_process.return_value
+
+    def _spawn(self, active, conf_on_disk):
+        self.pm.active = active
+        with mock.patch.object(self.manager, 'get_conf_on_disk',
+                               return_value=conf_on_disk):
+            self.manager.spawn()
+        self.process_monitor.register.assert_called_once_with(
+            uuid='router1', service_name=keepalived.KEEPALIVED_SERVICE_NAME,
+            monitored_process=self.pm)
+        self.assertIsNotNone(self.pm.default_cmd_callback)
+
+    def test_spawn(self):
+        self._spawn(False, None)
+        self.replace_file.assert_called_once_with(
+            '/ha_confs/router1/keepalived.conf',
+            self.config.get_config_str())
+        self.pm.enable.assert_called_once_with(reload_cfg=True)
+
+    def test_spawn_reloads_changed_config(self):
+        self._spawn(True, 'old config')
+        self.assertTrue(self.replace_file.called)
+        self.pm.enable.assert_called_once_with(reload_cfg=True)
+
+    def test_spawn_unchanged_config_does_not_reload(self):
+        self._spawn(True, self.config.get_config_str())
+        self.assertFalse(self.replace_file.called)
+        self.assertFalse(self.pm.enable.called)
+
+    def test_spawn_unchanged_config_starts_inactive_process(self):
+        self._spawn(False, self.config.get_config_str())
+        self.pm.enable.assert_called_once_with(reload_cfg=True)
+
+
 class KeepalivedStateExceptionTestCase(base.BaseTestCase):
     def test_state_exception(self):
         invalid_vrrp_state = 'a seal walks'
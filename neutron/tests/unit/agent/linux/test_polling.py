@@ -15,8 +15,10 @@
 import mock
 
 from neutron.agent.common import base_polling
+from neutron.agent.common import ovsdb_monitor
 from neutron.agent.linux import polling
 from neutron.agent.ovsdb.native import helpers
+from neutron.plugins.ml2.drivers.openvswitch.agent.common import constants
 from neutron.tests import base
 
 
@@ -40,6 +42,12 @@ class TestGetPollingManager(base.BaseTestCase):
                 mock_stop.assert_has_calls([mock.call()])
             mock_start.assert_has_calls([mock.call()])
 
+    def test_native_interface_monitor(self):
+        pm = polling.InterfacePollingMinimizer(
+            ovsdb_monitor_interface=constants.OVSDB_MONITOR_NATIVE)
+        self.assertIsInstance(pm._monitor,
+                              ovsdb_monitor.NativeInterfaceMonitor)
+
 
 class TestInterfacePollingMinimizer(base.BaseTestCase):
 
@@ -25,6 +25,7 @@ import oslo_i18n
 
 from neutron.agent.linux import utils
 from neutron.common import exceptions as n_exc
+from neutron.common import stats
 from neutron.tests import base
 from neutron.tests.common import helpers
 
@@ -182,6 +183,106 @@ class AgentUtilsExecuteTest(base.BaseTestCase):
         result = utils.execute(['ls', self.test_file], return_stderr=True)
         self.assertEqual((out_data, err_data), result)
 
+    def test_execute_records_command_latency(self):
+        self.mock_popen.return_value = ('', '')
+        with mock.patch.object(utils, 'COMMAND_STATS') as cmd_stats:
+            utils.execute(['ip', 'netns', 'exec', 'ns', 'ip', 'link'],
+                          run_as_root=True)
+        cmd_stats.observe.assert_called_once_with('ip link', mock.ANY)
+
+    def test_execute_traces_commands(self):
+        self.config(group='AGENT', trace_commands=True)
+        self.mock_popen.return_value = ('', '')
+        self.process.return_value.returncode = 2
+        with mock.patch.object(utils.CommandTracer,
+                               'log_timeline') as log_timeline:
+            with utils.trace_commands('sync'):
+                tracer = utils._command_tracer
+                utils.execute(['conntrack', '-D'], check_exit_code=False)
+        log_timeline.assert_called_once_with()
+        self.assertIsNone(utils._command_tracer)
+        self.assertEqual([('conntrack', 2)],
+                         [(label, rc) for _o, _d, label, rc in
+                          tracer.commands])
+
+    def test_trace_commands_logs_command_stats(self):
+        self.config(group='AGENT', trace_commands=True)
+        self.mock_popen.return_value = ('', '')
+        command_stats = stats.Stats()
+        with mock.patch.object(utils, 'COMMAND_STATS', command_stats), \
+                mock.patch.object(utils.LOG, 'debug') as debug:
+            utils.execute(['ip', 'link'])
+            with utils.trace_commands('sync'):
+                utils.execute(['ip', 'link'])
+            link_stats = utils.get_command_stats()['ip link']
+        # the latency logged covers the commands run before the trace too
+        self.assertEqual(2, link_stats['count'])
+        debug.assert_any_call(
+            "%(label)s latency since the agent started: %(stats)s",
+            {'label': 'ip link', 'stats': link_stats})
+
+    def test_trace_commands_disabled(self):
+        with utils.trace_commands('sync'):
+            self.assertIsNone(utils._command_tracer)
+
+
+class TestGetCommandLabel(base.BaseTestCase):
+
+    def test_plain_command(self):
+        self.assertEqual('iptables-save',
+                         utils.get_command_label(['iptables-save', '-t',
+                                                  'raw']))
+
+    def test_subcommand(self):
+        self.assertEqual('ovs-ofctl add-flows', utils.get_command_label(
+            ['ovs-ofctl', '-O', 'OpenFlow13', 'add-flows', 'br-int', '-']))
+        self.assertEqual('ip addr', utils.get_command_label(
+            ['ip', '-4', 'addr', 'show']))
+
+    def test_env_and_namespace_are_skipped(self):
+        self.assertEqual('ip neigh', utils.get_command_label(
+            ['env', 'A=1', 'B=2', 'ip', 'netns', 'exec', 'qrouter-1',
+             '/sbin/ip', 'neigh', 'replace']))
+
+    def test_empty_command(self):
+        self.assertEqual('', utils.get_command_label([]))
+
+
+class TestRootwrapDaemonPool(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestRootwrapDaemonPool, self).setUp()
+        self.client_cls = mock.patch.object(utils.client, 'Client').start()
+        self.client_cls.side_effect = lambda cmd: mock.Mock()
+        self.pool = utils.RootwrapDaemonPool(['daemon'], 2)
+
+    def test_idle_client_is_reused(self):
+        self.pool.execute(['ls'])
+        self.pool.execute(['ls'])
+        self.assertEqual(1, self.client_cls.call_count)
+
+    def test_busy_clients_grow_pool_up_to_size(self):
+        first = self.pool._get_idle_client()
+        second = self.pool._get_idle_client()
+        self.assertIsNot(first, second)
+        self.pool._idle.put(first)
+        self.assertIs(first, self.pool._get_idle_client())
+        self.assertEqual(2, self.client_cls.call_count)
+
+    def test_client_returned_to_pool_on_error(self):
+        self.client_cls.side_effect = None
+        self.client_cls.return_value.execute.side_effect = RuntimeError
+        self.assertRaises(RuntimeError, self.pool.execute, ['ls'])
+        self.assertEqual(1, self.pool._idle.qsize())
+
+    def test_helper_uses_pool(self):
+        self.config(group='AGENT', root_helper_daemon='daemon',
+                    root_helper_daemon_pool_size=4)
+        mock.patch.object(utils.RootwrapDaemonHelper,
+                          '_RootwrapDaemonHelper__client', None).start()
+        self.assertIsInstance(utils.RootwrapDaemonHelper.get_client(),
+                              utils.RootwrapDaemonPool)
+
 
 class AgentUtilsExecuteEncodeTest(base.BaseTestCase):
     def setUp(self):
@@ -0,0 +1,64 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+import psutil
+
+from neutron.cmd import memory_report
+from neutron.tests import base
+
+MIB = 1024 * 1024
+
+
+def _fake_process(pid, cmdline, rss, uss):
+    process = mock.Mock(pid=pid)
+    process.cmdline.return_value = cmdline
+    process.memory_full_info.return_value = mock.Mock(rss=rss, uss=uss)
+    return process
+
+
+class TestMemoryReport(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestMemoryReport, self).setUp()
+        self.parent = _fake_process(1, ['neutron-server'], 100 * MIB,
+                                    60 * MIB)
+        self.workers = [
+            _fake_process(2, ['neutron-server'], 80 * MIB, 10 * MIB),
+            _fake_process(3, ['neutron-server'], 90 * MIB, 20 * MIB)]
+        self.parent.children.return_value = self.workers
+        mock.patch.object(psutil, 'Process',
+                          return_value=self.parent).start()
+
+    def test_get_process_memory(self):
+        self.assertEqual(
+            memory_report.ProcessMemory(2, 'neutron-server', 80 * MIB,
+                                        10 * MIB, 70 * MIB),
+            memory_report.get_process_memory(self.workers[0]))
+
+    def test_collect_skips_vanished_processes(self):
+        self.workers[1].memory_full_info.side_effect = psutil.NoSuchProcess(3)
+        report = memory_report.collect(1)
+        self.assertEqual([1, 2], [mem.pid for mem in report])
+        self.parent.children.assert_called_once_with(recursive=True)
+
+    def test_summarize_groups_workers(self):
+        summary = memory_report.summarize(memory_report.collect(1))
+        self.assertEqual(
+            {'neutron-server (parent)': (1, 100 * MIB, 60 * MIB, 40 * MIB),
+             'neutron-server': (2, 170 * MIB, 30 * MIB, 140 * MIB)},
+            dict(summary))
+
+    def test_format_report(self):
+        report = memory_report.format_report(memory_report.collect(1))
+        self.assertIn('170.0', report)
+        self.assertIn('neutron-server (parent)', report)
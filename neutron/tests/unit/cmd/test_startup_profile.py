@@ -0,0 +1,95 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import sys
+
+import mock
+from six.moves import builtins
+
+from neutron.cmd import startup_profile
+from neutron.tests import base
+
+
+class TestImportTimer(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestImportTimer, self).setUp()
+        self.timer = startup_profile.ImportTimer()
+        self.addCleanup(self.timer.stop)
+
+    def test_start_stop_restores_import(self):
+        orig_import = builtins.__import__
+        self.timer.start()
+        self.assertNotEqual(orig_import, builtins.__import__)
+        self.timer.stop()
+        self.assertEqual(orig_import, builtins.__import__)
+
+    def test_only_new_modules_are_timed(self):
+        name = 'neutron.tests.unit.cmd._startup_profile_dummy'
+        self.addCleanup(sys.modules.pop, name, None)
+        with mock.patch.dict(sys.modules, {name: mock.Mock()}):
+            self.timer.start()
+            __import__(name)
+            self.timer.stop()
+        self.assertNotIn(name, self.timer.timings)
+
+    def test_nested_import_time_is_not_own_time(self):
+        self.timer._orig_import = mock.Mock()
+        with mock.patch.object(startup_profile.time, 'time',
+                               side_effect=[0.0, 1.0, 3.0, 10.0]), \
+                mock.patch.dict(sys.modules):
+
+            def fake_import(name, *args, **kwargs):
+                if name == 'outer':
+                    self.timer._timed_import('inner')
+                sys.modules[name] = mock.Mock()
+
+            self.timer._orig_import.side_effect = fake_import
+            self.timer._timed_import('outer')
+
+        self.assertEqual(startup_profile.ImportTiming('inner', 2.0, 2.0),
+                         self.timer.timings['inner'])
+        self.assertEqual(startup_profile.ImportTiming('outer', 10.0, 8.0),
+                         self.timer.timings['outer'])
+        self.assertEqual(['outer', 'inner'],
+                         [t.module for t in self.timer.top(2)])
+
+
+class TestStartupProfiler(base.BaseTestCase):
+
+    def test_profile_runs_stages_in_order(self):
+        calls = []
+        stages = [('first', lambda: calls.append('first')),
+                  ('second', lambda: calls.append('second'))]
+        profiler = startup_profile.StartupProfiler()
+        profiler.profile(stages)
+        self.assertEqual(['first', 'second'], calls)
+        self.assertEqual(['first', 'second'],
+                         [s.name for s in profiler.stages])
+
+    def test_stage_is_recorded_on_failure(self):
+        profiler = startup_profile.StartupProfiler()
+        self.assertRaises(ValueError, profiler.profile,
+                          [('broken', mock.Mock(side_effect=ValueError))])
+        self.assertEqual(['broken'], [s.name for s in profiler.stages])
+        self.assertIsNone(profiler.import_timer._orig_import)
+
+    def test_format_report(self):
+        profiler = startup_profile.StartupProfiler()
+        profiler.stages = [startup_profile.StageTiming('plugins', 1.5),
+                           startup_profile.StageTiming('policy', 0.5)]
+        profiler.import_timer.timings = {
+            'a': startup_profile.ImportTiming('a', 1.0, 0.25)}
+        report = startup_profile.format_report(profiler, 10)
+        self.assertIn('plugins', report)
+        self.assertIn('2.000', report)
+        self.assertIn('0.250', report)
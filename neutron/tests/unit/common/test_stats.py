@@ -0,0 +1,74 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from neutron.common import stats
+from neutron.tests import base
+
+
+class TestHistogram(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestHistogram, self).setUp()
+        self.histogram = stats.Histogram(buckets=(1, 2, 5))
+
+    def test_empty(self):
+        self.assertEqual(0, self.histogram.count)
+        self.assertEqual(0.0, self.histogram.mean)
+        self.assertEqual(0.0, self.histogram.percentile(99))
+
+    def test_observe(self):
+        for value in (0.5, 1, 1.5, 3, 7):
+            self.histogram.observe(value)
+        self.assertEqual([2, 1, 1, 1], self.histogram.counts)
+        self.assertEqual(5, self.histogram.count)
+        self.assertEqual(13, self.histogram.sum)
+        self.assertEqual(7, self.histogram.max)
+
+    def test_percentile(self):
+        for value in (0.5, 0.5, 0.5, 1.5, 7):
+            self.histogram.observe(value)
+        self.assertEqual(1, self.histogram.percentile(50))
+        self.assertEqual(2, self.histogram.percentile(80))
+        self.assertEqual(7, self.histogram.percentile(99))
+
+
+class TestStats(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestStats, self).setUp()
+        self.stats = stats.Stats()
+
+    def test_counters(self):
+        self.stats.increment('a')
+        self.stats.increment('a', 2)
+        self.assertEqual(3, self.stats.get_counter('a'))
+        self.assertEqual(0, self.stats.get_counter('b'))
+
+    def test_timer(self):
+        with mock.patch.object(stats.time, 'time', side_effect=[1.0, 1.5]):
+            with self.stats.timer('op'):
+                pass
+        histogram = self.stats.get_histogram('op')
+        self.assertEqual(1, histogram.count)
+        self.assertEqual(0.5, histogram.sum)
+
+    def test_to_dict_and_reset(self):
+        self.stats.increment('a')
+        self.stats.observe('op', 0.2)
+        result = self.stats.to_dict()
+        self.assertEqual({'a': 1}, result['counters'])
+        self.assertEqual(1, result['histograms']['op']['count'])
+        self.stats.reset()
+        self.assertEqual({'counters': {}, 'histograms': {}},
+                         self.stats.to_dict())
@@ -18,6 +18,7 @@ import copy
 import datetime
 
 import mock
+from neutron_lib.agent import constants as agent_consts
 from neutron_lib import constants
 from neutron_lib import context
 from neutron_lib import exceptions as n_exc
@@ -181,7 +182,7 @@ class TestAgentsDbMixin(TestAgentsDbBase):
                    'heartbeat_timestamp': '2015-05-06 22:40:40.432295',
                    'host': 'some.node',
                    'alive': True}]
-        with mock.patch.object(self.plugin, 'get_agents',
+        with mock.patch.object(self.plugin, '_get_enabled_agents_liveness',
                                return_value=agents),\
                 mock.patch.object(agents_db.LOG, 'warning') as warn,\
                 mock.patch.object(agents_db.LOG, 'debug') as debug:
@@ -197,6 +198,20 @@ class TestAgentsDbMixin(TestAgentsDbBase):
                  "          DHCP Agent 2015-05-06 22:40:40.432295 some.node"}
             )
 
+    def test__get_enabled_agents_liveness(self):
+        agents = self._create_and_save_agents(['host-1', 'host-2', 'host-3'],
+                                              constants.AGENT_TYPE_L3,
+                                              down_agents_count=1)
+        agents[2].admin_state_up = False
+        agents[2].update()
+        liveness = self.plugin._get_enabled_agents_liveness(self.context)
+        self.assertEqual(
+            [{'agent_type': constants.AGENT_TYPE_L3, 'host': agent.host,
+              'heartbeat_timestamp': agent.heartbeat_timestamp,
+              'alive': alive}
+             for agent, alive in ((agents[0], False), (agents[1], True))],
+            sorted(liveness, key=lambda agent: agent['host']))
+
     def test__get_dict(self):
         db_obj = mock.Mock(conf1='{"test": "1234"}')
         conf1 = self.plugin._get_dict(db_obj, 'conf1')
@@ -240,6 +255,100 @@ class TestAgentsDbMixin(TestAgentsDbBase):
         self.assertEqual(tracker.set_versions.call_count, 2)
 
 
+class TestAgentHeartbeats(TestAgentsDbBase):
+
+    def setUp(self):
+        super(TestAgentHeartbeats, self).setUp()
+        cfg.CONF.set_override('agent_heartbeat_flush_interval', 10)
+        self.queue_event = mock.patch.object(
+            agents_db.batch_notifier.BatchNotifier, 'queue_event').start()
+        self.agent_status = dict(AGENT_STATUS, configurations={'a': 1},
+                                 start_flag=True)
+        self.plugin.create_or_update_agent(self.context, self.agent_status)
+        self.heartbeats = self.plugin._get_agent_heartbeats()
+        self.agent = self._get_agent()
+        # the following reports are regular heartbeats
+        del self.agent_status['start_flag']
+        del self.agent_status['resource_versions']
+
+    def _get_agent(self):
+        # the heartbeats are flushed from another session
+        self.context.session.expire_all()
+        return agent_obj.Agent.get_objects(self.context)[0]
+
+    def _report(self, **kwargs):
+        status = dict(self.agent_status, **kwargs)
+        return self.plugin.create_or_update_agent(self.context, status)[0]
+
+    def test_unchanged_report_coalesced(self):
+        with mock.patch.object(agents_db.registry, 'notify') as notify:
+            self.assertEqual(agent_consts.AGENT_ALIVE, self._report())
+        notify.assert_called_once_with(
+            agents_db.resources.AGENT, agents_db.events.AFTER_UPDATE,
+            self.plugin, context=self.context, host=self.agent.host,
+            plugin=self.plugin, agent=mock.ANY)
+        self.queue_event.assert_called_once_with(self.agent.id)
+        self.assertEqual(self.agent.heartbeat_timestamp,
+                         self._get_agent().heartbeat_timestamp)
+        self.assertEqual({'agents': 1, 'written': 1, 'coalesced': 1,
+                          'flushes': 0, 'flushed': 0},
+                         self.heartbeats.get_stats())
+
+    def test_changed_report_written(self):
+        self._report(configurations={'a': 2})
+        self.assertFalse(self.queue_event.called)
+        self.assertEqual({'a': 2}, self.plugin.get_configuration_dict(
+            self._get_agent()))
+        self._report(configurations={'a': 2})
+        self.assertEqual(1, self.queue_event.call_count)
+
+    def test_restarted_agent_written(self):
+        self.assertEqual(agent_consts.AGENT_ALIVE,
+                         self._report(start_flag=True))
+        self.assertFalse(self.queue_event.called)
+        self.assertEqual(2, self.heartbeats.get_stats()['written'])
+
+    def test_down_agent_revived(self):
+        key = (self.agent.agent_type, self.agent.host)
+        hour_ago = timeutils.utcnow() - datetime.timedelta(hours=1)
+        self.heartbeats.agents[key]['heartbeat'] = hour_ago
+        self.agent.heartbeat_timestamp = hour_ago
+        self.agent.update()
+        self.assertEqual(agent_consts.AGENT_REVIVED, self._report())
+        self.assertFalse(self.queue_event.called)
+
+    def test_flush(self):
+        self._report()
+        key = (self.agent.agent_type, self.agent.host)
+        heartbeat = self.heartbeats.agents[key]['heartbeat']
+        self.heartbeats._flush([self.agent.id, self.agent.id])
+        self.assertEqual(heartbeat, self._get_agent().heartbeat_timestamp)
+        self.assertEqual(1, self.heartbeats.get_stats()['flushed'])
+
+    def test_flush_keeps_newer_heartbeats(self):
+        self._report()
+        key = (self.agent.agent_type, self.agent.host)
+        newer = self.heartbeats.agents[key]['heartbeat'] + datetime.timedelta(
+            seconds=5)
+        agent = self._get_agent()
+        agent.heartbeat_timestamp = newer
+        agent.update()
+        self.heartbeats._flush([self.agent.id])
+        self.assertEqual(newer, self._get_agent().heartbeat_timestamp)
+        self.assertEqual(newer, self.heartbeats.agents[key]['heartbeat'])
+
+    def test_flush_forgets_deleted_agents(self):
+        self.agent.delete()
+        self.heartbeats._flush([self.agent.id])
+        self.assertEqual({}, self.heartbeats.agents)
+        self._report()
+        self.assertEqual(1, len(agent_obj.Agent.get_objects(self.context)))
+
+    def test_delete_agent_forgets_agent(self):
+        self.plugin.delete_agent(self.context, self.agent.id)
+        self.assertEqual({}, self.heartbeats.agents)
+
+
 class TestAgentsDbGetAgents(TestAgentsDbBase):
     scenarios = [
         ('Get all agents', dict(agents=5, down_agents=2,
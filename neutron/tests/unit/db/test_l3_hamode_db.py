@@ -830,6 +830,44 @@ class L3HATestCase(L3HATestFramework):
             self.admin_ctx, self.agent1['host'], self.agent1)
         self.assertEqual('active', routers[0][n_const.HA_ROUTER_STATE_KEY])
 
+    def test_set_router_states_bulk(self):
+        router1 = self._create_router()
+        router2 = self._create_router()
+        router3 = self._create_router()
+        ctx = self.admin_ctx
+        router_ids = [router1['id'], router2['id'], router3['id']]
+        bindings = self.plugin.get_ha_router_port_bindings(
+            ctx, router_ids, self.agent1['host'])
+        states = {router1['id']: n_const.HA_ROUTER_STATE_ACTIVE,
+                  router2['id']: n_const.HA_ROUTER_STATE_STANDBY,
+                  router3['id']: n_const.HA_ROUTER_STATE_ACTIVE}
+        with mock.patch.object(ctx.session, 'query',
+                               wraps=ctx.session.query) as query:
+            self.plugin._set_router_states(ctx, bindings, states)
+        # router2 is already standby and a single UPDATE is needed for
+        # router1 and router3
+        self.assertEqual(1, query.call_count)
+
+        bindings = self.plugin.get_ha_router_port_bindings(
+            ctx, router_ids, self.agent1['host'])
+        self.assertEqual(states, {binding.router_id: binding.state
+                                  for binding in bindings})
+        bindings = self.plugin.get_ha_router_port_bindings(
+            ctx, router_ids, self.agent2['host'])
+        self.assertEqual({n_const.HA_ROUTER_STATE_STANDBY},
+                         {binding.state for binding in bindings})
+
+    def test_set_router_states_unchanged(self):
+        router = self._create_router()
+        ctx = self.admin_ctx
+        bindings = self.plugin.get_ha_router_port_bindings(
+            ctx, [router['id']])
+        with mock.patch.object(ctx.session, 'query') as query:
+            self.plugin._set_router_states(
+                ctx, bindings,
+                {router['id']: n_const.HA_ROUTER_STATE_STANDBY})
+        self.assertFalse(query.called)
+
     def test_update_routers_states_port_not_found(self):
         router1 = self._create_router()
         port = {'id': 'foo', 'device_id': router1['id']}
@@ -1161,6 +1199,32 @@ class L3HAModeDbTestCase(L3HATestFramework):
             update_port_mock.assert_called_with(
                 mock.ANY, iface['port_id'], port_payload)
 
+    def test_update_router_port_bindings_skips_bound_ports(self):
+        network_id = self._create_network(self.core_plugin, self.admin_ctx)
+        subnet = self._create_subnet(self.core_plugin, self.admin_ctx,
+                                     network_id)
+        router = self._create_router()
+        self.plugin.add_router_interface(self.admin_ctx, router['id'],
+                                         {'subnet_id': subnet['id']})
+        self.plugin._update_router_port_bindings(
+            self.admin_ctx, {router['id']: 'active'}, self.agent1['host'])
+
+        with mock.patch.object(
+                self.plugin._core_plugin, 'update_port') as update_port_mock:
+            self.plugin._update_router_port_bindings(
+                self.admin_ctx, {router['id']: 'active'},
+                self.agent1['host'])
+        self.assertFalse(update_port_mock.called)
+
+    def test_update_router_port_bindings_standby_only(self):
+        router = self._create_router()
+        with mock.patch.object(
+                self.plugin._core_plugin, 'get_ports') as get_ports_mock:
+            self.plugin._update_router_port_bindings(
+                self.admin_ctx, {router['id']: 'standby'},
+                self.agent1['host'])
+        self.assertFalse(get_ports_mock.called)
+
     def test_update_all_ha_network_port_statuses(self):
         router = self._create_router(ha=True)
         callback = l3_rpc.L3RpcCallback()
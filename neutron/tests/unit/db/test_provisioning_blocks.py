@@ -146,3 +146,68 @@ class TestStatusBarriers(testlib_api.SqlTestCase):
         pb.add_provisioning_component(self.ctx, net.id, 'NETWORK', 'ent')
         pb.provisioning_complete(self.ctx, net.id, 'NETWORK', 'ent')
         self.assertTrue(provisioned.called)
+
+    def _subscribe_bulk(self):
+        provisioned = mock.Mock()
+        registry.subscribe(provisioned, resources.PORT,
+                           pb.PROVISIONING_COMPLETE_BULK)
+        return provisioned
+
+    def test_provisioning_complete_bulk(self):
+        provisioned = self._subscribe_bulk()
+        port2 = self._make_port()
+        port3 = self._make_port()
+        for port in (self.port, port2, port3):
+            pb.add_provisioning_component(self.ctx, port.id, resources.PORT,
+                                          'entity1')
+        pb.add_provisioning_component(self.ctx, port2.id, resources.PORT,
+                                      'entity2')
+        completed = pb.provisioning_complete_bulk(
+            self.ctx, [port3.id, 'someid', port2.id, self.port.id],
+            resources.PORT, 'entity1')
+        self.assertEqual([port3.id, self.port.id], completed)
+        provisioned.assert_called_once_with(
+            resources.PORT, pb.PROVISIONING_COMPLETE_BULK, mock.ANY,
+            context=self.ctx, object_ids=completed)
+        # the subscribers of the individual ports are notified too
+        self.provisioned.assert_has_calls([
+            mock.call(resources.PORT, pb.PROVISIONING_COMPLETE, mock.ANY,
+                      context=self.ctx, object_id=object_id, bulk=True)
+            for object_id in completed])
+        self.assertEqual(2, self.provisioned.call_count)
+        self.assertEqual({port2.id}, pb.get_blocked_object_ids(
+            self.ctx, [self.port.id, port2.id, port3.id], resources.PORT))
+
+    def test_provisioning_complete_bulk_all_blocked(self):
+        provisioned = self._subscribe_bulk()
+        pb.add_provisioning_component(self.ctx, self.port.id, resources.PORT,
+                                      'entity1')
+        self.assertEqual([], pb.provisioning_complete_bulk(
+            self.ctx, [self.port.id], resources.PORT, 'entity2'))
+        self.assertEqual([], pb.provisioning_complete_bulk(
+            self.ctx, ['someid'], resources.PORT, 'entity1'))
+        self.assertFalse(provisioned.called)
+        self.assertFalse(self.provisioned.called)
+
+    def test_provisioning_complete_bulk_stats(self):
+        pb.PROVISIONING_STATS.reset()
+        ports = [self._make_port() for i in range(5)]
+        for port in ports:
+            pb.add_provisioning_component(self.ctx, port.id, resources.PORT,
+                                          'entity1')
+        with mock.patch.object(pb.LOG, 'debug') as debug:
+            pb.provisioning_complete_bulk(
+                self.ctx, [port.id for port in ports], resources.PORT,
+                'entity1')
+        debug.assert_called_with("Bulk provisioning stats: %s",
+                                 pb.PROVISIONING_STATS.to_dict())
+        counters = pb.PROVISIONING_STATS.to_dict()['counters']
+        self.assertEqual(2, counters['queries'])
+        self.assertEqual(1, counters['transactions'])
+        self.assertEqual(5, counters['completed'])
+
+    def test_provisioning_complete_bulk_in_transaction(self):
+        with self.ctx.session.begin():
+            self.assertRaises(RuntimeError, pb.provisioning_complete_bulk,
+                              self.ctx, [self.port.id], resources.PORT,
+                              'entity1')
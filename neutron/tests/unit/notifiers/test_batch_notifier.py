@@ -61,3 +61,98 @@ class TestBatchNotifier(base.BaseTestCase):
                 # wait for coroutines to finish
                 eventlet.sleep(0.1)
             self.assertTrue(send_events.called)
+
+    def test_queue_event_single_dispatcher(self):
+        for i in range(10):
+            self.notifier.queue_event(mock.Mock())
+        self.assertEqual(10, len(self.notifier.pending_events))
+        self.spawn_n.assert_called_once_with(self.notifier._dispatch)
+
+    def _dispatch(self):
+        with mock.patch.object(batch_notifier.eventlet, 'sleep') as sleep:
+            self.notifier._dispatch()
+        self.assertFalse(self.notifier._dispatching)
+        return sleep
+
+    def test_dispatch_batch_size(self):
+        notifier = batch_notifier.BatchNotifier(0.1, mock.Mock(),
+                                                batch_size=2)
+        self.notifier = notifier
+        for i in range(5):
+            notifier.queue_event(i + 1)
+        sleep = self._dispatch()
+        self.assertEqual([mock.call([1, 2]), mock.call([3, 4]),
+                          mock.call([5])], notifier.callback.call_args_list)
+        self.assertEqual(3, sleep.call_count)
+        stats = notifier.get_stats()
+        self.assertEqual(0, stats['queue_length'])
+        self.assertEqual(5, stats['max_queue_length'])
+        self.assertEqual(3, stats['batches_sent'])
+        self.assertEqual(5, stats['events_sent'])
+
+    def test_dispatch_callback_failure(self):
+        self.notifier.callback = mock.Mock(side_effect=[Exception, None])
+        self.notifier.batch_size = 1
+        self.notifier.queue_event(1)
+        self.notifier.queue_event(2)
+        self._dispatch()
+        self.assertEqual([mock.call([1]), mock.call([2])],
+                         self.notifier.callback.call_args_list)
+
+    def test_dispatch_stops_when_nothing_sent(self):
+        self.notifier.queue_event(mock.Mock())
+        with mock.patch.object(self.notifier, '_notify'):
+            self._dispatch()
+        self.assertEqual(1, len(self.notifier.pending_events))
+        self.notifier.queue_event(mock.Mock())
+        self.assertEqual(2, self.spawn_n.call_count)
+
+    def test_queue_event_backpressure(self):
+        notifier = batch_notifier.BatchNotifier(0.1, mock.Mock(),
+                                                max_queued=2)
+        for i in range(3):
+            notifier.queue_event(i + 1)
+        notifier.callback.assert_called_once_with([1, 2])
+        self.assertEqual([3], notifier.pending_events)
+        stats = notifier.get_stats()
+        self.assertEqual(1, stats['backpressure'])
+        self.assertEqual(0, stats['events_dropped'])
+        self.assertEqual(1, self.spawn_n.call_count)
+
+    def test_queue_event_backpressure_failing_callback(self):
+        notifier = batch_notifier.BatchNotifier(
+            0.1, mock.Mock(side_effect=Exception), max_queued=1)
+        notifier.queue_event(1)
+        # the caller is not failed by the callback
+        notifier.queue_event(2)
+        notifier.callback.assert_called_once_with([1])
+        self.assertEqual([2], notifier.pending_events)
+
+    def test_queue_event_drops_oldest_events(self):
+        notifier = batch_notifier.BatchNotifier(0.1, mock.Mock(),
+                                                max_queued=2,
+                                                drop_oldest=True)
+        for i in range(4):
+            notifier.queue_event(i + 1)
+        self.assertFalse(notifier.callback.called)
+        self.assertEqual([3, 4], notifier.pending_events)
+        self.assertEqual(2, notifier.get_stats()['events_dropped'])
+        self.assertEqual(1, self.spawn_n.call_count)
+
+    def test_queue_event_full_with_failing_callback(self):
+        notifier = batch_notifier.BatchNotifier(
+            0.1, mock.Mock(side_effect=Exception), max_queued=2,
+            drop_oldest=True)
+        self.notifier = notifier
+        for i in range(3):
+            # the caller is neither delayed nor failed by the callback
+            notifier.queue_event(i + 1)
+        self.assertFalse(notifier.callback.called)
+        self.assertEqual([2, 3], notifier.pending_events)
+        with mock.patch.object(batch_notifier.LOG, 'warning') as warning:
+            self._dispatch()
+        notifier.callback.assert_called_once_with([2, 3])
+        self.assertTrue(warning.called)
+        stats = notifier.get_stats()
+        self.assertEqual(1, stats['events_dropped'])
+        self.assertEqual(0, stats['queue_length'])
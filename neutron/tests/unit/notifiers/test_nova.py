@@ -246,15 +246,82 @@ class TestNovaNotify(base.BaseTestCase):
         with mock.patch.object(
             self.nova_notifier.nclient.server_external_events,
                 'create') as nclient_create:
-            nclient_create.side_effect = nova_exceptions.NotFound
-            self.nova_notifier.send_events([])
+            nclient_create.side_effect = nova_exceptions.NotFound(404)
+            self.nova_notifier.send_events([self._event()])
+            self.assertEqual(1, nclient_create.call_count)
 
     def test_nova_send_events_raises(self):
+        cfg.CONF.set_override('send_events_max_retries', 2)
         with mock.patch.object(
             self.nova_notifier.nclient.server_external_events,
-                'create') as nclient_create:
+                'create') as nclient_create, \
+                mock.patch.object(nova.eventlet, 'sleep') as sleep:
             nclient_create.side_effect = Exception
-            self.nova_notifier.send_events([])
+            self.nova_notifier.send_events([self._event()])
+        self.assertEqual(3, nclient_create.call_count)
+        sleep.assert_has_calls([mock.call(nova.SEND_EVENTS_RETRY_DELAY),
+                                mock.call(nova.SEND_EVENTS_RETRY_DELAY * 2)])
+        self.assertEqual(
+            1, self.nova_notifier.stats.get_counter('events_failed'))
+
+    def test_nova_send_events_retries(self):
+        with mock.patch.object(
+            self.nova_notifier.nclient.server_external_events,
+                'create') as nclient_create, \
+                mock.patch.object(nova.eventlet, 'sleep'):
+            nclient_create.side_effect = [
+                nova_exceptions.ClientException(503), [{'code': 200}]]
+            self.nova_notifier.send_events([self._event()])
+        self.assertEqual(2, nclient_create.call_count)
+        self.assertEqual(1, self.nova_notifier.stats.get_counter('retries'))
+        self.assertEqual(
+            1, self.nova_notifier.stats.get_counter('events_sent'))
+
+    def test_nova_send_events_client_error_not_retried(self):
+        with mock.patch.object(
+            self.nova_notifier.nclient.server_external_events,
+                'create') as nclient_create, \
+                mock.patch.object(nova.eventlet, 'sleep') as sleep:
+            nclient_create.side_effect = nova_exceptions.BadRequest(400)
+            self.nova_notifier.send_events([self._event()])
+        self.assertEqual(1, nclient_create.call_count)
+        self.assertFalse(sleep.called)
+
+    @staticmethod
+    def _event(name=nova.VIF_PLUGGED, port_id='port-1',
+               status='completed'):
+        return {'server_uuid': '32102d7b-1cf4-404d-b50a-97aae1f55f87',
+                'name': name, 'status': status, 'tag': port_id}
+
+    def test_nova_send_events_coalesced(self):
+        events = [self._event(),
+                  self._event(nova.VIF_UNPLUGGED),
+                  self._event(port_id='port-2', status='failed'),
+                  self._event(),
+                  self._event(port_id='port-2')]
+        with mock.patch.object(
+            self.nova_notifier.nclient.server_external_events,
+                'create', return_value=[]) as nclient_create:
+            self.nova_notifier.send_events(events)
+        nclient_create.assert_called_once_with(
+            [self._event(nova.VIF_UNPLUGGED), self._event(),
+             self._event(port_id='port-2')])
+        self.assertEqual(0.4, self.nova_notifier.get_stats()['dedupe_ratio'])
+
+    def test_nova_send_events_chunked(self):
+        cfg.CONF.set_override('send_events_batch_size', 2)
+        events = [self._event(port_id='port-%d' % i) for i in range(5)]
+        with mock.patch.object(
+            self.nova_notifier.nclient.server_external_events,
+                'create', return_value=[]) as nclient_create:
+            self.nova_notifier.send_events(events)
+        self.assertEqual([mock.call(events[0:2]), mock.call(events[2:4]),
+                          mock.call(events[4:])],
+                         nclient_create.call_args_list)
+        stats = self.nova_notifier.get_stats()
+        self.assertEqual(3, stats['requests'])
+        self.assertEqual(0, stats['queue_length'])
+        self.assertEqual(3, stats['send_latency']['count'])
 
     def test_nova_send_events_returns_non_200(self):
         device_id = '32102d7b-1cf4-404d-b50a-97aae1f55f87'
@@ -314,7 +314,8 @@ class TunnelRpcCallbackTestMixin(object):
         super(TunnelRpcCallbackTestMixin, self).setUp()
         self.driver = self.DRIVER_CLASS()
 
-    def _test_tunnel_sync(self, kwargs, delete_tunnel=False):
+    def _test_tunnel_sync(self, kwargs, delete_tunnel=False,
+                          update_tunnel=True):
         with mock.patch.object(self.notifier,
                                'tunnel_update') as tunnel_update,\
                 mock.patch.object(self.notifier,
@@ -324,7 +325,7 @@ class TunnelRpcCallbackTestMixin(object):
             for tunnel in tunnels:
                 self.assertEqual(kwargs['tunnel_ip'], tunnel['ip_address'])
                 self.assertEqual(kwargs['host'], tunnel['host'])
-            self.assertTrue(tunnel_update.called)
+            self.assertEqual(update_tunnel, tunnel_update.called)
             if delete_tunnel:
                 self.assertTrue(tunnel_delete.called)
             else:
@@ -369,7 +370,54 @@ class TunnelRpcCallbackTestMixin(object):
 
         kwargs = {'tunnel_ip': TUNNEL_IP_ONE, 'tunnel_type': self.TYPE,
                   'host': HOST_ONE}
-        self._test_tunnel_sync(kwargs)
+        # The other agents already have the tunnel
+        self._test_tunnel_sync(kwargs, update_tunnel=False)
+
+    def test_tunnel_sync_called_for_existing_endpoint_without_host(self):
+        self.driver.add_endpoint(TUNNEL_IP_ONE, None)
+
+        kwargs = {'tunnel_ip': TUNNEL_IP_ONE, 'tunnel_type': self.TYPE,
+                  'host': None}
+        self._test_tunnel_sync(kwargs, update_tunnel=False)
+
+    def test_tunnel_sync_with_tunnels_generation(self):
+        kwargs = {'tunnel_ip': TUNNEL_IP_ONE, 'tunnel_type': self.TYPE,
+                  'host': HOST_ONE}
+        with mock.patch.object(self.notifier, 'tunnel_update'):
+            details = self.callbacks.tunnel_sync('fake_context', **kwargs)
+            generation = details['tunnels_generation']
+
+            # Unchanged tunnels are not returned again
+            kwargs['tunnels_generation'] = generation
+            details = self.callbacks.tunnel_sync('fake_context', **kwargs)
+            self.assertEqual({'tunnels_generation': generation}, details)
+
+            # A new endpoint changes the generation
+            self.driver.add_endpoint(TUNNEL_IP_TWO, HOST_TWO)
+            details = self.callbacks.tunnel_sync('fake_context', **kwargs)
+        self.assertNotEqual(generation, details['tunnels_generation'])
+        self.assertEqual(
+            sorted([TUNNEL_IP_ONE, TUNNEL_IP_TWO]),
+            sorted(tunnel['ip_address'] for tunnel in details['tunnels']))
+
+    def test_tunnel_sync_looks_up_endpoints_once(self):
+        self.driver.add_endpoint(TUNNEL_IP_ONE, HOST_ONE)
+
+        kwargs = {'tunnel_ip': TUNNEL_IP_ONE, 'tunnel_type': self.TYPE,
+                  'host': HOST_ONE}
+        driver_cls = self.DRIVER_CLASS
+        with mock.patch.object(driver_cls, 'get_endpoints', autospec=True,
+                               side_effect=driver_cls.get_endpoints) as get, \
+                mock.patch.object(driver_cls,
+                                  'get_endpoint_by_host') as by_host, \
+                mock.patch.object(driver_cls,
+                                  'get_endpoint_by_ip') as by_ip, \
+                mock.patch.object(driver_cls, 'add_endpoint') as add:
+            self.callbacks.tunnel_sync('fake_context', **kwargs)
+        self.assertEqual(1, get.call_count)
+        self.assertFalse(by_host.called)
+        self.assertFalse(by_ip.called)
+        self.assertFalse(add.called)
 
     def test_tunnel_sync_called_for_existing_host_with_tunnel_ip_changed(self):
         self.driver.add_endpoint(TUNNEL_IP_ONE, HOST_ONE)
@@ -510,6 +510,43 @@ class TestL2PopulationRpcTestCase(test_plugin.Ml2PluginV2TestCase):
                     self.mock_fanout.assert_called_with(
                         mock.ANY, 'add_fdb_entries', expected)
 
+    def test_fdb_add_first_port_of_agent_in_device_list(self):
+        self._register_ml2_agents()
+
+        with self.subnet(network=self._network) as subnet:
+            with self.port(subnet=subnet,
+                           device_owner=DEVICE_OWNER_COMPUTE,
+                           arg_list=(portbindings.HOST_ID,),
+                           **{portbindings.HOST_ID: HOST_4}) as port1:
+                p1 = port1['port']
+                self.callbacks.update_device_up(self.adminContext,
+                                                agent_id=HOST_4,
+                                                device='tap' + p1['id'])
+                with self.port(subnet=subnet,
+                               device_owner=DEVICE_OWNER_COMPUTE,
+                               arg_list=(portbindings.HOST_ID,),
+                               **{portbindings.HOST_ID: HOST}) as port2:
+                    p2 = port2['port']
+
+                    self.mock_cast.reset_mock()
+                    self.callbacks.update_device_list(
+                        self.adminContext, agent_id=HOST, host=HOST,
+                        devices_up=['tap' + p2['id']], devices_down=[])
+
+                    # the agent of the first port on the network gets the
+                    # whole FDB of the network
+                    p1_ips = [p['ip_address'] for p in p1['fixed_ips']]
+                    expected = {p1['network_id']:
+                                {'ports':
+                                 {'20.0.0.4': [constants.FLOODING_ENTRY,
+                                               l2pop_rpc.PortInfo(
+                                                   p1['mac_address'],
+                                                   p1_ips[0])]},
+                                 'network_type': 'vxlan',
+                                 'segment_id': 1}}
+                    self.mock_cast.assert_called_once_with(
+                        mock.ANY, 'add_fdb_entries', expected, HOST)
+
     def test_fdb_add_not_called_type_local(self):
         self._register_ml2_agents()
 
@@ -1372,6 +1409,33 @@ class TestL2PopulationMechDriver(base.BaseTestCase):
                                  ip_address='1.1.1.1')]}}
         self.assertEqual(expected_result, result)
 
+    def test_create_agent_fdb_gets_agent_ip_once_per_port(self):
+        bindings = []
+        for i in range(3):
+            binding = mock.Mock()
+            binding.port = {'mac_address': '00:00:DE:AD:BE:E%d' % i,
+                            'fixed_ips': [{'ip_address': '1.1.1.%d' % i}]}
+            bindings.append(binding)
+        fdb_network_ports, fdb_agent = (
+            self._mock_network_ports(HOST + '2', bindings))
+        agent_ips = {fdb_agent: '20.0.0.1'}
+        calls = []
+
+        class CountingDict(dict):
+            def __getitem__(self, agent):
+                calls.append(agent)
+                return super(CountingDict, self).__getitem__(agent)
+
+        result = self._test_create_agent_fdb(fdb_network_ports,
+                                             CountingDict(agent_ips))
+        self.assertEqual([constants.FLOODING_ENTRY] + [
+            l2pop_rpc.PortInfo(b.port['mac_address'],
+                               b.port['fixed_ips'][0]['ip_address'])
+            for b in bindings], result['network_id']['ports']['20.0.0.1'])
+        # Once per port for the tunnels, once per port to dispatch them to
+        # their agent and once for the tunnel agent
+        self.assertEqual(2 * len(bindings) + 1, len(calls))
+
     def test_create_agent_fdb_only_tunnels(self):
         agent_fdb = self._test_create_agent_fdb([], {})
         result = agent_fdb['network_id']
@@ -0,0 +1,121 @@
+# Copyright (c) 2018 OpenStack Foundation.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+from neutron_lib import constants as n_const
+from oslo_config import cfg
+
+from neutron.plugins.ml2.drivers.l2pop import rpc as l2pop_rpc
+from neutron.tests import base
+
+
+def _fdb_entries(network_id, agent_ip, *entries, **kwargs):
+    return {network_id: {'segment_id': kwargs.get('segment_id', 1),
+                         'network_type': 'vxlan',
+                         'ports': {agent_ip: list(entries)}}}
+
+
+PORT1 = l2pop_rpc.PortInfo('fa:16:3e:00:00:01', '10.0.0.1')
+PORT2 = l2pop_rpc.PortInfo('fa:16:3e:00:00:02', '10.0.0.2')
+
+
+class TestL2populationAgentNotifyAPI(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestL2populationAgentNotifyAPI, self).setUp()
+        self.spawn_n = mock.patch('eventlet.spawn_n').start()
+        self.notifier = l2pop_rpc.L2populationAgentNotifyAPI()
+        self.cast = mock.patch.object(self.notifier, '_cast_fanout').start()
+
+    def test_fanouts_are_batched(self):
+        self.notifier.add_fdb_entries(
+            mock.sentinel.context, _fdb_entries('net1', '20.0.0.1', PORT1))
+        self.assertFalse(self.cast.called)
+        self.assertEqual(1, len(
+            self.notifier._fanout_batch_notifier.pending_events))
+        self.assertTrue(self.spawn_n.called)
+
+    def test_host_notifications_are_not_batched(self):
+        with mock.patch.object(self.notifier.client, 'prepare') as prepare:
+            self.notifier.add_fdb_entries(
+                mock.sentinel.context,
+                _fdb_entries('net1', '20.0.0.1', PORT1), host='host1')
+        prepare.return_value.cast.assert_called_once_with(
+            mock.sentinel.context, 'add_fdb_entries',
+            fdb_entries=_fdb_entries('net1', '20.0.0.1', PORT1))
+        self.assertEqual(
+            [], self.notifier._fanout_batch_notifier.pending_events)
+
+    def test_batching_disabled(self):
+        cfg.CONF.set_override('fanout_batch_interval', 0, group='l2pop')
+        notifier = l2pop_rpc.L2populationAgentNotifyAPI()
+        with mock.patch.object(notifier, '_cast_fanout') as cast:
+            notifier.add_fdb_entries(
+                mock.sentinel.context,
+                _fdb_entries('net1', '20.0.0.1', PORT1))
+        cast.assert_called_once_with(
+            mock.sentinel.context, 'add_fdb_entries',
+            _fdb_entries('net1', '20.0.0.1', PORT1))
+        self.assertIsNone(notifier._fanout_batch_notifier)
+
+    def test_send_fanouts_merges_consecutive_fanouts(self):
+        ctx = mock.sentinel.context
+        self.notifier._send_fanouts([
+            (ctx, 'add_fdb_entries',
+             _fdb_entries('net1', '20.0.0.1', n_const.FLOODING_ENTRY, PORT1)),
+            (ctx, 'add_fdb_entries',
+             _fdb_entries('net1', '20.0.0.1', n_const.FLOODING_ENTRY, PORT2)),
+            (ctx, 'add_fdb_entries', _fdb_entries('net2', '20.0.0.2', PORT1)),
+            (ctx, 'remove_fdb_entries',
+             _fdb_entries('net1', '20.0.0.1', PORT1)),
+            (ctx, 'remove_fdb_entries',
+             _fdb_entries('net1', '20.0.0.3', PORT2)),
+        ])
+
+        added = _fdb_entries('net1', '20.0.0.1', n_const.FLOODING_ENTRY,
+                             PORT1, PORT2)
+        added.update(_fdb_entries('net2', '20.0.0.2', PORT1))
+        removed = _fdb_entries('net1', '20.0.0.1', PORT1)
+        removed['net1']['ports']['20.0.0.3'] = [PORT2]
+        self.assertEqual(
+            [mock.call(ctx, 'add_fdb_entries', added),
+             mock.call(ctx, 'remove_fdb_entries', removed)],
+            self.cast.call_args_list)
+
+    def test_send_fanouts_keeps_order_and_segments(self):
+        ctx = mock.sentinel.context
+        add1 = _fdb_entries('net1', '20.0.0.1', PORT1)
+        chg_ip = {'chg_ip': {'net1': {'20.0.0.1': {'after': [PORT2]}}}}
+        add2 = _fdb_entries('net1', '20.0.0.1', PORT2)
+        add3 = _fdb_entries('net1', '20.0.0.1', PORT1, segment_id=2)
+        self.notifier._send_fanouts([
+            (ctx, 'add_fdb_entries', add1),
+            (ctx, 'update_fdb_entries', chg_ip),
+            (ctx, 'add_fdb_entries', add2),
+            (ctx, 'add_fdb_entries', add3)])
+
+        self.assertEqual(
+            [mock.call(ctx, 'add_fdb_entries', add1),
+             mock.call(ctx, 'update_fdb_entries', chg_ip),
+             mock.call(ctx, 'add_fdb_entries', add2),
+             mock.call(ctx, 'add_fdb_entries', add3)],
+            self.cast.call_args_list)
+
+    def test_send_fanouts_does_not_modify_notifications(self):
+        fdb_entries = _fdb_entries('net1', '20.0.0.1', PORT1)
+        self.notifier._send_fanouts([
+            (mock.sentinel.context, 'add_fdb_entries', fdb_entries),
+            (mock.sentinel.context, 'add_fdb_entries',
+             _fdb_entries('net1', '20.0.0.1', PORT2))])
+        self.assertEqual(_fdb_entries('net1', '20.0.0.1', PORT1), fdb_entries)
@@ -1683,6 +1683,27 @@ class TestOvsNeutronAgent(object):
             ]
             br_tun.assert_has_calls(expected_calls)
 
+    def test_fdb_add_flows_of_several_networks_at_once(self):
+        self._prepare_l2_pop_ofports()
+        fdb_entry = {'net1':
+                     {'network_type': 'gre',
+                      'segment_id': 'tun1',
+                      'ports':
+                      {'2.2.2.2': [l2pop_rpc.PortInfo(FAKE_MAC, FAKE_IP1)]}},
+                     'net2':
+                     {'network_type': 'gre',
+                      'segment_id': 'tun2',
+                      'ports':
+                      {'1.1.1.1': [l2pop_rpc.PortInfo(FAKE_MAC, FAKE_IP2)]}}}
+
+        with mock.patch.object(self.agent, 'tun_br', autospec=True) as tun_br:
+            self.agent.fdb_add(None, fdb_entry)
+            tun_br.deferred.assert_called_once_with()
+            deferred_br = tun_br.deferred().__enter__()
+            deferred_br.install_unicast_to_tun.assert_has_calls(
+                [mock.call('vlan1', 'seg1', '2', FAKE_MAC),
+                 mock.call('vlan2', 'seg2', '1', FAKE_MAC)], any_order=True)
+
     def test_fdb_add_port(self):
         self._prepare_l2_pop_ofports()
         fdb_entry = {'net1':
@@ -1809,7 +1830,8 @@ class TestOvsNeutronAgent(object):
 
             self.agent.daemon_loop()
         mock_get_pm.assert_called_with(True,
-                                       constants.DEFAULT_OVSDBMON_RESPAWN)
+                                       constants.DEFAULT_OVSDBMON_RESPAWN,
+                                       constants.OVSDB_MONITOR_NATIVE)
         mock_get_bm.assert_called_once_with(
             ['br-ex0'], constants.DEFAULT_OVSDBMON_RESPAWN)
         mock_loop.assert_called_once_with(
@@ -1937,6 +1959,35 @@ class TestOvsNeutronAgent(object):
             _setup_tunnel_port_fn.assert_has_calls(expected_calls)
             self.assertEqual([], cleanup.mock_calls)
 
+    def test_tunnel_sync_with_tunnels_generation(self):
+        fake_tunnel_details = {'tunnels': [{'ip_address': '100.101.31.15'}],
+                               'tunnels_generation': 'gen1'}
+        with mock.patch.object(self.agent.plugin_rpc, 'tunnel_sync',
+                               return_value=fake_tunnel_details) as sync,\
+                mock.patch.object(
+                    self.agent,
+                    '_setup_tunnel_port') as _setup_tunnel_port_fn:
+            self.agent.tunnel_types = ['vxlan']
+            self.agent.tunnel_sync()
+            self.assertEqual({'vxlan': 'gen1'}, self.agent.tunnels_generation)
+
+            # Unchanged tunnels are not set up again
+            sync.return_value = {'tunnels_generation': 'gen1'}
+            self.agent.tunnel_sync()
+            sync.assert_called_with(self.agent.context, self.agent.local_ip,
+                                    'vxlan', self.agent.conf.host, 'gen1')
+            _setup_tunnel_port_fn.assert_called_once_with(
+                self.agent.tun_br, 'vxlan-64651f0f', '100.101.31.15',
+                'vxlan')
+
+            # The tunnels are set up again after OVS restarts
+            self.agent._reset_tunnel_ofports()
+            sync.return_value = fake_tunnel_details
+            self.agent.tunnel_sync()
+            sync.assert_called_with(self.agent.context, self.agent.local_ip,
+                                    'vxlan', self.agent.conf.host, None)
+            self.assertEqual(2, _setup_tunnel_port_fn.call_count)
+
     def test_tunnel_sync_invalid_ip_address(self):
         fake_tunnel_details = {'tunnels': [{'ip_address': '300.300.300.300'},
                                            {'ip_address': '100.100.100.100'}]}
@@ -2022,6 +2073,8 @@ class TestOvsNeutronAgent(object):
                            'removed': set([])}
 
         self.agent.enable_tunneling = True
+        self.agent.ovsdb_monitor_interface = (
+            constants.OVSDB_MONITOR_OVSDB_CLIENT)
 
         with mock.patch.object(async_process.AsyncProcess, "_spawn"),\
                 mock.patch.object(async_process.AsyncProcess, "start"),\
@@ -2107,6 +2160,8 @@ class TestOvsNeutronAgent(object):
                               constants.OVS_RESTARTED)
 
     def test_rpc_loop_fail_to_process_network_ports_keep_flows(self):
+        self.agent.ovsdb_monitor_interface = (
+            constants.OVSDB_MONITOR_OVSDB_CLIENT)
         with mock.patch.object(async_process.AsyncProcess, "_spawn"),\
                 mock.patch.object(async_process.AsyncProcess, "start"),\
                 mock.patch.object(async_process.AsyncProcess,
@@ -18,6 +18,7 @@ from neutron_lib import context
 from oslo_db import exception as exc
 from sqlalchemy.orm import query
 
+from neutron.plugins.ml2.drivers import helpers
 from neutron.plugins.ml2.drivers import type_vlan
 from neutron.tests.unit import testlib_api
 
@@ -124,10 +125,69 @@ class HelpersTest(testlib_api.SqlTestCase):
     def test_allocate_partial_segment_first_attempt_fails(self):
         expected = dict(physical_network=TENANT_NET)
         with mock.patch.object(query.Query, 'update', side_effect=[0, 1]):
+            # The next segment of the block is allocated in the same attempt
+            observed = self.driver.allocate_partially_specified_segment(
+                self.context, **expected)
+            self.check_raw_segment(expected, observed)
+        stats = self.driver.allocation_stats
+        self.assertEqual(1, stats.get_counter('conflicts'))
+        self.assertEqual(1, stats.get_counter('allocations'))
+        self.assertEqual(0, stats.get_counter('retries'))
+
+    def test_allocate_partial_segment_all_attempts_fail(self):
+        expected = dict(physical_network=TENANT_NET)
+        with mock.patch.object(query.Query, 'update', return_value=0):
             self.assertRaises(
                 exc.RetryRequest,
                 self.driver.allocate_partially_specified_segment,
                 self.context, **expected)
-            observed = self.driver.allocate_partially_specified_segment(
-                self.context, **expected)
-            self.check_raw_segment(expected, observed)
+        stats = self.driver.allocation_stats
+        self.assertEqual(1, stats.get_counter('retries'))
+        self.assertEqual(helpers.IDPOOL_MAX_ATTEMPTS,
+                         stats.get_counter('conflicts'))
+        # A new block is selected by the retry
+        self.assertEqual({}, self.driver._free_segments)
+        observed = self.driver.allocate_partially_specified_segment(
+            self.context, **expected)
+        self.check_raw_segment(expected, observed)
+
+    def test_allocate_partial_segment_uses_block(self):
+        allocated = set()
+        for i in range(VLAN_MIN, VLAN_MAX + 1):
+            alloc = self.driver.allocate_partially_specified_segment(
+                self.context, physical_network=TENANT_NET)
+            allocated.add(alloc.vlan_id)
+        self.assertEqual(set(range(VLAN_MIN, VLAN_MAX + 1)), allocated)
+        # All the segments of the pool were selected in a single block
+        stats = self.driver.get_allocation_stats()
+        self.assertEqual(1, stats['block_refills'])
+        self.assertEqual(VLAN_MAX - VLAN_MIN + 1, stats['allocations'])
+        self.assertEqual(VLAN_MAX - VLAN_MIN + 1,
+                         stats['allocation_duration']['count'])
+
+    def test_allocate_partial_segment_skips_segments_allocated_elsewhere(self):
+        first = self.driver.allocate_partially_specified_segment(
+            self.context, physical_network=TENANT_NET)
+        # Another worker allocates the rest of the pool
+        other_driver = type_vlan.VlanTypeDriver()
+        for i in range(VLAN_MIN, VLAN_MAX):
+            other_driver.allocate_partially_specified_segment(
+                self.context, physical_network=TENANT_NET)
+        # The segments of the block are found allocated, then the new block
+        # is empty
+        self.assertIsNone(self.driver.allocate_partially_specified_segment(
+            self.context, physical_network=TENANT_NET))
+        self.assertEqual(VLAN_MAX - VLAN_MIN,
+                         self.driver.allocation_stats.get_counter('conflicts'))
+        self.assertIsNotNone(first)
+
+    def test_get_free_segments_block_starts_at_random_segment(self):
+        with mock.patch.object(helpers.random, 'randint',
+                               return_value=VLAN_MAX - 1) as randint, \
+                mock.patch.object(helpers.random, 'shuffle'):
+            block = self.driver._get_free_segments_block(
+                self.context.session, {'physical_network': TENANT_NET})
+        randint.assert_called_once_with(VLAN_MIN, VLAN_MAX)
+        self.assertEqual([VLAN_MAX - 1, VLAN_MAX] +
+                         list(range(VLAN_MIN, VLAN_MAX - 1)),
+                         [segment['vlan_id'] for segment in block])
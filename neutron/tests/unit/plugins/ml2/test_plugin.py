@@ -723,6 +723,17 @@ class TestMl2PortsV2(test_plugin.TestPortsV2, Ml2PluginV2TestCase):
                                      self.context, port['port']['id'])
         self.assertFalse(ups.called)
 
+    def test__port_provisioned_in_bulk(self):
+        plugin = directory.get_plugin()
+        ups = mock.patch.object(plugin, 'update_port_status').start()
+        get_port = mock.patch(
+            'neutron.plugins.ml2.plugin.db.get_port').start()
+        # the port was handled with the others by _ports_provisioned
+        plugin._port_provisioned('port', 'evt', 'trigger', self.context,
+                                 'fake_port_id', bulk=True)
+        self.assertFalse(get_port.called)
+        self.assertFalse(ups.called)
+
     def test__port_provisioned_no_binding(self):
         device_id = uuidutils.generate_uuid()
         plugin = directory.get_plugin()
@@ -756,6 +767,31 @@ class TestMl2PortsV2(test_plugin.TestPortsV2, Ml2PluginV2TestCase):
                                      self.context, port_id)
         self.assertFalse(ups.called)
 
+    def test__ports_provisioned(self):
+        plugin = directory.get_plugin()
+        host_arg = {portbindings.HOST_ID: 'host-ovs-no_filter'}
+        with self.port(arg_list=(portbindings.HOST_ID,),
+                       **host_arg) as port1,\
+                self.port(arg_list=(portbindings.HOST_ID,),
+                          **host_arg) as port2,\
+                self.port(arg_list=(portbindings.HOST_ID,),
+                          admin_state_up=False, **host_arg) as port3,\
+                self.port() as port4:
+            port_ids = [port['port']['id']
+                        for port in (port1, port2, port3, port4)]
+            for port_id in port_ids:
+                provisioning_blocks.remove_provisioning_component(
+                    self.context, port_id, 'port',
+                    provisioning_blocks.L2_AGENT_ENTITY)
+            provisioning_blocks.add_provisioning_component(
+                self.context, port_ids[1], 'port', 'DHCP')
+            with mock.patch.object(plugin, 'update_port_statuses') as ups:
+                plugin._ports_provisioned('port', 'evt', 'trigger',
+                                          self.context,
+                                          port_ids + ['fake_port_id'])
+        ups.assert_called_once_with(
+            self.context, {port_ids[0]: constants.PORT_STATUS_ACTIVE})
+
     def test_port_after_create_outside_transaction(self):
         self.tx_open = True
         receive = lambda *a, **k: setattr(self, 'tx_open',
@@ -1415,6 +1451,102 @@ class TestMl2PortsV2WithRevisionPlugin(Ml2PluginV2TestCase):
             self.assertGreater(updated_ports[0]['revision_number'],
                                port['revision_number'])
 
+    def test_update_port_statuses_in_one_transaction(self):
+        ctx = context.get_admin_context()
+        plugin = directory.get_plugin()
+        host_arg = {portbindings.HOST_ID: HOST}
+        with self.port(arg_list=(portbindings.HOST_ID,),
+                       **host_arg) as port1,\
+                self.port(arg_list=(portbindings.HOST_ID,),
+                          **host_arg) as port2:
+            ports = [plugin.get_port(ctx, port['port']['id'])
+                     for port in (port1, port2)]
+            updated_ports = []
+            receiver = lambda *a, **k: updated_ports.append(k['port'])
+            registry.subscribe(receiver, resources.PORT,
+                               events.AFTER_UPDATE)
+            ml2_plugin.PORT_STATUS_STATS.reset()
+            statuses = {port['id']: constants.PORT_STATUS_ACTIVE
+                        for port in ports}
+            with mock.patch.object(ml2_plugin.LOG, 'debug') as debug:
+                self.assertEqual(
+                    {port['id']: port['id'] for port in ports},
+                    plugin.update_port_statuses(ctx, statuses, host=HOST))
+            counters = ml2_plugin.PORT_STATUS_STATS.to_dict()['counters']
+            debug.assert_any_call("Port status update stats: %s", counters)
+            self.assertEqual(1, counters['transactions'])
+            self.assertEqual(2, counters['bulk_updates'])
+            updated_by_id = {port['id']: port for port in updated_ports}
+            for port in ports:
+                updated_port = updated_by_id[port['id']]
+                self.assertEqual(constants.PORT_STATUS_ACTIVE,
+                                 updated_port['status'])
+                self.assertGreater(updated_port['revision_number'],
+                                   port['revision_number'])
+
+            # nothing left to update, no transaction is needed
+            ml2_plugin.PORT_STATUS_STATS.reset()
+            del updated_ports[:]
+            plugin.update_port_statuses(ctx, statuses, host=HOST)
+            counters = ml2_plugin.PORT_STATUS_STATS.to_dict()['counters']
+            self.assertNotIn('transactions', counters)
+            self.assertEqual(2, counters['unchanged'])
+            self.assertEqual([], updated_ports)
+
+    def test_update_port_statuses_bulk_failure(self):
+        ctx = context.get_admin_context()
+        plugin = directory.get_plugin()
+        host_arg = {portbindings.HOST_ID: HOST}
+        with self.port(arg_list=(portbindings.HOST_ID,),
+                       **host_arg) as port1,\
+                self.port(arg_list=(portbindings.HOST_ID,),
+                          **host_arg) as port2:
+            port_ids = [port1['port']['id'], port2['port']['id']]
+            updating_ports = []
+            receiver = lambda *a, **k: updating_ports.append(k['port']['id'])
+            registry.subscribe(receiver, resources.PORT,
+                               events.BEFORE_UPDATE)
+            ml2_plugin.PORT_STATUS_STATS.reset()
+            with mock.patch.object(plugin.mechanism_manager,
+                                   'update_port_precommit',
+                                   side_effect=[ValueError, None, None]):
+                plugin.update_port_statuses(
+                    ctx, {port_id: constants.PORT_STATUS_ACTIVE
+                          for port_id in port_ids}, host=HOST)
+            counters = ml2_plugin.PORT_STATUS_STATS.to_dict()['counters']
+            self.assertEqual(1, counters['bulk_failures'])
+            self.assertEqual(2, counters['transactions'])
+            # BEFORE_UPDATE is not sent again when updating one by one
+            self.assertEqual(sorted(port_ids), sorted(updating_ports))
+            for port_id in port_ids:
+                self.assertEqual(constants.PORT_STATUS_ACTIVE,
+                                 plugin.get_port(ctx, port_id)['status'])
+
+    def test_update_port_statuses_bulk_postcommit_failure(self):
+        ctx = context.get_admin_context()
+        plugin = directory.get_plugin()
+        host_arg = {portbindings.HOST_ID: HOST}
+        with self.port(arg_list=(portbindings.HOST_ID,),
+                       **host_arg) as port1,\
+                self.port(arg_list=(portbindings.HOST_ID,),
+                          **host_arg) as port2:
+            port_ids = [port1['port']['id'], port2['port']['id']]
+            updated_ports = []
+            receiver = lambda *a, **k: updated_ports.append(k['port']['id'])
+            registry.subscribe(receiver, resources.PORT,
+                               events.AFTER_UPDATE)
+            with mock.patch.object(
+                    plugin.mechanism_manager, 'update_port_postcommit',
+                    side_effect=[ml2_exc.MechanismDriverError, None]):
+                self.assertEqual(
+                    {port_id: port_id for port_id in port_ids},
+                    plugin.update_port_statuses(
+                        ctx, {port_id: constants.PORT_STATUS_ACTIVE
+                              for port_id in port_ids}, host=HOST))
+            # the failure of the first port does not affect the second one
+            self.assertEqual(1, len(updated_ports))
+            self.assertIn(updated_ports[0], port_ids)
+
     def test_bind_port_bumps_revision(self):
         updated_ports = []
         created_ports = []
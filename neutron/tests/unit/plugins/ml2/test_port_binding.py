@@ -19,6 +19,7 @@ from neutron_lib.api.definitions import portbindings_extended as pbe_ext
 from neutron_lib import constants as const
 from neutron_lib import context
 from neutron_lib.plugins import directory
+from neutron_lib.plugins.ml2 import api
 from neutron_lib.plugins import utils
 from oslo_config import cfg
 from oslo_serialization import jsonutils
@@ -28,8 +29,12 @@ from neutron.common import exceptions
 from neutron.conf.plugins.ml2 import config
 from neutron.conf.plugins.ml2.drivers import driver_type
 from neutron.plugins.ml2 import driver_context
+from neutron.plugins.ml2.drivers.linuxbridge.mech_driver import (
+    mech_linuxbridge)
+from neutron.plugins.ml2 import managers
 from neutron.plugins.ml2 import models as ml2_models
 from neutron.plugins.ml2 import plugin as ml2_plugin
+from neutron.tests.common import helpers
 from neutron.tests.unit.db import test_db_base_plugin_v2 as test_plugin
 from neutron.tests.unit.plugins.ml2.drivers import mechanism_test
 
@@ -640,3 +645,82 @@ class ExtendedPortBindingTestCase(test_plugin.NeutronDbPluginV2TestCase):
         port, new_binding = self._create_port_and_binding()
         response = self._delete_port_binding(port['id'], 'other-host')
         self.assertEqual(webob.exc.HTTPNotFound.code, response.status_int)
+
+
+class PortBindingCacheTestCase(test_plugin.NeutronDbPluginV2TestCase):
+
+    host = 'host1'
+
+    def setUp(self):
+        cfg.CONF.set_override('mechanism_drivers', ['linuxbridge'], 'ml2')
+        super(PortBindingCacheTestCase, self).setUp('ml2')
+        self.plugin = directory.get_plugin()
+        self.ctx = context.get_admin_context()
+        helpers.register_linuxbridge_agent(host=self.host)
+        managers.BINDING_STATS.reset()
+        self.try_to_bind = mock.patch.object(
+            mech_linuxbridge.LinuxbridgeMechanismDriver,
+            'try_to_bind_segment_for_agent', autospec=True,
+            side_effect=mech_linuxbridge.LinuxbridgeMechanismDriver.
+            try_to_bind_segment_for_agent).start()
+
+    def _bind_ports(self, network, count=2):
+        port_ids = []
+        for _ in range(count):
+            port = self._make_port(self.fmt, network['network']['id'],
+                                   arg_list=(portbindings.HOST_ID,),
+                                   **{portbindings.HOST_ID: self.host})
+            self.assertEqual(portbindings.VIF_TYPE_BRIDGE,
+                             port['port'][portbindings.VIF_TYPE])
+            port_ids.append(port['port']['id'])
+        return port_ids
+
+    def test_binding_result_reused(self):
+        with self.network() as network:
+            port_ids = self._bind_ports(network)
+        self.assertEqual(1, self.try_to_bind.call_count)
+        levels = [self.plugin.get_bound_port_context(
+            self.ctx, port_id).binding_levels[0] for port_id in port_ids]
+        self.assertEqual(levels[0][api.BOUND_SEGMENT],
+                         levels[1][api.BOUND_SEGMENT])
+        self.assertEqual('linuxbridge', levels[1][api.BOUND_DRIVER])
+        stats = self.plugin.mechanism_manager.get_binding_stats()
+        self.assertEqual(1, stats['cache_hits'])
+        self.assertEqual(1, stats['agent_cache_misses'])
+        self.assertEqual(2, stats['bind_port']['count'])
+
+    def test_binding_cache_disabled(self):
+        cfg.CONF.set_override('binding_cache_size', 0, 'ml2')
+        with self.network() as network:
+            self._bind_ports(network)
+        self.assertEqual(2, self.try_to_bind.call_count)
+        stats = self.plugin.mechanism_manager.get_binding_stats()
+        self.assertEqual(1, stats['agent_cache_misses'])
+
+    def test_binding_results_invalidated_by_agent_report(self):
+        with self.network() as network:
+            self._bind_ports(network, count=1)
+            helpers.register_linuxbridge_agent(host=self.host)
+            self._bind_ports(network, count=1)
+        self.assertEqual(2, self.try_to_bind.call_count)
+        stats = self.plugin.mechanism_manager.get_binding_stats()
+        self.assertEqual(2, stats['agent_cache_misses'])
+
+    def test_binding_results_invalidated_by_agent_update(self):
+        agent = self.plugin.get_agents(self.ctx)[0]
+        with self.network() as network:
+            self._bind_ports(network, count=1)
+            self.plugin.update_agent(self.ctx, agent['id'],
+                                     {'agent': {'admin_state_up': False}})
+            self._bind_ports(network, count=1)
+        self.assertEqual(2, self.try_to_bind.call_count)
+
+    def test_host_agents_not_cached(self):
+        cfg.CONF.set_override('agent_cache_ttl', 0, 'ml2')
+        with mock.patch.object(self.plugin, 'get_agents',
+                               wraps=self.plugin.get_agents) as get_agents:
+            for _ in range(2):
+                agents = self.plugin.get_host_agents(
+                    self.ctx, const.AGENT_TYPE_LINUXBRIDGE, self.host)
+                self.assertEqual(1, len(agents))
+        self.assertEqual(2, get_agents.call_count)
@@ -311,6 +311,70 @@ class RpcCallbacksTestCase(base.BaseTestCase):
                                       devices_down_side_effect,
                                       expected)
 
+    def _test_update_device_list_provisioning(self, bulk_side_effect=None,
+                                              pc_side_effect=None):
+        self.plugin._device_to_port_id.side_effect = (
+            lambda context, device: 'port-%s' % device)
+        self.plugin.port_bound_to_host.side_effect = (
+            lambda context, port_id, host: {'id': port_id,
+                                            'device_owner': 'compute:nova'})
+        with mock.patch.object(self.callbacks, 'notify_l2pop_port_wiring'), \
+                mock.patch.object(provisioning_blocks,
+                                  'provisioning_complete_bulk',
+                                  side_effect=bulk_side_effect) as bulk, \
+                mock.patch.object(provisioning_blocks,
+                                  'provisioning_complete',
+                                  side_effect=pc_side_effect) as pc:
+            res = self.callbacks.update_device_list(
+                'fake_context', devices_up=['d1', 'd2', 'd3'],
+                devices_down=[], host='fake_host', agent_id='fake_agent_id')
+        bulk.assert_called_once_with(
+            'fake_context', ['port-d1', 'port-d2', 'port-d3'],
+            resources.PORT, provisioning_blocks.L2_AGENT_ENTITY)
+        return res, pc
+
+    def test_update_device_list_completes_provisioning_in_bulk(self):
+        res, pc = self._test_update_device_list_provisioning()
+        self.assertFalse(pc.called)
+        self.assertEqual(['d1', 'd2', 'd3'], res['devices_up'])
+        self.assertEqual([], res['failed_devices_up'])
+
+    def test_update_device_list_bulk_provisioning_failure(self):
+        res, pc = self._test_update_device_list_provisioning(
+            bulk_side_effect=Exception('bulk'),
+            pc_side_effect=[None, Exception('testdevice'), None])
+        self.assertEqual(3, pc.call_count)
+        self.assertEqual(['d1', 'd3'], res['devices_up'])
+        self.assertEqual(['d2'], res['failed_devices_up'])
+
+    def test_update_device_list_l2pop_provisions_one_by_one(self):
+        self.plugin.mechanism_manager.mech_drivers = {
+            'l2population': mock.Mock()}
+        self.plugin._device_to_port_id.side_effect = (
+            lambda context, device: 'port-%s' % device)
+        self.plugin.port_bound_to_host.side_effect = (
+            lambda context, port_id, host: {'id': port_id,
+                                            'device_owner': 'compute:nova'})
+        calls = []
+        with mock.patch.object(self.callbacks, 'notify_l2pop_port_wiring',
+                               side_effect=lambda port_id, *a:
+                               calls.append(('wiring', port_id))), \
+                mock.patch.object(provisioning_blocks,
+                                  'provisioning_complete_bulk') as bulk, \
+                mock.patch.object(provisioning_blocks,
+                                  'provisioning_complete',
+                                  side_effect=lambda context, port_id, *a:
+                                  calls.append(('provisioning', port_id))):
+            res = self.callbacks.update_device_list(
+                'fake_context', devices_up=['d1', 'd2'],
+                devices_down=[], host='fake_host', agent_id='fake_agent_id')
+        self.assertFalse(bulk.called)
+        # each port is ACTIVE before l2pop counts the active ports
+        self.assertEqual([('provisioning', 'port-d1'), ('wiring', 'port-d1'),
+                          ('provisioning', 'port-d2'), ('wiring', 'port-d2')],
+                         calls)
+        self.assertEqual(['d1', 'd2'], res['devices_up'])
+
     def test_update_device_list_empty_devices(self):
 
         expected = {'devices_up': [],
@@ -439,6 +503,16 @@ class RpcApiTestCase(base.BaseTestCase):
                            host='fake_host',
                            version='1.4')
 
+    def test_tunnel_sync_with_tunnels_generation(self):
+        rpcapi = agent_rpc.PluginApi(topics.PLUGIN)
+        self._test_rpc_api(rpcapi, None,
+                           'tunnel_sync', rpc_method='call',
+                           tunnel_ip='fake_tunnel_ip',
+                           tunnel_type=None,
+                           host='fake_host',
+                           tunnels_generation='fake_generation',
+                           version='1.6')
+
     def test_update_device_up(self):
         rpcapi = agent_rpc.PluginApi(topics.PLUGIN)
         self._test_rpc_api(rpcapi, None,
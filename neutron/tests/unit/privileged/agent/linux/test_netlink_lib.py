@@ -19,6 +19,7 @@ from neutron_lib import constants
 import testtools
 
 from neutron.common import exceptions
+from neutron import privileged
 from neutron.privileged.agent.linux import netlink_constants as nl_constants
 from neutron.privileged.agent.linux import netlink_lib as nl_lib
 from neutron.tests import base
@@ -74,6 +75,17 @@ class NetlinkLibTestCase(base.BaseTestCase):
         nl_lib.nfct.nfct_close.assert_called_once_with(nl_lib.nfct.nfct_open(
             nl_constants.CONNTRACK, nl_constants.NFNL_SUBSYS_CTNETLINK))
 
+    def test_conntrack_list_entries_of_zones(self):
+        nl_lib.nfct.nfct_get_attr_u16.side_effect = [1, 2, 1]
+        with nl_lib.ConntrackManager() as conntrack:
+            conntrack.list_entries(zones={1})
+            callback = nl_lib.nfct.nfct_callback_register.call_args[0][2]
+            for i in range(3):
+                callback(nl_constants.NFCT_T_ALL, None, None)
+        # the entry of zone 2 is not formatted
+        self.assertEqual(2, nl_lib.nfct.nfct_snprintf.call_count)
+        self.assertEqual(3, conntrack.dumped_entries)
+
     def test_conntrack_new_failed(self):
         nl_lib.nfct.nfct_new.return_value = None
         with nl_lib.ConntrackManager() as conntrack:
@@ -340,3 +352,85 @@ class NetlinkLibTestCase(base.BaseTestCase):
         nl_lib.nfct.nfct_close.assert_called_once_with(nl_lib.nfct.nfct_open(
             nl_constants.CONNTRACK,
             nl_constants.NFNL_SUBSYS_CTNETLINK))
+
+
+FAKE_RAW_TCP_ENTRY = (
+    '[1523949123.456789]\ttcp      6 431999 ESTABLISHED src=1.1.1.1 '
+    'dst=2.2.2.2 sport=1 dport=2 src=2.2.2.2 dst=1.1.1.1 sport=2 dport=1 '
+    '[ASSURED] mark=0 zone=1 use=1')
+FAKE_RAW_ICMP_ENTRY = (
+    '[1523949123.456789]\ticmp     1 29 src=1.1.1.1 dst=2.2.2.2 type=8 '
+    'code=0 id=1234 src=2.2.2.2 dst=1.1.1.1 type=0 code=0 id=1234 mark=0 '
+    'zone=1 use=1')
+FAKE_RAW_UDP_ENTRY = (
+    '[1523949123.456789]\tudp      17 29 src=3.3.3.3 dst=2.2.2.2 sport=1 '
+    'dport=2 [UNREPLIED] src=2.2.2.2 dst=3.3.3.3 sport=2 dport=1 mark=0 '
+    'use=1')
+FAKE_RAW_GRE_ENTRY = (
+    '[1523949123.456789]\tgre      47 29 src=1.1.1.1 dst=2.2.2.2 srckey=0x0 '
+    'dstkey=0x0 src=2.2.2.2 dst=1.1.1.1 srckey=0x0 dstkey=0x0 mark=0 '
+    'zone=1 use=1')
+
+
+class DeleteEntriesByFiltersTestCase(base.BaseTestCase):
+    def setUp(self):
+        super(DeleteEntriesByFiltersTestCase, self).setUp()
+        self.addCleanup(privileged.default.set_client_mode, True)
+        privileged.default.set_client_mode(False)
+        self.list_entries = mock.patch.object(
+            nl_lib.ConntrackManager, 'list_entries',
+            return_value=[FAKE_RAW_TCP_ENTRY, FAKE_RAW_ICMP_ENTRY,
+                          FAKE_RAW_UDP_ENTRY, FAKE_RAW_GRE_ENTRY]).start()
+        self.delete_entries = mock.patch.object(
+            nl_lib.ConntrackManager, 'delete_entries').start()
+        mock.patch.object(nl_lib, 'nfct').start()
+
+    def test_parse_entry_attributes(self):
+        self.assertEqual(
+            {'ipversion': 4, 'protocol': 'tcp', 'sport': 1, 'dport': 2,
+             'src': '1.1.1.1', 'dst': '2.2.2.2', 'zone': 1},
+            nl_lib._parse_entry_attributes(FAKE_RAW_TCP_ENTRY, 4))
+        self.assertEqual(
+            {'ipversion': 4, 'protocol': 'udp', 'sport': 1, 'dport': 2,
+             'src': '3.3.3.3', 'dst': '2.2.2.2', 'zone': 0},
+            nl_lib._parse_entry_attributes(FAKE_RAW_UDP_ENTRY, 4))
+        self.assertIsNone(
+            nl_lib._parse_entry_attributes(FAKE_RAW_GRE_ENTRY, 4))
+
+    def test_delete_entries_by_filters(self):
+        deleted = nl_lib.delete_entries_by_filters(
+            [{'ipversion': 4, 'zone': 1, 'src': '1.1.1.1'},
+             {'ipversion': 4, 'zone': 0, 'protocol': 'udp',
+              'dst': '2.2.2.2', 'src': '3.3.3.0/24'}])
+        self.assertEqual(3, deleted)
+        # only the entries of the zones of the filters are parsed
+        self.list_entries.assert_called_once_with(zones={0, 1})
+        entries = self.delete_entries.call_args[0][0]
+        self.assertEqual(['tcp', 'icmp', 'udp'],
+                         [entry['protocol'] for entry in entries])
+
+    def test_delete_entries_by_filters_protocol_and_zone(self):
+        deleted = nl_lib.delete_entries_by_filters(
+            [{'ipversion': 4, 'zone': 1, 'protocol': 'icmp',
+              'dst': '2.2.2.2'},
+             {'ipversion': 4, 'zone': 2, 'protocol': 'tcp'}])
+        self.assertEqual(1, deleted)
+        entries = self.delete_entries.call_args[0][0]
+        self.assertEqual(1234, entries[0]['id'])
+
+    def test_delete_entries_by_filters_no_match(self):
+        deleted = nl_lib.delete_entries_by_filters(
+            [{'ipversion': 4, 'zone': 1, 'dst': '4.4.4.4'}])
+        self.assertEqual(0, deleted)
+        self.assertFalse(self.delete_entries.called)
+
+    def test_delete_entries_by_filters_without_zone(self):
+        nl_lib.delete_entries_by_filters(
+            [{'ipversion': 4, 'zone': 1}, {'ipversion': 4, 'dst': '4.4.4.4'}])
+        self.list_entries.assert_called_once_with(zones=None)
+
+    def test_delete_entries_by_filters_dumps_each_version(self):
+        nl_lib.delete_entries_by_filters(
+            [{'ipversion': 4, 'zone': 1}, {'ipversion': 6, 'zone': 1},
+             {'ipversion': 4, 'zone': 2}])
+        self.assertEqual(2, self.list_entries.call_count)
@@ -146,11 +146,12 @@ class TestDhcpScheduler(TestDhcpSchedulerBaseTestCase):
         plugin.get_subnets.return_value = [{"network_id": self.network_id,
                                             "enable_dhcp": True,
                                             "segment_id": None}]
-        plugin.get_network.return_value = self.network
+        plugin.get_networks.return_value = [self.network]
         if active_hosts_only:
-            plugin.get_dhcp_agents_hosting_networks.return_value = []
+            plugin.get_dhcp_agents_per_network.return_value = {}
         else:
-            plugin.get_dhcp_agents_hosting_networks.return_value = dead_agent
+            plugin.get_dhcp_agents_per_network.return_value = {
+                self.network_id: dead_agent}
         network_assigned_to_dead_agent = (
             self._get_agent_binding_from_db(dead_agent))
         self.assertEqual(1, len(network_assigned_to_dead_agent))
@@ -268,8 +269,10 @@ class TestAutoScheduleNetworks(TestDhcpSchedulerBaseTestCase):
         plugin.get_subnets.return_value = (
             [{"network_id": self.network_id, "enable_dhcp": self.enable_dhcp,
             "segment_id": None}] if self.network_present else [])
-        plugin.get_network.return_value = {'availability_zone_hints':
-                                           self.az_hints}
+        plugin.get_networks.return_value = [{'id': self.network_id,
+                                             'availability_zone_hints':
+                                             self.az_hints}]
+        plugin.get_dhcp_agents_per_network.return_value = {}
         scheduler = dhcp_agent_scheduler.ChanceScheduler()
         if self.network_present:
             down_agent_count = 1 if self.agent_down else 0
@@ -277,6 +280,8 @@ class TestAutoScheduleNetworks(TestDhcpSchedulerBaseTestCase):
                 ['host-a'], down_agent_count=down_agent_count)
             if self.scheduled_already:
                 self._test_schedule_bind_network(agents, self.network_id)
+                plugin.get_dhcp_agents_per_network.return_value = {
+                    self.network_id: agents}
 
         expected_result = (self.network_present and self.enable_dhcp)
         expected_hosted_agents = (1 if expected_result and
@@ -774,6 +779,27 @@ class TestDhcpSchedulerFilter(TestDhcpSchedulerBaseTestCase,
         self._test_get_dhcp_agents_hosting_networks({'host-a'},
                                                     hosts=['host-a'])
 
+    def test_get_dhcp_agents_per_network(self):
+        net_id = uuidutils.generate_uuid()
+        other_net_id = uuidutils.generate_uuid()
+        self._save_networks([net_id, other_net_id])
+        agents = self._create_and_set_agents_down(['host-a', 'host-b'], 1)
+        self._test_schedule_bind_network(agents, self.network_id)
+        self._test_schedule_bind_network(agents[1:], net_id)
+
+        def hosts(hosting_agents):
+            return {network_id: {agent['host'] for agent in agents}
+                    for network_id, agents in hosting_agents.items()}
+
+        self.assertEqual(
+            {self.network_id: {'host-a', 'host-b'}, net_id: {'host-b'}},
+            hosts(self.get_dhcp_agents_per_network(self.ctx)))
+        self.assertEqual(
+            {self.network_id: {'host-b'}},
+            hosts(self.get_dhcp_agents_per_network(
+                self.ctx, [self.network_id, other_net_id], active=True)))
+        self.assertEqual({}, self.get_dhcp_agents_per_network(self.ctx, []))
+
 
 class DHCPAgentAZAwareWeightSchedulerTestCase(TestDhcpSchedulerBaseTestCase):
 
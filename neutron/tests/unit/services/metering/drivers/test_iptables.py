@@ -683,3 +683,107 @@ class IptablesDriverTestCase(base.BaseTestCase):
         self.assertIn(expected_label_id, counters)
         self.assertEqual(1, counters[expected_label_id]['pkts'])
         self.assertEqual(8, counters[expected_label_id]['bytes'])
+
+    def _add_router_with_labels(self, router, label_ids):
+        rm = iptables_driver.RouterWithMetering(self.metering.conf, router)
+        rm.metering_labels = {label_id: 'fake' for label_id in label_ids}
+        self.metering.routers[router['id']] = rm
+        return rm
+
+    def test_get_traffic_counters_from_previous_values(self):
+        router = TEST_ROUTERS[0]
+        label_id = router['_metering_labels'][0]['id']
+        self._add_router_with_labels(router, [label_id])
+        chain = self.metering._get_label_chain_name(label_id)
+        self.iptables_inst.get_traffic_counters.return_value = {
+            'pkts': 0, 'bytes': 0}
+        by_chain = self.iptables_inst.get_traffic_counters_by_chain
+
+        # A new chain is zeroed and counted from zero
+        counters = self.metering.get_traffic_counters(None, [router])
+        self.assertEqual({label_id: {'pkts': 0, 'bytes': 0}}, counters)
+        self.iptables_inst.get_traffic_counters.assert_called_once_with(
+            chain, wrap=False, zero=True)
+        self.assertFalse(by_chain.called)
+
+        # Then only the traffic since the previous call is reported
+        by_chain.return_value = {chain: {'pkts': 5, 'bytes': 500}}
+        counters = self.metering.get_traffic_counters(None, [router])
+        self.assertEqual({label_id: {'pkts': 5, 'bytes': 500}}, counters)
+        by_chain.return_value = {chain: {'pkts': 7, 'bytes': 800}}
+        counters = self.metering.get_traffic_counters(None, [router])
+        self.assertEqual({label_id: {'pkts': 2, 'bytes': 300}}, counters)
+        by_chain.assert_called_with([chain], wrap=False)
+        self.assertEqual(1, self.iptables_inst.get_traffic_counters.call_count)
+
+    def test_get_traffic_counters_counts_from_zeroing(self):
+        router = TEST_ROUTERS[0]
+        label_id = router['_metering_labels'][0]['id']
+        rm = self._add_router_with_labels(router, [label_id])
+        chain = self.metering._get_label_chain_name(label_id)
+        # The new chain already counted some traffic when it is zeroed
+        self.iptables_inst.get_traffic_counters.return_value = {
+            'pkts': 40, 'bytes': 4000}
+        by_chain = self.iptables_inst.get_traffic_counters_by_chain
+
+        counters = self.metering.get_traffic_counters(None, [router])
+        self.assertEqual({label_id: {'pkts': 40, 'bytes': 4000}}, counters)
+        self.assertEqual({chain: {'pkts': 0, 'bytes': 0}},
+                         rm.traffic_counters)
+
+        # The next reads count from the zeroing, not from the first read
+        by_chain.return_value = {chain: {'pkts': 50, 'bytes': 5000}}
+        counters = self.metering.get_traffic_counters(None, [router])
+        self.assertEqual({label_id: {'pkts': 50, 'bytes': 5000}}, counters)
+        by_chain.return_value = {chain: {'pkts': 55, 'bytes': 5600}}
+        counters = self.metering.get_traffic_counters(None, [router])
+        self.assertEqual({label_id: {'pkts': 5, 'bytes': 600}}, counters)
+        self.assertEqual(1, self.iptables_inst.get_traffic_counters.call_count)
+
+    def test_get_traffic_counters_after_counters_reset(self):
+        router = TEST_ROUTERS[0]
+        label_id = router['_metering_labels'][0]['id']
+        rm = self._add_router_with_labels(router, [label_id])
+        chain = self.metering._get_label_chain_name(label_id)
+        rm.traffic_counters[chain] = {'pkts': 10, 'bytes': 1000}
+        self.iptables_inst.get_traffic_counters_by_chain.return_value = {
+            chain: {'pkts': 3, 'bytes': 300}}
+
+        counters = self.metering.get_traffic_counters(None, [router])
+        self.assertEqual({label_id: {'pkts': 3, 'bytes': 300}}, counters)
+        self.assertEqual({chain: {'pkts': 3, 'bytes': 300}},
+                         rm.traffic_counters)
+
+    def test_get_traffic_counters_forgets_removed_chains(self):
+        router = TEST_ROUTERS[0]
+        rm = self._add_router_with_labels(router, ['label1', 'label2'])
+        chain1 = self.metering._get_label_chain_name('label1')
+        chain2 = self.metering._get_label_chain_name('label2')
+        rm.traffic_counters = {chain1: {'pkts': 1, 'bytes': 100},
+                               chain2: {'pkts': 1, 'bytes': 100},
+                               'stale-chain': {'pkts': 1, 'bytes': 100}}
+        # The chain of label2 disappeared from the tables
+        self.iptables_inst.get_traffic_counters_by_chain.return_value = {
+            chain1: {'pkts': 2, 'bytes': 200}}
+
+        counters = self.metering.get_traffic_counters(None, [router])
+        self.assertEqual({'label1': {'pkts': 1, 'bytes': 100}}, counters)
+        self.assertEqual({chain1: {'pkts': 2, 'bytes': 200}},
+                         rm.traffic_counters)
+        self.assertEqual(
+            sorted([chain1, chain2]),
+            sorted(self.iptables_inst.get_traffic_counters_by_chain.call_args[
+                0][0]))
+
+    def test_get_traffic_counters_failure_reconfigures_router(self):
+        router = TEST_ROUTERS[0]
+        label_id = router['_metering_labels'][0]['id']
+        rm = self._add_router_with_labels(router, [label_id])
+        chain = self.metering._get_label_chain_name(label_id)
+        rm.traffic_counters[chain] = {'pkts': 0, 'bytes': 0}
+        self.iptables_inst.get_traffic_counters_by_chain.side_effect = (
+            RuntimeError('iptables-save failed'))
+
+        counters = self.metering.get_traffic_counters(None, [router])
+        self.assertEqual({}, counters)
+        self.assertNotIn(router['id'], self.metering.routers)
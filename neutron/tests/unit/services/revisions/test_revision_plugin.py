@@ -26,6 +26,7 @@ from webob import exc
 
 from neutron.db import models_v2
 from neutron.objects import ports as port_obj
+from neutron.services.revisions import revision_plugin
 from neutron.tests.unit.plugins.ml2 import test_plugin
 
 
@@ -83,6 +84,49 @@ class TestRevisionPlugin(test_plugin.Ml2PluginV2TestCase):
                 self.ctx.session.expire(port)
                 rp._bump_related_revisions(self.ctx.session, ipal_obj)
 
+    def _add_ip_allocations(self, session, port, *ip_addresses):
+        for ip_address in ip_addresses:
+            session.add(models_v2.IPAllocation(
+                port_id=port['port']['id'], ip_address=ip_address,
+                subnet_id=port['port']['fixed_ips'][0]['subnet_id'],
+                network_id=port['port']['network_id']))
+        session.flush()
+
+    def test_related_object_in_session_loaded_without_query(self):
+        rp = directory.get_plugin('revision_plugin')
+        with self.port() as port:
+            with self.ctx.session.begin():
+                port_db = self.ctx.session.query(models_v2.Port).one()
+                self.ctx.session.info.pop(revision_plugin.REQUEST_STATS_KEY,
+                                          None)
+                self._add_ip_allocations(self.ctx.session, port, '10.0.0.100')
+                self.assertTrue(port_db._rev_bumped)
+            # the port already in the session is not queried again, and
+            # the statements of the flush itself are not counted
+            stats = rp.get_request_stats(self.ctx.session)
+            self.assertNotIn('queries', stats)
+            self.assertEqual({'related_lookups': 1, 'bumps': 1}, stats)
+
+    def test_related_object_loaded_once_per_flush(self):
+        rp = directory.get_plugin('revision_plugin')
+        with self.port() as port:
+            rev = port['port']['revision_number']
+            stats = []
+            for ip_addresses in (['10.0.0.100'], ['10.0.0.101', '10.0.0.102']):
+                ctx = nctx.get_admin_context()
+                with ctx.session.begin():
+                    self._add_ip_allocations(ctx.session, port, *ip_addresses)
+                stats.append(rp.get_request_stats(ctx.session))
+            # the port is loaded for the first IP allocation of the flush,
+            # then found in the session for the second one and bumped once
+            self.assertEqual(1, stats[0]['related_lookups'])
+            self.assertEqual(2, stats[1]['related_lookups'])
+            self.assertGreater(stats[0]['queries'], 0)
+            self.assertEqual(stats[0]['queries'], stats[1]['queries'])
+            self.assertEqual(1, stats[1]['bumps'])
+            self.assertEqual(rev + 2, self._show(
+                'ports', port['port']['id'])['port']['revision_number'])
+
     def test_port_name_update_revises(self):
         with self.port() as port:
             rev = port['port']['revision_number']
@@ -39,6 +39,8 @@ class TestRunWsgiApp(base.BaseTestCase):
         self.processor_count = mock.patch(
             'oslo_concurrency.processutils.get_worker_count'
         ).start().return_value
+        self.prepare = mock.patch.object(
+            service, '_prepare_shared_state').start()
 
     def _test_api_workers(self, config_value, expected_passed_value):
         if config_value is not None:
@@ -59,6 +61,14 @@ class TestRunWsgiApp(base.BaseTestCase):
     def test_api_workers_defined(self):
         self._test_api_workers(42, 42)
 
+    def test_shared_state_prepared_before_start(self):
+        with mock.patch('neutron.wsgi.Server') as mock_server:
+            mock_server.return_value.start.side_effect = (
+                lambda *a, **kw: self.prepare.assert_called_once_with())
+            service.run_wsgi_app(mock.sentinel.app)
+        mock_server.return_value.start.assert_called_once_with(
+            mock.ANY, mock.ANY, mock.ANY, workers=mock.ANY)
+
     def test_start_all_workers(self):
         cfg.CONF.set_override('api_workers', 0)
         mock.patch.object(service, '_get_rpc_workers').start()
@@ -70,3 +80,28 @@ class TestRunWsgiApp(base.BaseTestCase):
         service.start_all_workers()
         callback.assert_called_once_with(
             resources.PROCESS, events.AFTER_SPAWN, mock.ANY, payload=None)
+
+
+class TestPrepareSharedState(base.BaseTestCase):
+    def setUp(self):
+        super(TestPrepareSharedState, self).setUp()
+        self.policy_init = mock.patch.object(service.policy, 'init').start()
+        self.gc = mock.patch.object(service, 'gc').start()
+
+    def test_prepare_shared_state(self):
+        service._prepare_shared_state()
+        self.policy_init.assert_called_once_with()
+        self.gc.collect.assert_called_once_with()
+        self.gc.freeze.assert_called_once_with()
+
+    def test_prepare_shared_state_without_freeze(self):
+        del self.gc.freeze
+        service._prepare_shared_state()
+        self.policy_init.assert_called_once_with()
+        self.assertFalse(self.gc.collect.called)
+
+    def test_prepare_shared_state_disabled(self):
+        cfg.CONF.set_override('prefork_shared_state', False)
+        service._prepare_shared_state()
+        self.assertFalse(self.policy_init.called)
+        self.assertFalse(self.gc.collect.called)